@@ -1,14 +1,43 @@
-import json
 from typing import Dict, Any
 from langgraph.graph import StateGraph, END
 
+from core.context_builder import compact_json
 from core.react_agent import ReActAgent
+from core.state import AcademicState
+from core.tracing import traced_node
+
+# Static instructions lead, per-request data follows in the user message (prompt-cache friendly)
+ANALYZE_PROMPT = """Analyze student situation and determine guidance approach.
+        The student context and request follow in the next message.
+
+        ANALYZE:
+        1. Current challenges
+        2. Learning style compatibility
+        3. Time management needs
+        4. Stress management requirements
+        """
+
+GENERATE_PROMPT = """Generate personalized academic guidance based on the analysis in the next message.
+
+        EXAMPLES: {examples}
+
+        FORMAT:
+        1. Immediate Action Steps
+        2. Schedule Optimization
+        3. Energy Management
+        4. Support Strategies
+        5. Emergency Protocols
+        """
 
 class AdvisorAgent(ReActAgent):
+    name = "ADVISOR"
+    output_keys = ("situation_analysis", "guidance")
+
     def __init__(self, llm_instance: Any):
         super().__init__(llm_instance)
         self.llm = llm_instance
         self.few_shot_examples = self._initialize_fewshots()
+        self.generate_prompt = GENERATE_PROMPT.format(examples=compact_json(self.few_shot_examples))
         self.workflow = self.create_subgraph()
 
     def _initialize_fewshots(self):
@@ -46,50 +75,41 @@ class AdvisorAgent(ReActAgent):
         ]
 
     def create_subgraph(self) -> StateGraph:
-        subgraph = StateGraph(Dict) # Using Dict for AcademicState
-        subgraph.add_node("advisor_analyze", self.analyze_situation)
-        subgraph.add_node("advisor_generate", self.generate_guidance)
+        subgraph = StateGraph(AcademicState) # Shares reducers with the main graph so node updates merge
+        subgraph.add_node("advisor_analyze", traced_node("advisor_analyze", self.analyze_situation))
+        subgraph.add_node("advisor_generate", traced_node("advisor_generate", self.generate_guidance))
         subgraph.add_edge("advisor_analyze", "advisor_generate")
         subgraph.set_entry_point("advisor_analyze")
         subgraph.add_edge("advisor_generate", END)
         return subgraph.compile()
 
     async def analyze_situation(self, state: Dict) -> Dict:
+        if "situation_analysis" in state["results"]: # Already computed, e.g. speculatively
+            return {}
         profile = state["profile"]
-        learning_prefs = profile.get("learning_preferences", {})
-        prompt = f"""Analyze student situation and determine guidance approach:
-
-        CONTEXT:
-        - Profile: {json.dumps(profile, indent=2)}
-        - Learning Preferences: {json.dumps(learning_prefs, indent=2)}
-        - Request: {state['messages'][-1].content}
-
-        ANALYZE:
-        1. Current challenges
-        2. Learning style compatibility
-        3. Time management needs
-        4. Stress management requirements
-        """
-        response = await self.llm.agenerate([{"role": "system", "content": prompt}])
-        return {"results": {"situation_analysis": {"analysis": response}}}
+        # Learning preferences are part of the profile, sending them separately doubled the prompt
+        messages = [
+            {"role": "system", "content": ANALYZE_PROMPT},
+            {"role": "user", "content": (
+                f"CONTEXT:\n"
+                f"- Profile: {self.context.fit_value(profile, 'advisor_analyze')}\n"
+                f"- Request: {state['messages'][-1].content}"
+            )}
+        ]
+        response = await self.llm.agenerate(messages, cache=self.cache_analysis, node="advisor_analyze")
+        return {"results": {
+            "situation_analysis": {"analysis": response},
+            "prompt_tokens": {"advisor_analyze": self.context.measure(messages)}
+        }}
 
     async def generate_guidance(self, state: Dict) -> Dict:
         analysis = state["results"].get("situation_analysis", {}).get("analysis", "") # Adjusted path
-        prompt = f"""Generate personalized academic guidance based on analysis:
-
-        ANALYSIS: {analysis}
-        EXAMPLES: {json.dumps(self.few_shot_examples, indent=2)}
-
-        FORMAT:
-        1. Immediate Action Steps
-        2. Schedule Optimization
-        3. Energy Management
-        4. Support Strategies
-        5. Emergency Protocols
-        """
-        response = await self.llm.agenerate([{"role": "system", "content": prompt}])
-        return {"results": {"guidance": {"advice": response}}}
-
-    async def __call__(self, state: Dict) -> Dict:
-        final_state_advisor = await self.workflow.ainvoke(state)
-        return final_state_advisor.get("results", {})
\ No newline at end of file
+        messages = [
+            {"role": "system", "content": self.generate_prompt},
+            {"role": "user", "content": f"ANALYSIS: {analysis}"}
+        ]
+        response = await self.stream_generate("advisor_generate", messages, cache=self.cache_generation)
+        return {"results": {
+            "guidance": {"advice": response},
+            "prompt_tokens": {"advisor_generate": self.context.measure(messages)}
+        }}
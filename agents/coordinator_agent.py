@@ -1,6 +1,12 @@
 # agents/coordinator_agent.py
-import json
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+from pydantic import ValidationError
+
+from agents.router import RouterConfig, ROUTER_MODES, route_by_rules
+from config.llm_config import PRIORITY_HIGH
+from core.context_builder import compact_json
+from core.react_agent import CoordinatorPlan
 
 # Assuming AcademicState and YourLLM are passed in context or imported locally
 # from core.state import AcademicState
@@ -31,15 +37,22 @@ COORDINATOR_PROMPT = """You are a Coordinator Agent using ReACT framework to orc
         4. Learning Style Alignment
         5. Support Type Needed
 
-        CONTEXT:
-        Request: {request}
-        Student Context: {context}
-
-        FORMAT RESPONSE AS:
-        Thought: [Analysis of academic needs and context]
-        Action: [Agent selection and grouping strategy]
-        Observation: [Expected workflow and dependencies]
-        Decision: [Final agent deployment plan with rationale]
+        The request and the student context follow in the next message.
+
+        FORMAT RESPONSE AS a single JSON object, with no text outside it:
+        {
+          "thought": "[Analysis of academic needs and context]",
+          "action": "[Agent selection and grouping strategy]",
+          "observation": "[Expected workflow and dependencies]",
+          "decision": "[Final agent deployment plan with rationale]",
+          "required_agents": ["PLANNER", "NOTEWRITER", "ADVISOR"],
+          "priority": {"PLANNER": 1, "NOTEWRITER": 2, "ADVISOR": 3},
+          "concurrent_groups": [["PLANNER", "NOTEWRITER", "ADVISOR"]],
+          "dependencies": {}
+        }
+        Only list the agents the request needs. Agents in the same group run in parallel and
+        groups run in order. "dependencies" maps an agent to the agents whose output it must
+        wait for; leave it empty unless an agent really needs another agent's result.
         """
 
 async def analyze_context(state: Dict) -> Dict: # Use Dict for state type hinting
@@ -68,7 +81,30 @@ async def analyze_context(state: Dict) -> Dict: # Use Dict for state type hintin
         "study_patterns": profile.get("learning_preferences", {}).get("study_patterns", {})
     }
 
+def parse_structured_response(response: str) -> Optional[Dict]:
+    # JSON-mode replies are usually bare objects, but tolerate code fences and stray prose
+    start, end = response.find("{"), response.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        plan = CoordinatorPlan.model_validate_json(response[start:end + 1])
+    except ValidationError as e:
+        print(f"Coordinator JSON failed validation: {e}")
+        return None
+    return {
+        "required_agents": plan.required_agents,
+        "priority": plan.priority or {agent: i + 1 for i, agent in enumerate(plan.required_agents)},
+        "concurrent_groups": plan.concurrent_groups,
+        "dependencies": plan.dependencies,
+        "reasoning": plan.thought or plan.decision or "Structured coordination"
+    }
+
 def parse_coordinator_response(response: str) -> Dict:
+    structured = parse_structured_response(response or "")
+    if structured is not None:
+        return structured
+
+    # Legacy free-text ReAct replies
     try:
         analysis = {
             "required_agents": ["PLANNER"],
@@ -86,7 +122,8 @@ def parse_coordinator_response(response: str) -> Dict:
             if "Advisor" in response or "guidance" in response.lower():
                 analysis["required_agents"].append("ADVISOR")
                 analysis["priority"]["ADVISOR"] = 3
-                # ADVISOR typically runs after initial planning, so it might be a separate group or later in the sequence
+                # ADVISOR does not consume the other agents' output, so it runs alongside them
+                analysis["concurrent_groups"][0].append("ADVISOR")
 
             thought_section_match = response.split("Thought:")[1].split("Action:")[0].strip() if "Thought:" in response and "Action:" in response else None
             analysis["reasoning"] = thought_section_match if thought_section_match else analysis["reasoning"]
@@ -101,19 +138,38 @@ def parse_coordinator_response(response: str) -> Dict:
             "reasoning": "Fallback due to parse error"
         }
 
-async def coordinator_agent(state: Dict, llm_instance: Any) -> Dict: # Pass llm_instance as argument
+async def coordinator_agent(state: Dict, llm_instance: Any, mode: Optional[str] = None) -> Dict: # Pass llm_instance as argument
     try:
         context = await analyze_context(state)
         query = state['messages'][-1].content
 
-        prompt = COORDINATOR_PROMPT
+        mode = mode or RouterConfig.mode
+        if mode not in ROUTER_MODES:
+            raise ValueError(f"Unknown router mode: {mode}")
+        if mode != "llm":
+            routed = route_by_rules(query, context)
+            if mode == "rules" or routed["confidence"] >= RouterConfig.confidence_threshold:
+                return {
+                    "results": {
+                        "coordinator_analysis": {
+                            "required_agents": routed["required_agents"],
+                            "priority": routed["priority"],
+                            "concurrent_groups": routed["concurrent_groups"],
+                            "reasoning": routed["reasoning"],
+                            "router": "rules",
+                            "confidence": routed["confidence"]
+                        }
+                    }
+                }
 
+        # The instructions never change, so they lead the prompt and the provider can cache them
         response = await llm_instance.agenerate([
-            {"role": "system", "content": prompt.format(
-                request = query,
-                context = json.dumps(context, indent=2)
-            )}
-        ])
+            {"role": "system", "content": COORDINATOR_PROMPT},
+            {"role": "user", "content": f"Request: {query}\nStudent Context: {compact_json(context)}"}
+        ], cache=True, # Routing is a deterministic analysis step, safe to reuse
+            response_format={"type": "json_object"},
+            priority=PRIORITY_HIGH, # Every agent waits on this call
+            node="coordinator")
 
         analysis = parse_coordinator_response(response)
         return {
@@ -122,7 +178,9 @@ async def coordinator_agent(state: Dict, llm_instance: Any) -> Dict: # Pass llm_
                     "required_agents": analysis.get("required_agents", ["PLANNER"]),
                     "priority": analysis.get("priority", {"PLANNER": 1}),
                     "concurrent_groups": analysis.get("concurrent_groups", [["PLANNER"]]),
-                    "response": response
+                    "dependencies": analysis.get("dependencies", {}),
+                    "response": response,
+                    "router": "llm"
                 }
             }
         }
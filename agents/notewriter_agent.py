@@ -1,15 +1,53 @@
 # agents/notewriter_agent.py
-import json
 from typing import Dict, Any
 from langgraph.graph import StateGraph, END
 
+from core.context_builder import compact_json
 from core.react_agent import ReActAgent
+from core.state import AcademicState
+from core.tracing import traced_node
+
+# Fixed instructions go in the system message and per-request data in the user message,
+# so repeated calls share a byte-identical prefix that the provider can cache
+ANALYZE_PROMPT = """Analyze content requirements and determine optimal note structure.
+        The student profile and request follow in the next message.
+
+        FORMAT:
+        1. Key Topics (80/20 principle)
+        2. Learning Style Adaptations
+        3. Time Management Strategy
+        4. Quick Reference Format
+
+        FOCUS ON:
+        - Essential concepts that give maximum understanding
+        - Visual and interactive elements
+        - Time-optimized study methods
+        """
+
+GENERATE_PROMPT = """Create concise, high-impact study materials based on the analysis in the next message.
+
+        EXAMPLES:
+        {examples}
+
+        FORMAT:
+        **THREE-WEEK INTENSIVE STUDY PLANNER**
+
+        [Generate structured notes with:]
+        1. Weekly breakdown
+        2. Daily focus areas
+        3. Core concepts
+        4. Emergency tips
+        """
 
 class NoteWriterAgent(ReActAgent):
+    name = "NOTEWRITER"
+    output_keys = ("learning_analysis", "generated_notes")
+
     def __init__(self, llm_instance: Any):
         super().__init__(llm_instance)
         self.llm = llm_instance
         self.few_shot_examples = self._initialize_fewshots()
+        self.generate_prompt = GENERATE_PROMPT.format(examples=compact_json(self.few_shot_examples))
         self.workflow = self.create_subgraph()
 
     def _initialize_fewshots(self):
@@ -45,62 +83,46 @@ class NoteWriterAgent(ReActAgent):
         ]
 
     def create_subgraph(self) -> StateGraph:
-        subgraph = StateGraph(Dict) # Using Dict for AcademicState
-        subgraph.add_node("notewriter_analyze", self.analyze_learning_style)
-        subgraph.add_node("notewriter_generate", self.generate_notes)
+        subgraph = StateGraph(AcademicState) # Shares reducers with the main graph so node updates merge
+        subgraph.add_node("notewriter_analyze", traced_node("notewriter_analyze", self.analyze_learning_style))
+        subgraph.add_node("notewriter_generate", traced_node("notewriter_generate", self.generate_notes))
         subgraph.add_edge("notewriter_analyze", "notewriter_generate")
         subgraph.set_entry_point("notewriter_analyze")
         subgraph.add_edge("notewriter_generate", END)
         return subgraph.compile()
 
     async def analyze_learning_style(self, state: Dict) -> Dict:
+        if "learning_analysis" in state["results"]: # Already computed, e.g. speculatively
+            return {}
         profile = state["profile"]
         learning_style = profile.get("learning_preferences", {}).get("learning_style", {})
-        prompt = f"""Analyze content requirements and determine optimal note structure:
-
-        STUDENT PROFILE:
-        - Learning Style: {json.dumps(learning_style, indent=2)}
-        - Request: {state['messages'][-1].content}
-
-        FORMAT:
-        1. Key Topics (80/20 principle)
-        2. Learning Style Adaptations
-        3. Time Management Strategy
-        4. Quick Reference Format
-
-        FOCUS ON:
-        - Essential concepts that give maximum understanding
-        - Visual and interactive elements
-        - Time-optimized study methods
-        """
-        response = await self.llm.agenerate([{"role": "system", "content": prompt}])
-        return {"results": {"learning_analysis": {"analysis": response}}}
+        messages = [
+            {"role": "system", "content": ANALYZE_PROMPT},
+            {"role": "user", "content": (
+                f"STUDENT PROFILE:\n"
+                f"- Learning Style: {self.context.fit_value(learning_style, 'notewriter_analyze')}\n"
+                f"- Request: {state['messages'][-1].content}"
+            )}
+        ]
+        response = await self.llm.agenerate(messages, cache=self.cache_analysis, node="notewriter_analyze")
+        return {"results": {
+            "learning_analysis": {"analysis": response},
+            "prompt_tokens": {"notewriter_analyze": self.context.measure(messages)}
+        }}
 
     async def generate_notes(self, state: Dict) -> Dict:
         analysis = state["results"].get("learning_analysis", {}).get("analysis", "") # Adjusted path
         learning_style = state["profile"].get("learning_preferences", {}).get("learning_style", {}) # Adjusted path
-
-        prompt = f"""Create concise, high-impact study materials based on analysis:
-
-        ANALYSIS: {analysis}
-        LEARNING STYLE: {json.dumps(learning_style, indent=2)}
-        REQUEST: {state['messages'][-1].content}
-
-        EXAMPLES:
-        {json.dumps(self.few_shot_examples, indent=2)}
-
-        FORMAT:
-        **THREE-WEEK INTENSIVE STUDY PLANNER**
-
-        [Generate structured notes with:]
-        1. Weekly breakdown
-        2. Daily focus areas
-        3. Core concepts
-        4. Emergency tips
-        """
-        response = await self.llm.agenerate([{"role": "system", "content": prompt}])
-        return {"results": {"generated_notes": {"notes": response}}}
-
-    async def __call__(self, state: Dict) -> Dict:
-        final_state_notewriter = await self.workflow.ainvoke(state)
-        return final_state_notewriter.get("results", {})
\ No newline at end of file
+        messages = [
+            {"role": "system", "content": self.generate_prompt},
+            {"role": "user", "content": (
+                f"ANALYSIS: {analysis}\n"
+                f"LEARNING STYLE: {compact_json(learning_style)}\n"
+                f"REQUEST: {state['messages'][-1].content}"
+            )}
+        ]
+        response = await self.stream_generate("notewriter_generate", messages, cache=self.cache_generation)
+        return {"results": {
+            "generated_notes": {"notes": response},
+            "prompt_tokens": {"notewriter_generate": self.context.measure(messages)}
+        }}
@@ -1,16 +1,63 @@
 # agents/planner_agent.py
-import json
-from typing import Dict, Any
-from datetime import datetime, timezone, timedelta
-from langgraph.graph import StateGraph, END # Import START here if it's used in subgraphs
+from typing import Dict, Any, Callable, List, Tuple
+from langgraph.graph import StateGraph, START, END
 
+from core.context_builder import compact_json, summarize_events, summarize_tasks
 from core.react_agent import ReActAgent
+from core.state import AcademicState
+from core.timeline import ensure_task_index, upcoming_events
+from core.tracing import traced_node
+
+PLAN_PROMPT = """AI Planning Assistant: Create focused study plan using ReACT framework.
+
+          EXAMPLES:
+          {examples}
+
+          INSTRUCTIONS:
+          1. Follow ReACT pattern:
+            Thought: Analyze situation and needs
+            Action: Consider all analyses
+            Observation: Synthesize findings
+            Plan: Create structured plan
+
+          2. Address:
+            - ADHD management strategies
+            - Energy level optimization
+            - Task chunking methods
+            - Focus period scheduling
+            - Environment switching tactics
+            - Recovery period planning
+            - Social/sport activity balance
+
+          3. Include:
+            - Emergency protocols
+            - Backup strategies
+            - Quick wins
+            - Reward system
+            - Progress tracking
+            - Adjustment triggers
+
+          Pls act as an intelligent tool to help the students reach their goals or overcome struggles and answer with informal words.
+
+          The student's analyses and request follow in the next message.
+
+          FORMAT:
+          Thought: [reasoning and situation analysis]
+          Action: [synthesis approach]
+          Observation: [key findings]
+          Plan: [actionable steps and structural schedule]
+          """
 
 class PlannerAgent(ReActAgent):
+    name = "PLANNER"
+    output_keys = ("calendar_analysis", "task_analysis", "final_plan")
+
     def __init__(self, llm_instance: Any):
         super().__init__(llm_instance)
         self.llm = llm_instance
         self.few_shot_examples = self._initialize_fewshots()
+        # Serialized once: byte-identical across requests, which provider prompt caching needs
+        self.plan_prompt = PLAN_PROMPT.format(examples=compact_json(self.few_shot_examples))
         self.workflow = self.create_subgraph()
 
     def _initialize_fewshots(self):
@@ -59,27 +106,35 @@ class PlannerAgent(ReActAgent):
             }
         ]
 
+    def analyzer_nodes(self) -> Dict[str, Tuple[Callable, List[str]]]:
+        # Analysis nodes and the analyzers each one depends on. Nodes without dependencies
+        # start together, and plan_generator waits for all of them.
+        return {
+            "calendar_analyzer": (self.calendar_analyzer, []),
+            "task_analyzer": (self.task_analyzer, [])
+        }
+
     def create_subgraph(self) -> StateGraph:
-        # Pass AcademicState directly or use Dict here if it's not imported at module level
-        subgraph = StateGraph(Dict) # Using Dict as a placeholder for AcademicState
-        subgraph.add_node("calendar_analyzer", self.calendar_analyzer)
-        subgraph.add_node("task_analyzer", self.task_analyzer)
-        subgraph.add_node("plan_generator", self.plan_generator)
-        subgraph.add_edge("calendar_analyzer", "task_analyzer")
-        subgraph.add_edge("task_analyzer", "plan_generator")
-        subgraph.set_entry_point("calendar_analyzer")
+        subgraph = StateGraph(AcademicState) # Shares reducers with the main graph so node updates merge
+        analyzers = self.analyzer_nodes()
+        for name, (node, depends_on) in analyzers.items():
+            subgraph.add_node(name, traced_node(name, node))
+            if depends_on:
+                subgraph.add_edge(depends_on, name) # Runs once every dependency has finished
+            else:
+                subgraph.add_edge(START, name)
+        subgraph.add_node("plan_generator", traced_node("plan_generator", self.plan_generator))
+        subgraph.add_edge(list(analyzers), "plan_generator")
         subgraph.add_edge("plan_generator", END) # Make sure this ends somewhere
         return subgraph.compile()
 
     async def calendar_analyzer(self, state: Dict) -> Dict:
-        events = state["calendar"].get("events", [])
-        now = datetime.now(timezone.utc)
-        future = now + timedelta(days=7)
-        filtered_events = [
-            event for event in events if now <= datetime.fromisoformat(event['start']["dateTime"]) <= future
-        ]
+        if "calendar_analysis" in state["results"]: # Restored from the student's session
+            return {}
+        # Binary search over the start times parsed at ingest, soonest first
+        filtered_events = upcoming_events(state["calendar"], days=7)
         prompt = """Analyze calendar events and identify:
-        Events: {events}
+        Events: provided as JSON in the next message
 
         Focus on:
         - Available time blocks
@@ -92,15 +147,21 @@ class PlannerAgent(ReActAgent):
         """
         messages = [
             {"role": "system", "content": prompt},
-            {"role": "user", "content": json.dumps(filtered_events)}
+            # Soonest events first; whatever overflows the budget is summarized per day
+            {"role": "user", "content": self.context.fit_items(filtered_events, "calendar_analyzer", summarize_events)}
         ]
-        response = await self.llm.agenerate(messages)
-        return {"results": {"calendar_analysis": {"analysis": response}}}
+        response = await self.llm.agenerate(messages, cache=self.cache_analysis, node="calendar_analyzer")
+        return {"results": {
+            "calendar_analysis": {"analysis": response},
+            "prompt_tokens": {"calendar_analyzer": self.context.measure(messages)}
+        }}
 
     async def task_analyzer(self, state: Dict) -> Dict:
-        tasks = state["tasks"].get("tasks", [])
+        if "task_analysis" in state["results"]:
+            return {}
+        tasks = ensure_task_index(state["tasks"])["tasks"] # Sorted by due date
         prompt = """Analyze tasks and create priority structure:
-        Tasks: {tasks}
+        Tasks: provided as JSON in the next message
 
         Consider:
         - Urgency levels
@@ -114,71 +175,34 @@ class PlannerAgent(ReActAgent):
         """
         messages = [
             {"role": "system", "content": prompt},
-            {"role": "user", "content": json.dumps(tasks)}
+            {"role": "user", "content": self.context.fit_items(tasks, "task_analyzer", summarize_tasks)}
         ]
-        response = await self.llm.agenerate(messages)
-        return {"results": {"task_analysis": {"analysis": response}}}
+        response = await self.llm.agenerate(messages, cache=self.cache_analysis, node="task_analyzer")
+        return {"results": {
+            "task_analysis": {"analysis": response},
+            "prompt_tokens": {"task_analyzer": self.context.measure(messages)}
+        }}
 
     async def plan_generator(self, state: Dict) -> Dict:
         # Ensure these keys exist from previous steps in the subgraph
-        profile_analysis = state["results"].get("profile_analysis", {}) # This might come from profile_analyzer node outside this subgraph
+        profile_analysis = compact_json(state["results"].get("profile_analysis", {})) # This might come from profile_analyzer node outside this subgraph
         calendar_analysis = state["results"].get("calendar_analysis", {})
         task_analysis = state["results"].get("task_analysis", {})
 
-        prompt = f"""AI Planning Assistant: Create focused study plan using ReACT framework.
-
-          INPUT CONTEXT:
-          - Profile Analysis: {profile_analysis}
-          - Calendar Analysis: {calendar_analysis}
-          - Task Analysis: {task_analysis}
-
-          EXAMPLES:
-          {json.dumps(self.few_shot_examples, indent=2)}
-
-          INSTRUCTIONS:
-          1. Follow ReACT pattern:
-            Thought: Analyze situation and needs
-            Action: Consider all analyses
-            Observation: Synthesize findings
-            Plan: Create structured plan
-
-          2. Address:
-            - ADHD management strategies
-            - Energy level optimization
-            - Task chunking methods
-            - Focus period scheduling
-            - Environment switching tactics
-            - Recovery period planning
-            - Social/sport activity balance
-
-          3. Include:
-            - Emergency protocols
-            - Backup strategies
-            - Quick wins
-            - Reward system
-            - Progress tracking
-            - Adjustment triggers
-
-          Pls act as an intelligent tool to help the students reach their goals or overcome struggles and answer with informal words.
-
-          FORMAT:
-          Thought: [reasoning and situation analysis]
-          Action: [synthesis approach]
-          Observation: [key findings]
-          Plan: [actionable steps and structural schedule]
-          """
-
+        # Static instructions and examples first so every plan request shares a cacheable prefix
         messages = [
-            {"role": "system", "content": prompt},
-            {"role": "user", "content": state["messages"][-1].content}
+            {"role": "system", "content": self.plan_prompt},
+            {"role": "user", "content": (
+                f"INPUT CONTEXT:\n"
+                f"- Profile Analysis: {profile_analysis}\n"
+                f"- Calendar Analysis: {calendar_analysis}\n"
+                f"- Task Analysis: {task_analysis}\n\n"
+                f"REQUEST: {state['messages'][-1].content}"
+            )}
         ]
-        response = await self.llm.agenerate(messages, temperature=0.5)
-
-        return {"results": {"final_plan": {"plan": response}}}
+        response = await self.stream_generate("plan_generator", messages, temperature=0.5, cache=self.cache_generation)
 
-    async def __call__(self, state: Dict) -> Dict: # This is the entry point from the main graph
-        # This will invoke the internal workflow of the PlannerAgent
-        final_state_planner = await self.workflow.ainvoke(state)
-        # Extract the relevant output from the final state of the subgraph
-        # and merge it back into the main state's results
-        return final_state_planner.get("results", {}) # Return just the results part
\ No newline at end of file
+        return {"results": {
+            "final_plan": {"plan": response},
+            "prompt_tokens": {"plan_generator": self.context.measure(messages)}
+        }}
@@ -0,0 +1,71 @@
+# agents/router.py
+import os
+import re
+from typing import Dict, List
+
+class RouterConfig:
+    # "llm": always ask the coordinator LLM, "rules": never ask it,
+    # "hybrid": use the rules when they are confident and fall back to the LLM otherwise
+    mode: str = os.getenv("ATLAS_ROUTER_MODE", "hybrid")
+    confidence_threshold: float = 0.75
+
+ROUTER_MODES = ("llm", "rules", "hybrid")
+
+# Explicit asks select an agent outright; hints only suggest it and make the rules unsure
+AGENT_RULES = {
+    "PLANNER": {
+        "strong": [r"\bschedul", r"\bplan(ner|ning)?\b", r"\bcalendar", r"\bdeadline", r"\btime[- ]manag", r"\bdue\b", r"\bthis week\b", r"\btomorrow\b", r"\btonight\b"],
+        "weak": [r"\bprepare\b", r"\bmanag", r"\bbusy\b", r"\bexam\b"]
+    },
+    "NOTEWRITER": {
+        "strong": [r"\bnotes?\b", r"\bsummar", r"\bstudy (materials?|guide|sheet)", r"\bcheat ?sheet", r"\bflash ?cards?", r"\bcram", r"\bexplain\b", r"\bkey concepts?\b"],
+        "weak": [r"\breview\b", r"\bstudy\b", r"\blearn\b", r"\bunderstand\b", r"\bprepare\b"]
+    },
+    "ADVISOR": {
+        "strong": [r"\badvi[cs]e", r"\bguidance\b", r"\bstress", r"\boverwhelm", r"\banxi", r"\bburn ?out", r"\bmotivat", r"\bcareer\b", r"\bshould i\b"],
+        "weak": [r"\bstruggl", r"\badhd\b", r"\bbalance\b", r"\bfocus\b", r"\btired\b"]
+    }
+}
+
+def _matches(patterns: List[str], text: str) -> List[str]:
+    return [p for p in patterns if re.search(p, text)]
+
+def route_by_rules(request: str, context: Dict) -> Dict:
+    """Keyword routing over the request and the coordinator's local context.
+
+    Returns the same shape as ``parse_coordinator_response`` plus a ``confidence``
+    in [0, 1]; every agent that is only hinted at lowers it.
+    """
+    text = request.lower()
+    selected = ["PLANNER"] # Same default as the LLM coordinator
+    ambiguous = []
+    matched = {}
+
+    for agent, rules in AGENT_RULES.items():
+        strong = _matches(rules["strong"], text)
+        weak = _matches(rules["weak"], text)
+        matched[agent] = strong or weak
+        if agent == "PLANNER":
+            continue
+        if strong:
+            selected.append(agent)
+        elif weak:
+            ambiguous.append(agent)
+
+    # A named course with no explicit note request is a classic "maybe notes" case
+    if context.get("course") and "NOTEWRITER" not in selected and "NOTEWRITER" not in ambiguous:
+        ambiguous.append("NOTEWRITER")
+
+    summary = ", ".join(f"{agent}={len(m)}" for agent, m in matched.items())
+    if not any(matched.values()):
+        confidence = 0.4 # Nothing recognisable, let the LLM read it
+    else:
+        confidence = max(0.0, 0.95 - 0.25 * len(ambiguous))
+
+    return {
+        "required_agents": selected,
+        "priority": {agent: i + 1 for i, agent in enumerate(selected)},
+        "concurrent_groups": [list(selected)],
+        "reasoning": f"Rule-based routing (matches: {summary}; ambiguous: {', '.join(ambiguous) or 'none'})",
+        "confidence": confidence
+    }
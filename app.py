@@ -2,14 +2,19 @@
 # Triggering CI for the third time
 import streamlit as st
 import asyncio
-from datetime import datetime
-from typing import Dict
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
 
 # Import all necessary modules from your new structure
-from config.llm_config import YourLLM, get_openai_key
+from config.llm_config import LLMConfig, closing_clients, get_openai_key, get_output_budgets
 from core.state import AcademicState
+from core.tracing import export_json, export_otel, timing_breakdown, totals, totals_by, trace
 from data.data_manager import DataManager
-from workflow.graph_builder import create_agents_graph
+from data.loaders import iter_calendar_export, iter_google_tasks
+from data.session_store import get_session_manager
+from workflow.checkpointing import discard_run, new_thread_id, open_checkpointer, pending_nodes, thread_config, with_checkpointer
+from workflow.graph_registry import get_agents_graph
 from langchain_core.messages import HumanMessage # Needed for HumanMessage
 
 # --- Streamlit UI Components for Data Input ---
@@ -63,11 +68,17 @@ def get_calendar_input():
         start_time = st.time_input(f"Start Time {i+1}", key=f"event_start_time_{i}", value=datetime.now().time())
 
         if summary and start_date and start_time:
-            start_datetime_str = f"{start_date}T{start_time}:00Z"
+            start_datetime_str = f"{start_date.isoformat()}T{start_time.isoformat(timespec='seconds')}Z"
             events.append({
                 "summary": summary,
                 "start": {"dateTime": start_datetime_str}
             })
+
+    # Exports are streamed and only the coming week is kept, however many years they cover
+    export = st.file_uploader("Or import a calendar export (Google Calendar JSON or .ics)", type=["json", "ics"])
+    if export is not None:
+        now = datetime.now(timezone.utc)
+        events.extend(iter_calendar_export(export, start=now, end=now + timedelta(days=7)))
     return {"events": events}
 
 def get_task_input():
@@ -84,32 +95,43 @@ def get_task_input():
         due_time = st.time_input(f"Due Time {i+1}", key=f"task_due_time_{i}", value=datetime.now().time())
 
         if title and due_date and due_time:
-            due_datetime_str = f"{due_date}T{due_time}:00Z"
+            due_datetime_str = f"{due_date.isoformat()}T{due_time.isoformat(timespec='seconds')}Z"
             tasks.append({
                 "title": title,
                 "status": status,
                 "due": due_datetime_str
             })
+
+    export = st.file_uploader("Or import a Google Tasks export (JSON)", type=["json"])
+    if export is not None:
+        tasks.extend(iter_google_tasks(export, start=datetime.now(timezone.utc))) # Tasks due from now on
     return {"tasks": tasks}
 
 # --- Main Application Logic (Modified for Streamlit) ---
 
-async def run_all_system_streamlit(profile_data: Dict, calendar_data: Dict, task_data: Dict, user_request: str):
-    st.info(f"Processing request: {user_request}")
+async def run_all_system_streamlit(profile_data: Dict, calendar_data: Dict, task_data: Dict, user_request: str, speculative: bool = False, resume_thread: Optional[str] = None):
+    st.info(f"{'Resuming' if resume_thread else 'Processing'} request: {user_request}")
 
-    llm_instance = YourLLM(get_openai_key()) # Get the LLM instance
     dm = DataManager()
     dm.load_data(profile_data, calendar_data, task_data) # Pass dicts directly
 
     initial_state = AcademicState(
         messages=[HumanMessage(content=user_request)],
-        profile=dm.get_student_profile("student_123"), # Assuming fixed student ID
-        calendar={"events": dm.get_upcoming_events()},
-        tasks={"tasks": dm.get_active_tasks()},
-        results={}
+        profile=dm.get_student_profile(profile_data["profiles"][0]["id"]), # The student entered in the sidebar
+        calendar=dm.get_calendar(), # Parsed once: events sorted with their epoch start times
+        tasks=dm.get_task_list(),
+        results={},
+        agent_runs={}
     )
+    # Analyses from this student's earlier requests whose inputs have not changed are reused as-is
+    sessions = get_session_manager()
+    if sessions is not None and initial_state["profile"]:
+        reused = sessions.restore(initial_state)
+        initial_state["results"].update(reused)
+        if reused:
+            st.caption(f"Reusing from your last session: {', '.join(sorted(reused))}")
 
-    graph = create_agents_graph(llm_instance)
+    graph = get_agents_graph(speculative=speculative) # Built once per process and LLM config, reused across reruns
 
     st.subheader("Workflow Execution")
     # Streamlit doesn't directly support mermaid PNG display, consider alternatives
@@ -125,28 +147,71 @@ async def run_all_system_streamlit(profile_data: Dict, calendar_data: Dict, task
 
     # Use a placeholder for dynamic output
     output_placeholder = st.empty()
-
-    async for step in graph.astream(initial_state):
-        step_num += 1
-        current_progress = min(step_num / total_steps_estimate, 1.0)
-        my_bar.progress(current_progress, text=f"Executing step {step_num}...")
-
-        step_name = list(step.keys())[0] # Get the current node name
-        step_value = step[step_name]
-
-        with output_placeholder.container():
-            st.markdown(f"**Current Step:** `{step_name}`")
-            if "coordinator_analysis" in step_value.get("results", {}):
-                coordinator_output = step_value
-                analysis = coordinator_output["results"]["coordinator_analysis"]
-                st.markdown("**Selected Agents:**")
-                for agent in analysis.get("required_agents", []):
-                    st.markdown(f"- {agent}")
-            elif step_name == "execute":
-                final_state = step_value # Capture the state after executor runs
+    # Tokens streamed by the generation nodes, rendered per agent while the graph runs
+    live_area = st.empty()
+    live_container = live_area.container()
+    live_text = {}
+    live_placeholders = {}
+
+    # Checkpointed per superstep, so a failed or timed-out run can be resumed under the same thread id
+    async with open_checkpointer() as checkpointer:
+        graph = with_checkpointer(graph, checkpointer)
+        thread_id = resume_thread or new_thread_id()
+        graph_input = initial_state
+        if resume_thread:
+            graph_input = None # Continue from the saved checkpoint instead of starting over
+            st.caption(f"Continuing from: {', '.join(await pending_nodes(graph, thread_id)) or 'nothing, the run had finished'}")
+
+        # Every node and LLM call below records a span under this request's root
+        try:
+            with trace("request", request=user_request) as request_trace:
+                async for namespace, mode, chunk in graph.astream(graph_input, thread_config(thread_id), stream_mode=["updates", "custom"], subgraphs=True):
+                    if mode == "custom":
+                        agent = chunk["agent"]
+                        if agent not in live_placeholders:
+                            with live_container:
+                                st.markdown(f"### {agent} Output (streaming)")
+                                live_placeholders[agent] = st.empty()
+                        live_text[agent] = live_text.get(agent, "") + chunk["delta"]
+                        live_placeholders[agent].markdown(live_text[agent])
+                        continue
+                    if namespace: # Node updates from inside an agent subgraph
+                        continue
+
+                    step = chunk
+                    step_num += 1
+                    current_progress = min(step_num / total_steps_estimate, 1.0)
+                    my_bar.progress(current_progress, text=f"Executing step {step_num}...")
+
+                    step_name = list(step.keys())[0] # Get the current node name
+                    step_value = step[step_name]
+
+                    with output_placeholder.container():
+                        st.markdown(f"**Current Step:** `{step_name}`")
+                        if "coordinator_analysis" in step_value.get("results", {}):
+                            coordinator_output = step_value
+                            analysis = coordinator_output["results"]["coordinator_analysis"]
+                            st.markdown(f"**Selected Agents** (routed by {analysis.get('router', 'llm')}):")
+                            for agent in analysis.get("required_agents", []):
+                                st.markdown(f"- {agent}")
+                            speculation = coordinator_output["results"].get("speculation")
+                            if speculation:
+                                st.markdown(f"**Speculative work:** reused {speculation['useful'] or 'none'}, discarded {speculation['wasted'] or 'none'}")
+                        elif step_name == "execute":
+                            final_state = step_value # Capture the state after executor runs
+        except Exception as e:
+            st.session_state["atlas_resume"] = {"thread_id": thread_id, "request": user_request, "speculative": speculative}
+            st.error(f"The run stopped: {e}. Completed steps are saved, use 'Resume last run' to finish it.")
+            show_timing_breakdown(request_trace)
+            return coordinator_output, None
+        await discard_run(graph, thread_id)
+    st.session_state.pop("atlas_resume", None)
 
     my_bar.progress(100, text="Execution Complete!")
+    if sessions is not None and initial_state["profile"] and final_state:
+        sessions.save(initial_state, final_state.get("results", {}))
     st.success("Task Completed!")
+    live_area.empty() # The final outputs below replace the streamed drafts
 
     if final_state:
         agent_outputs = final_state.get("results", {}).get("agent_outputs", {}) # Corrected path for agent_outputs
@@ -167,8 +232,27 @@ async def run_all_system_streamlit(profile_data: Dict, calendar_data: Dict, task
                     st.json(output_data)
             else: # Direct string output
                 st.markdown(output_data)
+
+    show_timing_breakdown(request_trace)
+    if os.getenv("ATLAS_TRACE_OTEL") == "1": # Also hand the spans to a configured OpenTelemetry exporter
+        export_otel(request_trace)
     return coordinator_output, final_state
 
+def show_timing_breakdown(request_trace):
+    summary = totals(request_trace)
+    with st.expander(f"Timing breakdown ({request_trace.duration:.1f}s, {summary['llm_calls']} LLM calls, ~${summary['cost_usd']:.4f})"):
+        st.dataframe(timing_breakdown(request_trace), use_container_width=True)
+        st.dataframe(totals_by(request_trace, "tier"), use_container_width=True) # Small vs large model latency and cost
+        st.caption(
+            f"Prompt tokens: {summary['prompt_tokens']} ({summary['cached_tokens']} cached), "
+            f"completion tokens: {summary['completion_tokens']}, time queued for the API: {summary['queue_time']:.2f}s"
+        )
+        # Completion tokens per node over every run in this process, against the node's max_tokens
+        budgets = get_output_budgets().report(lambda node: LLMConfig.node_max_tokens.get(node, LLMConfig.max_tokens))
+        if budgets:
+            st.dataframe([{"node": node, **row} for node, row in sorted(budgets.items())], use_container_width=True)
+        st.download_button("Download trace (JSON)", export_json(request_trace), file_name="atlas_trace.json", mime="application/json")
+
 
 # --- Streamlit App Entry Point ---
 
@@ -192,6 +276,9 @@ def main_app():
         calendar_data = get_calendar_input()
         task_data = get_task_input()
 
+        st.subheader("Execution")
+        speculative = st.checkbox("Start agents speculatively while the coordinator decides", value=False)
+
     st.header("Your Academic Request")
     user_request = st.text_area(
         "Describe what you need help with (e.g., 'Help me prepare for my Calculus III exam tomorrow while managing my football match tonight and Data Structures assignment due soon.')",
@@ -201,13 +288,24 @@ def main_app():
 
     st.markdown("---")
 
+    failed_run = st.session_state.get("atlas_resume")
+    if failed_run and st.button(f"Resume last run ({failed_run['request'][:40]})"):
+        with st.spinner("Resuming from the last completed step..."):
+            asyncio.run(closing_clients(
+                run_all_system_streamlit(
+                    profile_data, calendar_data, task_data, failed_run["request"],
+                    speculative=failed_run["speculative"], resume_thread=failed_run["thread_id"]
+                )
+            ))
+
     if st.button("Run ATLAS Assistant", type="primary"):
         if user_request and profile_data and calendar_data and task_data:
             # Use a spinner for background processing
             with st.spinner("Initiating agents and processing request..."):
-                coordinator_output, final_state = asyncio.run(
-                    run_all_system_streamlit(profile_data, calendar_data, task_data, user_request)
-                )
+                # Each click runs on a new event loop; close its API connections before the loop ends
+                coordinator_output, final_state = asyncio.run(closing_clients(
+                    run_all_system_streamlit(profile_data, calendar_data, task_data, user_request, speculative=speculative)
+                ))
             # Results are displayed within run_all_system_streamlit
         else:
             st.error("Please ensure all data input sections are filled and provide a request.")
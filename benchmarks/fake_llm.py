@@ -0,0 +1,101 @@
+import asyncio
+import json
+import random
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+# Coordinator reply used for structured (json_object) requests: every agent, one group
+COORDINATOR_PLAN = {
+    "thought": "The request needs a schedule, study notes and guidance.",
+    "action": "Run all three agents together.",
+    "observation": "They do not depend on each other.",
+    "decision": "PLANNER, NOTEWRITER and ADVISOR in one group.",
+    "required_agents": ["PLANNER", "NOTEWRITER", "ADVISOR"],
+    "priority": {"PLANNER": 1, "NOTEWRITER": 2, "ADVISOR": 3},
+    "concurrent_groups": [["PLANNER", "NOTEWRITER", "ADVISOR"]],
+    "dependencies": {}
+}
+
+class LatencyModel:
+    """Seeded per-call latency in seconds.
+
+    Specs are ``fixed:<s>``, ``uniform:<low>:<high>`` or ``lognormal:<median>:<sigma>``;
+    ``0`` (or ``fixed:0``) disables sleeping entirely.
+    """
+    def __init__(self, spec: str = "fixed:0", seed: int = 0):
+        parts = spec.split(":")
+        try:
+            self.kind, self.params = "fixed", [float(parts[0])] # A bare number is a fixed latency
+        except ValueError:
+            self.kind, self.params = parts[0], [float(p) for p in parts[1:]]
+        if self.kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency model: {spec}")
+        self.spec = spec
+        self._random = random.Random(seed)
+
+    def sample(self) -> float:
+        if self.kind == "fixed":
+            return self.params[0] if self.params else 0.0
+        if self.kind == "uniform":
+            return self._random.uniform(self.params[0], self.params[1])
+        median, sigma = self.params[0], self.params[1] if len(self.params) > 1 else 0.5
+        return median * self._random.lognormvariate(0.0, sigma)
+
+class FakeCompletions:
+    def __init__(self, latency: LatencyModel, completion_tokens: int, stream_chunks: int):
+        self.latency = latency
+        self.completion_tokens = completion_tokens
+        self.stream_chunks = stream_chunks
+        self.calls = 0
+        self.prompt_tokens = 0
+        self._seen_prefixes = set()
+
+    def _usage(self, messages: List[Dict]) -> SimpleNamespace:
+        # ~4 characters per token; a system message seen before counts as a provider cache hit
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4 + 4 * len(messages)
+        prefix = messages[0].get("content", "") if messages and messages[0].get("role") == "system" else ""
+        cached = len(prefix) // 4 if prefix in self._seen_prefixes else 0
+        if prefix:
+            self._seen_prefixes.add(prefix)
+        self.prompt_tokens += prompt_tokens
+        return SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=self.completion_tokens,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=cached)
+        )
+
+    async def create(self, model: str, messages: List[Dict], stream: bool = False,
+                     response_format: Optional[Dict] = None, stream_options: Optional[Dict] = None, **kwargs):
+        self.calls += 1
+        delay = self.latency.sample()
+        usage = self._usage(messages)
+        if response_format and response_format.get("type") == "json_object":
+            content = json.dumps(COORDINATOR_PLAN)
+        else:
+            content = " ".join(f"token{i}" for i in range(self.completion_tokens))
+        if stream:
+            return self._stream(content, delay, usage if (stream_options or {}).get("include_usage") else None)
+        if delay:
+            await asyncio.sleep(delay)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+    async def _stream(self, content: str, delay: float, usage: Optional[SimpleNamespace]):
+        words = content.split(" ")
+        size = max(1, len(words) // self.stream_chunks)
+        for start in range(0, len(words), size):
+            if delay:
+                await asyncio.sleep(delay / self.stream_chunks)
+            text = " ".join(words[start:start + size]) + " "
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))], usage=None)
+        if usage is not None:
+            yield SimpleNamespace(choices=[], usage=usage)
+
+class FakeOpenAIClient:
+    """Drop-in for AsyncOpenAI's ``chat.completions.create``, with no network access."""
+    def __init__(self, latency: Optional[LatencyModel] = None, completion_tokens: int = 200, stream_chunks: int = 8):
+        self.chat = SimpleNamespace(completions=FakeCompletions(latency or LatencyModel(), completion_tokens, stream_chunks))
+
+    @property
+    def calls(self) -> int:
+        return self.chat.completions.calls
@@ -0,0 +1,143 @@
+"""End-to-end benchmark of the agent graph against an offline fake LLM.
+
+Runs ``create_agents_graph`` with the real YourLLM (scheduler, single-flight, prompt
+building) on top of a fake OpenAI client, for synthetic students of growing size:
+
+    python -m benchmarks.run_benchmarks --sizes 10 100 1000 10000 --iterations 5 --latency lognormal:0.05:0.5
+
+Reports p50/p95 latency, LLM calls and agent runs per request, prompt tokens and
+peak traced memory. ``--json`` writes the raw report for comparing runs.
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+from langchain_core.messages import HumanMessage
+
+from benchmarks.fake_llm import FakeOpenAIClient, LatencyModel
+from benchmarks.synthetic import make_dataset
+from config.llm_cache import MemoryLRUCache, SingleFlight
+from config.llm_config import LLMScheduler, YourLLM
+from core.state import AcademicState
+from data.data_manager import DataManager
+from workflow.graph_builder import create_agents_graph
+
+DEFAULT_REQUEST = "Help me with notes and guidance for Calculus III, and plan my week"
+
+def percentile(values: List[float], q: float) -> float:
+    # Linear interpolation between closest ranks, q in [0, 100]
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def build_state(profile_data: Dict, calendar_data: Dict, task_data: Dict, request: str) -> AcademicState:
+    # Same path as run_all_system_streamlit
+    dm = DataManager()
+    dm.load_data(profile_data, calendar_data, task_data)
+    return AcademicState(
+        messages=[HumanMessage(content=request)],
+        profile=dm.get_student_profile(profile_data["profiles"][0]["id"]),
+        calendar=dm.get_calendar(), # Parsed once: events sorted with their epoch start times
+        tasks=dm.get_task_list(),
+        results={},
+        agent_runs={}
+    )
+
+async def run_size(
+        size: int,
+        iterations: int,
+        latency: str = "0",
+        completion_tokens: int = 200,
+        router_mode: str = "llm",
+        speculative: bool = False,
+        measure_memory: bool = True,
+        request: str = DEFAULT_REQUEST,
+        seed: int = 0
+) -> Dict:
+    client = FakeOpenAIClient(LatencyModel(latency, seed), completion_tokens)
+    llm = YourLLM(
+        "offline",
+        client=client,
+        scheduler=LLMScheduler(requests_per_minute=10 ** 9, tokens_per_minute=10 ** 9),
+        single_flight=SingleFlight()
+    )
+    graph = create_agents_graph(llm, speculative=speculative, router_mode=router_mode)
+    profile_data, calendar_data, task_data = make_dataset(size, size, seed)
+
+    latencies, calls, runs, memory = [], [], [], []
+    for _ in range(iterations):
+        # Fresh response cache per request: repeats of the same synthetic student would
+        # otherwise be served from it, unlike distinct users
+        llm.cache = MemoryLRUCache()
+        calls_before = client.calls
+        if measure_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        final_state = await graph.ainvoke(build_state(profile_data, calendar_data, task_data, request))
+        latencies.append(time.perf_counter() - started)
+        if measure_memory:
+            memory.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        calls.append(client.calls - calls_before)
+        runs.append(max(final_state.get("agent_runs", {}).values(), default=0))
+
+    return {
+        "size": size,
+        "iterations": iterations,
+        "latency_model": latency,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "llm_calls_per_request": max(calls),
+        "max_agent_runs": max(runs), # >1 means some agent ran twice in one request
+        "prompt_tokens_per_request": client.chat.completions.prompt_tokens // iterations,
+        "peak_memory_mb": round(max(memory) / 2 ** 20, 2) if memory else None
+    }
+
+def run_benchmark(sizes: List[int], iterations: int = 5, **options) -> List[Dict]:
+    async def run_all() -> List[Dict]:
+        return [await run_size(size, iterations, **options) for size in sizes]
+    return asyncio.run(run_all())
+
+def format_report(rows: List[Dict]) -> str:
+    columns = ["size", "p50_ms", "p95_ms", "llm_calls_per_request", "max_agent_runs", "prompt_tokens_per_request", "peak_memory_mb"]
+    widths = {c: max(len(c), *(len(str(row[c])) for row in rows)) for c in columns}
+    lines = ["  ".join(c.rjust(widths[c]) for c in columns)]
+    lines += ["  ".join(str(row[c]).rjust(widths[c]) for c in columns) for row in rows]
+    return "\n".join(lines)
+
+def main(argv: Optional[List[str]] = None) -> List[Dict]:
+    parser = argparse.ArgumentParser(description="Offline benchmark of the ATLAS agent graph")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000], help="events and tasks per student")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--latency", default="lognormal:0.05:0.5", help="fixed:<s>, uniform:<low>:<high> or lognormal:<median>:<sigma>")
+    parser.add_argument("--completion-tokens", type=int, default=200)
+    parser.add_argument("--router", default="llm", choices=["llm", "rules", "hybrid"])
+    parser.add_argument("--speculative", action="store_true")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc, which slows the run down")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    rows = run_benchmark(
+        args.sizes,
+        args.iterations,
+        latency=args.latency,
+        completion_tokens=args.completion_tokens,
+        router_mode=args.router,
+        speculative=args.speculative,
+        measure_memory=not args.no_memory
+    )
+    print(format_report(rows))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return rows
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Microbenchmark of the state reducer against the previous copying implementation.
+
+Replays the merges the ``results`` channel sees in one request (graph input, subgraph
+seeding, node writes with LLM-sized strings) starting from a results dict that already
+holds ``keys`` entries, and reports time and allocations per request for each reducer:
+
+    python -m benchmarks.state_merge --keys 10 100 1000 --text-size 4000 --repeat 200
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.run_benchmarks import percentile
+from core.state import dict_reducer
+
+AGENT_KEYS = {
+    "planner": [("calendar_analysis", "calendar_analyzer"), ("task_analysis", "task_analyzer"), ("final_plan", "plan_generator")],
+    "notewriter": [("learning_analysis", "notewriter_analyze"), ("generated_notes", "notewriter_generate")],
+    "advisor": [("situation_analysis", "advisor_analyze"), ("guidance", "advisor_generate")]
+}
+
+def copying_dict_reducer(dict1: Dict[str, Any], dict2: Dict[str, Any]) -> Dict[str, Any]:
+    # The reducer before copy-on-write: every level on the update's path is copied, changed or not
+    merged = dict1.copy()
+    for key, value in dict2.items():
+        if key in merged and isinstance(merged[key], dict) and isinstance(value, dict):
+            merged[key] = copying_dict_reducer(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+REDUCERS: Dict[str, Callable] = {"copying": copying_dict_reducer, "copy_on_write": dict_reducer}
+
+def make_results(keys: int, text_size: int) -> Dict[str, Any]:
+    # Results already in the state, e.g. restored analyses or earlier outputs
+    return {f"history_{i}": {"analysis": f"{i}:" + "x" * text_size, "prompt_tokens": i} for i in range(keys)}
+
+def replay(reducer: Callable, base: Dict[str, Any], text_size: int) -> Dict[str, Any]:
+    # The results channel through one request: the graph input, then each agent subgraph
+    # seeded with the main state, its node writes, and the entry node handing them back
+    text = "y" * text_size
+    results = reducer({}, base)
+    results = reducer(results, {"profile_analysis": {"analysis": {"learning_style": {"visual": True}}}})
+    results = reducer(results, {"coordinator_analysis": {"required_agents": ["PLANNER", "NOTEWRITER", "ADVISOR"], "router": "llm"}})
+    entries = []
+    for outputs in AGENT_KEYS.values():
+        sub_results = reducer({}, results)
+        for key, node in outputs:
+            sub_results = reducer(sub_results, {key: {"analysis": text}, "prompt_tokens": {node: 1200}})
+        entries.append({key: sub_results[key] for key, _ in outputs})
+    for entry in entries: # The entry nodes run in one superstep and merge one after another
+        results = reducer(results, entry)
+    # Nodes that find their work already done return nothing for results
+    results = reducer(results, {})
+    return reducer(results, {"agent_outputs": {agent: {key: results[key] for key, _ in outputs} for agent, outputs in AGENT_KEYS.items()}})
+
+def run_merge_benchmark(keys: List[int], text_size: int = 4000, repeat: int = 200) -> List[Dict]:
+    rows = []
+    for size in keys:
+        base = make_results(size, text_size)
+        for name, reducer in REDUCERS.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                replay(reducer, base, text_size)
+                timings.append(time.perf_counter() - started)
+
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            final = replay(reducer, base, text_size)
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del final
+            rows.append({
+                "keys": size,
+                "reducer": name,
+                "p50_us": round(percentile(timings, 50) * 1e6, 1),
+                "p95_us": round(percentile(timings, 95) * 1e6, 1),
+                "allocated_kb": round((peak - before) / 1024, 1), # Peak above the shared inputs while merging
+                "retained_kb": round((current - before) / 1024, 1) # Still held by the final state
+            })
+    return rows
+
+def format_report(rows: List[Dict]) -> str:
+    columns = ["keys", "reducer", "p50_us", "p95_us", "allocated_kb", "retained_kb"]
+    widths = {c: max(len(c), *(len(str(row[c])) for row in rows)) for c in columns}
+    lines = ["  ".join(c.rjust(widths[c]) for c in columns)]
+    lines += ["  ".join(str(row[c]).rjust(widths[c]) for c in columns) for row in rows]
+    return "\n".join(lines)
+
+def main(argv: Optional[List[str]] = None) -> List[Dict]:
+    parser = argparse.ArgumentParser(description="Microbenchmark of the AcademicState reducer")
+    parser.add_argument("--keys", type=int, nargs="+", default=[10, 100, 1000], help="entries already in results")
+    parser.add_argument("--text-size", type=int, default=4000, help="characters per LLM output")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    rows = run_merge_benchmark(args.keys, args.text_size, args.repeat)
+    print(format_report(rows))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return rows
+
+if __name__ == "__main__":
+    main()
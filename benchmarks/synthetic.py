@@ -0,0 +1,46 @@
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Tuple
+
+COURSES = ["Calculus III", "Linear Algebra", "Data Structures", "Organic Chemistry", "Microeconomics", "World History"]
+ACTIVITIES = ["Lecture", "Lab", "Study group", "Gym", "Work shift", "Club meeting", "Office hours", "Practice"]
+
+def make_dataset(n_events: int, n_tasks: int, seed: int = 0, days: int = 7, student_id: str = "student_123") -> Tuple[Dict, Dict, Dict]:
+    """Profile, calendar and task dicts in the shape the app feeds DataManager.
+
+    Events and due dates are spread over the next ``days`` days, so all of them
+    survive DataManager's upcoming/active filters and reach the agents' prompts.
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    horizon = days * 24 * 3600
+
+    def stamp(offset: int) -> str:
+        return (now + timedelta(seconds=offset)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    profile = {
+        "id": student_id,
+        "personal_info": {"major": "Computer Science", "academic_year": "Junior"},
+        "learning_preferences": {
+            "learning_style": {"visual": True, "auditory": False, "kinesthetic": rng.random() < 0.5},
+            "study_patterns": {"peak_time": "morning", "focus_duration": "45 minutes"}
+        },
+        "academic_info": {"current_courses": [{"name": name, "grade": rng.choice("ABC")} for name in COURSES[:4]]}
+    }
+    events = []
+    for i in range(n_events):
+        start = rng.randrange(60, horizon)
+        events.append({
+            "summary": f"{rng.choice(ACTIVITIES)} {i}",
+            "start": {"dateTime": stamp(start)},
+            "end": {"dateTime": stamp(start + rng.choice((1800, 3600, 5400)))}
+        })
+    tasks = [
+        {
+            "title": f"{rng.choice(COURSES)} assignment {i}",
+            "status": "needsAction" if rng.random() < 0.8 else "completed",
+            "due": stamp(rng.randrange(3600, horizon))
+        }
+        for i in range(n_tasks)
+    ]
+    return {"profiles": [profile]}, {"events": events}, {"tasks": tasks}
@@ -0,0 +1,258 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+def make_cache_key(model: str, messages: List[Dict], temperature: float, max_tokens: int, **options: Any) -> str:
+    # Content address of a completion request: identical inputs always map to the same key.
+    # Extra request options (e.g. response_format) only take part when they are set.
+    request = {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+    request.update({name: value for name, value in options.items() if value is not None})
+    payload = json.dumps(
+        request,
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResponseCache(ABC):
+    """Interface for completion caches; subclasses store raw response strings by key."""
+    def __init__(self):
+        self.stats = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0, "expirations": 0}
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+class MemoryLRUCache(ResponseCache):
+    def __init__(self, max_entries: int = 512, ttl: Optional[float] = 3600, time_fn: Callable[[], float] = time.time):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._time = time_fn
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict() # key -> (stored_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and self._time() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (self._time(), value)
+            self._entries.move_to_end(key)
+            self.stats["sets"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SQLiteCache(ResponseCache):
+    def __init__(self, path: str, max_entries: int = 10000, ttl: Optional[float] = 86400, time_fn: Callable[[], float] = time.time):
+        super().__init__()
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._time = time_fn
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Streamlit serves sessions from several threads, access is serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = self._time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, stored_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.stats["expirations"] += 1
+                row = None
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.stats["hits"] += 1
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = self._time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            self.stats["sets"] += 1
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+            if count > self.max_entries:
+                # Least recently accessed rows go first
+                excess = count - self.max_entries
+                self._conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY accessed_at ASC LIMIT ?)",
+                    (excess,)
+                )
+                self.stats["evictions"] += excess
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class TieredCache(ResponseCache):
+    """In-memory LRU in front of an optional on-disk tier; disk hits are promoted to memory."""
+    def __init__(self, memory: MemoryLRUCache, disk: Optional[SQLiteCache] = None):
+        super().__init__()
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        self.stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self.stats["sets"] += 1
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def tier_stats(self) -> Dict[str, Dict[str, int]]:
+        tiers = {"total": dict(self.stats), "memory": dict(self.memory.stats)}
+        if self.disk is not None:
+            tiers["disk"] = dict(self.disk.stats)
+        return tiers
+
+class _StreamFlight:
+    """Buffers one streamed completion so late joiners can replay it from the start."""
+    def __init__(self):
+        self.parts: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def pump(self, source: AsyncIterator[str]) -> None:
+        try:
+            async for delta in source:
+                self.parts.append(delta)
+                self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+
+    async def replay(self) -> AsyncIterator[str]:
+        index = 0
+        while True:
+            while index < len(self.parts):
+                yield self.parts[index]
+                index += 1
+            if self.done:
+                break
+            await self._changed.wait()
+        if self.error is not None:
+            raise self.error
+
+class SingleFlight:
+    """Coalesces concurrent identical LLM calls onto one in-flight request.
+
+    Unlike the response cache this only covers the window before a response exists:
+    the shared work is dropped as soon as it finishes. Keys are scoped to the running
+    event loop because the shared futures belong to it.
+    """
+    def __init__(self):
+        self._calls: Dict[tuple, asyncio.Task] = {}
+        self._streams: Dict[tuple, _StreamFlight] = {}
+        self.stats = {"calls": 0, "coalesced": 0}
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        task = self._calls.get(flight_key)
+        if task is None:
+            # A task, so one caller being cancelled does not cancel the call for the others
+            task = loop.create_task(call())
+            self._calls[flight_key] = task
+            task.add_done_callback(lambda _: self._calls.pop(flight_key, None))
+            self.stats["calls"] += 1
+        else:
+            self.stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    async def stream(self, key: str, open_stream: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        flight = self._streams.get(flight_key)
+        if flight is None:
+            flight = _StreamFlight()
+            self._streams[flight_key] = flight
+            flight.task = loop.create_task(flight.pump(open_stream()))
+            flight.task.add_done_callback(lambda _: self._streams.pop(flight_key, None))
+            self.stats["calls"] += 1
+        else:
+            self.stats["coalesced"] += 1
+        async for delta in flight.replay():
+            yield delta
@@ -0,0 +1,80 @@
+import asyncio
+import importlib.util
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+import httpx
+
+# httpx only speaks HTTP/2 with the optional h2 package installed (pip install "httpx[http2]")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+def openai_client(api_key: str, base_url: str, http_client: httpx.AsyncClient) -> Any:
+    from openai import AsyncOpenAI
+    # max_retries=0: LLMScheduler owns retries so backoff is shared across callers
+    return AsyncOpenAI(base_url=base_url, api_key=api_key, max_retries=0, http_client=http_client)
+
+class LLMClientManager:
+    """Pooled API clients, one per (event loop, API key, base URL).
+
+    An httpx connection pool belongs to the event loop it was opened on, and a client
+    reused after that loop closes fails with spurious connection errors. Clients are
+    therefore created per running loop: long-lived loops (the ASGI service) keep one
+    warm pool, and entry points that run a loop per call (Streamlit's asyncio.run per
+    click, the batch CLI) call ``aclose()`` before their loop ends. Clients of loops that
+    closed without that are dropped on the next ``get``.
+    """
+    def __init__(
+            self,
+            max_connections: int = 16,
+            max_keepalive: int = 8,
+            keepalive_expiry: float = 60.0,
+            timeout: float = 60.0,
+            connect_timeout: float = 10.0,
+            http2: bool = False,
+            client_factory: Callable[[str, str, httpx.AsyncClient], Any] = openai_client
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        if http2 and not HTTP2_AVAILABLE:
+            print("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._factory = client_factory
+        self._clients: Dict[asyncio.AbstractEventLoop, Dict[Tuple[str, str], Any]] = {}
+        self._lock = threading.Lock() # Streamlit sessions run on separate threads, each with its own loop
+        self.stats = {"created": 0, "closed": 0, "dropped": 0}
+
+    def get(self, api_key: str, base_url: str) -> Any:
+        """The running loop's client for this key and endpoint, created on first use."""
+        if not api_key:
+            raise ValueError("OpenAI API Key is not configured.")
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._drop_closed_loops()
+            clients = self._clients.setdefault(loop, {})
+            client = clients.get((api_key, base_url))
+            if client is None:
+                http_client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, http2=self.http2)
+                client = clients[(api_key, base_url)] = self._factory(api_key, base_url, http_client)
+                self.stats["created"] += 1
+        return client
+
+    def _drop_closed_loops(self) -> None:
+        # Their connections cannot be closed any more; just let them be collected
+        for loop in [loop for loop in self._clients if loop.is_closed()]:
+            self.stats["dropped"] += len(self._clients.pop(loop))
+
+    async def aclose(self) -> None:
+        """Close the running loop's clients and their connections."""
+        with self._lock:
+            clients = self._clients.pop(asyncio.get_running_loop(), {})
+        for client in clients.values():
+            await client.close()
+            self.stats["closed"] += 1
+
+    def client_count(self) -> int:
+        with self._lock:
+            return sum(len(clients) for clients in self._clients.values())
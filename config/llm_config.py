@@ -1,15 +1,101 @@
 import os
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
 import streamlit as st # If you want Streamlit API key input here
-from typing import List, Dict, Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Dict, Optional, Tuple, TypeVar
+
+from config.llm_clients import LLMClientManager
+from config.output_budgets import TERSE_END, OutputBudgets, strip_terse_end, terse_messages
+from config.llm_cache import ResponseCache, MemoryLRUCache, SQLiteCache, SingleFlight, TieredCache, make_cache_key
+from core.tracing import Span, span, start_span
 
 class LLMConfig:
     base_url: str = 'https://api.openai.com/v1' # Or your specific base URL
     model: str = 'gpt-4o' # Or your preferred model like 'gpt-3.5-turbo'
     max_tokens: int = 1024
     default_temp: float = 0.5
+    # Response cache: calls opt in per call site; set ATLAS_LLM_CACHE_PATH to add an on-disk tier
+    cache_enabled: bool = os.getenv("ATLAS_LLM_CACHE", "1") != "0"
+    cache_by_default: bool = False
+    cache_ttl: float = 3600
+    cache_max_entries: int = 512
+    cache_path: Optional[str] = os.getenv("ATLAS_LLM_CACHE_PATH")
+    cache_disk_ttl: float = 86400
+    cache_disk_max_entries: int = 10000
+    # Shared request scheduler: stay under the account's rate limits instead of hitting 429s
+    max_concurrency: int = int(os.getenv("ATLAS_LLM_MAX_CONCURRENCY", "8"))
+    requests_per_minute: int = int(os.getenv("ATLAS_LLM_RPM", "500"))
+    tokens_per_minute: int = int(os.getenv("ATLAS_LLM_TPM", "30000"))
+    max_retries: int = 4
+    retry_base_delay: float = 1.0
+    retry_max_delay: float = 30.0
+    # Share one API call between concurrent identical requests (e.g. a double-clicked button)
+    coalesce_requests: bool = os.getenv("ATLAS_LLM_COALESCE", "1") != "0"
+    # HTTP connection pool of each API client (one per event loop, key and base URL)
+    http_max_connections: int = int(os.getenv("ATLAS_HTTP_MAX_CONNECTIONS", str(max_concurrency * 2)))
+    http_max_keepalive: int = int(os.getenv("ATLAS_HTTP_MAX_KEEPALIVE", str(max_concurrency)))
+    http_keepalive_expiry: float = 60.0
+    http_timeout: float = float(os.getenv("ATLAS_HTTP_TIMEOUT", "60"))
+    http_connect_timeout: float = 10.0
+    http2: bool = os.getenv("ATLAS_HTTP2", "0") == "1"
+    # Model tiers per node: routing and intermediate analyses, which only feed the next prompt,
+    # run on the small model; user-facing generation (and any node not listed) on `model`
+    tiering: bool = os.getenv("ATLAS_MODEL_TIERING", "1") != "0"
+    small_model: str = os.getenv("ATLAS_SMALL_MODEL", "gpt-4o-mini")
+    node_tiers: Dict[str, str] = {
+        "coordinator": "small",
+        "calendar_analyzer": "small",
+        "task_analyzer": "small",
+        "notewriter_analyze": "small",
+        "advisor_analyze": "small",
+        "plan_generator": "large",
+        "notewriter_generate": "large",
+        "advisor_generate": "large"
+    }
+    # Output budgets per node; others get max_tokens
+    node_max_tokens: Dict[str, int] = {
+        "coordinator": 300,
+        "calendar_analyzer": 400,
+        "task_analyzer": 400,
+        "notewriter_analyze": 400,
+        "advisor_analyze": 400
+    }
+    # Stop sequences per node, e.g. {"task_analyzer": ["\n\nSummary"]}
+    node_stop: Dict[str, List[str]] = {}
+    # Ask the intermediate analyses, which only the next prompt reads, for terse
+    # `topic: finding` lines ending in a stop marker instead of free prose
+    terse_analyses: bool = os.getenv("ATLAS_TERSE_ANALYSES", "0") == "1"
+    terse_nodes = ("calendar_analyzer", "task_analyzer", "notewriter_analyze", "advisor_analyze")
+    # Shrink each node's max_tokens to what its recent replies needed (see OutputBudgets)
+    adaptive_max_tokens: bool = os.getenv("ATLAS_ADAPTIVE_MAX_TOKENS", "0") == "1"
+
+# USD per 1M tokens as (prompt, cached prompt, completion); used for cost estimates in traces
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-3.5-turbo": (0.50, 0.50, 1.50)
+}
+
+# Scheduler priorities, lower runs first: routing and user-facing output ahead of analysis
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+
+T = TypeVar('T')
 
 # Global LLM instance and API key setup for both local and Streamlit runs
 _llm_instance = None
+_response_cache = None
+_llm_scheduler = None
+_single_flight = None
+_client_manager = None
+_output_budgets = None
 OPENAI_KEY = None
 
 def get_openai_key():
@@ -27,27 +113,409 @@ def get_openai_key():
                     st.stop() # Stop execution until key is provided
     return OPENAI_KEY
 
+def get_client_manager() -> LLMClientManager:
+    global _client_manager
+    if _client_manager is None:
+        _client_manager = LLMClientManager(
+            max_connections=LLMConfig.http_max_connections,
+            max_keepalive=LLMConfig.http_max_keepalive,
+            keepalive_expiry=LLMConfig.http_keepalive_expiry,
+            timeout=LLMConfig.http_timeout,
+            connect_timeout=LLMConfig.http_connect_timeout,
+            http2=LLMConfig.http2
+        )
+    return _client_manager
+
 def get_llm():
-    global _llm_instance
-    if _llm_instance is None:
-        api_key = get_openai_key()
-        if not api_key:
-            raise ValueError("OpenAI API Key is not configured.")
-        from openai import AsyncOpenAI # Import here to avoid circular dependencies if LLM uses other modules
-        _llm_instance = AsyncOpenAI(
-            base_url=LLMConfig.base_url,
-            api_key=api_key
+    # The running event loop's client for the configured key; only valid inside that loop
+    return get_client_manager().get(get_openai_key(), LLMConfig.base_url)
+
+async def closing_clients(awaitable: Awaitable[T]) -> T:
+    # For entry points that run a fresh loop per call (asyncio.run): close that loop's
+    # pooled connections before the loop goes away
+    try:
+        return await awaitable
+    finally:
+        await get_client_manager().aclose()
+
+def get_response_cache() -> Optional[ResponseCache]:
+    # Shared by every YourLLM in the process so cached answers survive graph rebuilds
+    global _response_cache
+    if _response_cache is None and LLMConfig.cache_enabled:
+        disk = None
+        if LLMConfig.cache_path:
+            disk = SQLiteCache(
+                LLMConfig.cache_path,
+                max_entries=LLMConfig.cache_disk_max_entries,
+                ttl=LLMConfig.cache_disk_ttl
+            )
+        _response_cache = TieredCache(
+            MemoryLRUCache(max_entries=LLMConfig.cache_max_entries, ttl=LLMConfig.cache_ttl),
+            disk
+        )
+    return _response_cache
+
+class TokenBucket:
+    """Per-minute budget that refills continuously, e.g. requests or tokens per minute."""
+    def __init__(self, per_minute: float, time_fn: Callable[[], float] = time.monotonic):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self._time = time_fn
+        self._updated = time_fn()
+
+    def _refill(self) -> None:
+        now = self._time()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay_for(self, amount: float) -> float:
+        # Seconds until `amount` can be taken; requests larger than the bucket wait for a full one
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+def is_retryable(error: Exception) -> bool:
+    # 429s, 5xx and transport failures are worth retrying; other 4xx are not
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    from openai import APIConnectionError # Covers APITimeoutError too
+    return isinstance(error, (APIConnectionError, asyncio.TimeoutError))
+
+class LLMScheduler:
+    """Process-wide gate in front of the LLM API.
+
+    Caps concurrent requests, keeps request and token rates under the per-minute limits,
+    serves waiting calls by priority, and retries rate-limit/server errors with jittered
+    exponential backoff. The limits belong to the API key, not to an event loop, so one
+    scheduler serves every loop in the process, including the per-click loops Streamlit
+    runs on separate threads: all state is guarded by a lock, and a freed slot is handed
+    to a waiter on another loop through that loop's call_soon_threadsafe.
+    """
+    def __init__(
+            self,
+            max_concurrency: int = 8,
+            requests_per_minute: int = 500,
+            tokens_per_minute: int = 30000,
+            max_retries: int = 4,
+            base_delay: float = 1.0,
+            max_delay: float = 30.0
+    ):
+        self.max_concurrency = max_concurrency
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._active = 0
+        self._waiters = [] # heap of (priority, sequence, future)
+        self._granted = set() # Waiters handed a slot whose loop has not resumed them yet
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self.stats = {
+            "submitted": 0, "started": 0, "completed": 0, "failed": 0, "retries": 0, "rate_limit_waits": 0,
+            "max_queue_depth": 0, "total_wait": 0.0, "max_wait": 0.0
+        }
+
+    @property
+    def queue_depth(self) -> int:
+        with self._lock:
+            return len(self._waiters)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            started = self.stats["started"]
+            return {
+                **self.stats,
+                "queue_depth": len(self._waiters),
+                "in_flight": self._active,
+                "avg_wait": self.stats["total_wait"] / started if started else 0.0
+            }
+
+    def _count(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self.stats[name] += amount
+
+    async def _acquire_slot(self, priority: int) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._active < self.max_concurrency and not self._waiters:
+                self._active += 1
+                return
+            future = loop.create_future()
+            heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], len(self._waiters))
+        try:
+            await future # Resolved once _release_slot hands its slot straight to us
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = future in self._granted
+                self._granted.discard(future)
+                if not granted:
+                    self._waiters = [w for w in self._waiters if w[2] is not future]
+                    heapq.heapify(self._waiters)
+            if granted:
+                self._release_slot() # We were handed a slot just as we got cancelled
+            raise
+        with self._lock:
+            self._granted.discard(future)
+
+    def _release_slot(self) -> None:
+        while True:
+            with self._lock:
+                if not self._waiters:
+                    self._active -= 1
+                    return
+                _, _, future = heapq.heappop(self._waiters)
+                self._granted.add(future)
+            try:
+                # The waiter's loop may run on another thread; set_result must happen there
+                future.get_loop().call_soon_threadsafe(self._wake, future)
+                return
+            except RuntimeError: # Its loop has closed; pass the slot on to the next waiter
+                with self._lock:
+                    self._granted.discard(future)
+
+    @staticmethod
+    def _wake(future: asyncio.Future) -> None:
+        if not future.done(): # A cancelled waiter gives the slot back itself
+            future.set_result(None)
+
+    async def _wait_for_rate(self, estimated_tokens: int) -> None:
+        while True:
+            with self._lock:
+                delay = max(self.requests.delay_for(1), self.tokens.delay_for(estimated_tokens))
+                if delay <= 0:
+                    self.requests.consume(1)
+                    self.tokens.consume(estimated_tokens)
+                    return
+                self.stats["rate_limit_waits"] += 1
+            await asyncio.sleep(delay)
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_NORMAL, estimated_tokens: int = 0):
+        self._count("submitted")
+        queued_at = time.monotonic()
+        await self._acquire_slot(priority)
+        try:
+            await self._wait_for_rate(estimated_tokens)
+            waited = time.monotonic() - queued_at
+            with self._lock:
+                self.stats["started"] += 1
+                self.stats["total_wait"] += waited
+                self.stats["max_wait"] = max(self.stats["max_wait"], waited)
+            yield waited
+        finally:
+            self._release_slot()
+
+    async def with_retries(self, call: Callable[[], Awaitable[T]]) -> T:
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = await call()
+                self._count("completed")
+                return result
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    self._count("failed")
+                    raise
+                self._count("retries")
+                # Full jitter keeps a burst of 429'd callers from retrying in lockstep
+                await asyncio.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+
+    async def run(self, call: Callable[[], Awaitable[T]], priority: int = PRIORITY_NORMAL, estimated_tokens: int = 0) -> T:
+        async with self.slot(priority, estimated_tokens):
+            return await self.with_retries(call)
+
+def get_llm_scheduler() -> LLMScheduler:
+    global _llm_scheduler
+    if _llm_scheduler is None:
+        _llm_scheduler = LLMScheduler(
+            max_concurrency=LLMConfig.max_concurrency,
+            requests_per_minute=LLMConfig.requests_per_minute,
+            tokens_per_minute=LLMConfig.tokens_per_minute,
+            max_retries=LLMConfig.max_retries,
+            base_delay=LLMConfig.retry_base_delay,
+            max_delay=LLMConfig.retry_max_delay
         )
-    return _llm_instance
+    return _llm_scheduler
+
+MAX_USAGE_NODES = 64
+
+def get_output_budgets() -> OutputBudgets:
+    # Shared so the completion-token samples of every graph's calls add up per node
+    global _output_budgets
+    if _output_budgets is None:
+        _output_budgets = OutputBudgets()
+    return _output_budgets
+
+def get_single_flight() -> Optional[SingleFlight]:
+    global _single_flight
+    if _single_flight is None and LLMConfig.coalesce_requests:
+        _single_flight = SingleFlight()
+    return _single_flight
+
+def estimate_tokens(messages: List[Dict], max_tokens: int) -> int:
+    # Rough TPM charge: ~4 characters per prompt token plus the completion budget
+    return sum(len(str(m.get("content", ""))) for m in messages) // 4 + max_tokens
+
+def usage_counts(usage: Any) -> Dict[str, int]:
+    # Token usage of one API call; cached_tokens is the prompt prefix the provider served from its cache
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0
+    }
+
+def estimate_cost(model: str, counts: Dict[str, int]) -> float:
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        return 0.0
+    prompt, cached, completion = prices
+    uncached = counts["prompt_tokens"] - counts["cached_tokens"]
+    return (uncached * prompt + counts["cached_tokens"] * cached + counts["completion_tokens"] * completion) / 1_000_000
 
 # This will be the LLM class that wraps AsyncOpenAI
 class YourLLM:
-    def __init__(self, api_key: str):
+    def __init__(
+            self,
+            api_key: str,
+            model: Optional[str] = None,
+            temperature: Optional[float] = None,
+            max_tokens: Optional[int] = None,
+            client: Optional[Any] = None,
+            cache: Optional[ResponseCache] = None,
+            scheduler: Optional[LLMScheduler] = None,
+            single_flight: Optional[SingleFlight] = None,
+            base_url: Optional[str] = None,
+            client_manager: Optional[LLMClientManager] = None,
+            small_model: Optional[str] = None,
+            output_budgets: Optional[OutputBudgets] = None
+    ):
         self.config = LLMConfig()
-        # Use the global get_llm to ensure consistent client
-        self.client = get_llm()
+        # Per-instance overrides of the class-level defaults
+        if model is not None:
+            self.config.model = model
+        if temperature is not None:
+            self.config.default_temp = temperature
+        if max_tokens is not None:
+            self.config.max_tokens = max_tokens
+        if small_model is not None:
+            self.config.small_model = small_model
+        # Copied so one instance can retune its nodes without changing the class defaults
+        self.config.node_tiers = dict(self.config.node_tiers)
+        self.config.node_max_tokens = dict(self.config.node_max_tokens)
+        self.config.node_stop = dict(self.config.node_stop)
+        self.api_key = api_key
+        self.base_url = base_url if base_url is not None else self.config.base_url
+        # A fixed client (tests, benchmarks) is used as-is; otherwise each event loop gets its own pooled one
+        self._client = client
+        self.client_manager = client_manager if client_manager is not None else get_client_manager()
+        self.cache = cache if cache is not None else get_response_cache()
+        self.scheduler = scheduler if scheduler is not None else get_llm_scheduler()
+        self.single_flight = single_flight if single_flight is not None else get_single_flight()
+        self.budgets = output_budgets if output_budgets is not None else get_output_budgets()
+        # node -> summed usage of the API calls it made, over the life of this instance. The
+        # graph registry shares one instance across every request and session in the process,
+        # so this is a process-wide aggregate; per-request usage is in the request's trace.
+        self.usage: Dict[str, Dict[str, int]] = {}
+        self._usage_lock = threading.Lock()
         self._is_authenticated = False
 
+    @property
+    def client(self) -> Any:
+        if self._client is not None:
+            return self._client
+        return self.client_manager.get(self.api_key, self.base_url)
+
+    def tier_for(self, node: Optional[str]) -> str:
+        return self.config.node_tiers.get(node, "large") if self.config.tiering else "large"
+
+    def model_for(self, node: Optional[str]) -> str:
+        return self.config.small_model if self.tier_for(node) == "small" else self.config.model
+
+    def budget_for(self, node: Optional[str]) -> int:
+        # The configured output budget, before any adaptive cap
+        return self.config.node_max_tokens.get(node, self.config.max_tokens)
+
+    def max_tokens_for(self, node: Optional[str]) -> int:
+        budget = self.budget_for(node)
+        return self.budgets.suggest(node, budget) if self.config.adaptive_max_tokens else budget
+
+    def terse_for(self, node: Optional[str]) -> bool:
+        return self.config.terse_analyses and node in self.config.terse_nodes
+
+    def request_for(self, node: Optional[str], messages: List[Dict]) -> Tuple[List[Dict], int, Optional[List[str]]]:
+        # Messages, max_tokens and stop sequences as sent for this node
+        max_tokens = self.max_tokens_for(node)
+        stop = list(self.config.node_stop.get(node, ()))
+        if self.terse_for(node):
+            # Worded from the configured budget, so the prompt stays the same while adaptive caps move
+            messages = terse_messages(messages, self.budget_for(node))
+            stop.insert(0, TERSE_END)
+        return messages, max_tokens, stop[:4] or None # The API accepts at most 4
+
+    def record_usage(
+            self,
+            node: Optional[str],
+            usage: Any,
+            call_span: Optional[Span] = None,
+            finish_reason: Optional[str] = None
+    ) -> None:
+        if usage is None:
+            return
+        counts = usage_counts(usage)
+        with self._usage_lock:
+            name = node or "default"
+            if name not in self.usage and len(self.usage) >= MAX_USAGE_NODES:
+                name = "other" # Bounded even if callers make up node names
+            totals = self.usage.setdefault(name, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0})
+            totals["calls"] += 1
+            for key, count in counts.items():
+                totals[key] += count
+        self.budgets.record(node, counts["completion_tokens"], truncated=finish_reason == "length")
+        if call_span is not None:
+            call_span.add(**counts, cost_usd=estimate_cost(self.model_for(node), counts))
+            if finish_reason == "length": # Cut off by max_tokens
+                call_span.set(truncated=True)
+
+    def budget_report(self) -> Dict[str, Dict[str, int]]:
+        # Completion tokens each node actually used against its budget, for tuning node_max_tokens
+        return self.budgets.report(self.budget_for)
+
+    def reset_usage(self) -> Dict[str, Dict[str, int]]:
+        # Start a new aggregation window, returning the one that ends
+        with self._usage_lock:
+            usage, self.usage = self.usage, {}
+        return usage
+
+    def cache_report(self, request_trace: Optional[Span] = None) -> Dict[str, Dict[str, Any]]:
+        """Share of prompt tokens served from the provider's prompt cache, per node.
+
+        With a request's trace only that request's calls count; otherwise the report
+        covers every call this instance made since it was created or last reset.
+        """
+        if request_trace is None:
+            with self._usage_lock:
+                usage = {node: dict(totals) for node, totals in self.usage.items()}
+        else:
+            usage = {}
+            for _, item in request_trace.walk():
+                if item.kind == "llm" and "prompt_tokens" in item.attributes: # Cache hits made no API call
+                    totals = usage.setdefault(item.name, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0})
+                    totals["calls"] += 1
+                    for key in ("prompt_tokens", "cached_tokens", "completion_tokens"):
+                        totals[key] += item.attributes.get(key, 0)
+        return {
+            node: {**totals, "cached_ratio": totals["cached_tokens"] / totals["prompt_tokens"] if totals["prompt_tokens"] else 0.0}
+            for node, totals in usage.items()
+        }
+
     async def check_auth(self) -> bool:
         test_message = [{"role": "user", "content": "test"}]
         try:
@@ -61,13 +529,143 @@ class YourLLM:
     async def agenerate(
             self,
             messages: List[Dict],
-            temperature: Optional[float] = None
+            temperature: Optional[float] = None,
+            cache: Optional[bool] = None,
+            response_format: Optional[Dict] = None,
+            priority: int = PRIORITY_NORMAL,
+            node: Optional[str] = None
     ) -> str:
-        completion = await self.client.chat.completions.create(
-            model=self.config.model,
-            messages=messages,
-            temperature=temperature or self.config.default_temp,
-            max_tokens=self.config.max_tokens,
-            stream=False
-        )
-        return completion.choices[0].message.content
\ No newline at end of file
+        # cache=None defers to LLMConfig.cache_by_default; agents pass True/False per step
+        model = self.model_for(node)
+        messages, max_tokens, stop = self.request_for(node, messages)
+        with span(node or "llm", "llm", model=model, tier=self.tier_for(node), max_tokens=max_tokens) as call_span:
+            temperature = self.config.default_temp if temperature is None else temperature
+            use_cache = self.cache is not None and (self.config.cache_by_default if cache is None else cache)
+            key = make_cache_key(model, messages, temperature, max_tokens, response_format=response_format, stop=stop)
+            if use_cache:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    call_span.set(cache="hit")
+                    return cached
+
+            request = {}
+            if response_format is not None: # e.g. {"type": "json_object"} for structured replies
+                request["response_format"] = response_format
+            if stop is not None:
+                request["stop"] = stop
+
+            async def call() -> str:
+                async with self.scheduler.slot(priority, estimate_tokens(messages, max_tokens)) as waited:
+                    call_span.add(queue_time=waited)
+                    completion = await self.scheduler.with_retries(
+                        lambda: self.client.chat.completions.create(
+                            model=model,
+                            messages=messages,
+                            temperature=temperature,
+                            max_tokens=max_tokens,
+                            stream=False,
+                            **request
+                        )
+                    )
+                choice = completion.choices[0]
+                finish_reason = getattr(choice, "finish_reason", None)
+                self.record_usage(node, getattr(completion, "usage", None), call_span, finish_reason)
+                response = choice.message.content
+                if self.terse_for(node):
+                    response = strip_terse_end(response)
+                # A reply cut off by max_tokens (e.g. half a JSON object) is never served again from the cache
+                if use_cache and response is not None and finish_reason != "length":
+                    self.cache.set(key, response)
+                return response
+
+            if self.single_flight is not None:
+                return await self.single_flight.do(key, call)
+            return await call()
+
+    async def _stream_completion(
+            self,
+            messages: List[Dict],
+            temperature: float,
+            priority: int,
+            max_tokens: int,
+            stop: Optional[List[str]] = None,
+            node: Optional[str] = None,
+            call_span: Optional[Span] = None,
+            outcome: Optional[Dict] = None
+    ) -> AsyncIterator[str]:
+        # The slot is held for the whole stream; only opening it is retried, never a half-read stream.
+        # messages, max_tokens and stop are as prepared by request_for; outcome receives the finish_reason.
+        request = {} if stop is None else {"stop": stop}
+        async with self.scheduler.slot(priority, estimate_tokens(messages, max_tokens)) as waited:
+            if call_span is not None:
+                call_span.add(queue_time=waited)
+            stream = await self.scheduler.with_retries(
+                lambda: self.client.chat.completions.create(
+                    model=self.model_for(node),
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    stream_options={"include_usage": True}, # Usage arrives in a final chunk without choices
+                    **request
+                )
+            )
+            finish_reason = None
+            async for chunk in stream:
+                self.record_usage(node, getattr(chunk, "usage", None), call_span, finish_reason)
+                if not chunk.choices:
+                    continue
+                finish_reason = getattr(chunk.choices[0], "finish_reason", None) or finish_reason
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+            if outcome is not None:
+                outcome["finish_reason"] = finish_reason
+
+    async def astream(
+            self,
+            messages: List[Dict],
+            temperature: Optional[float] = None,
+            cache: Optional[bool] = None,
+            priority: int = PRIORITY_HIGH,
+            node: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        # Same contract as agenerate, but yields content deltas as they arrive.
+        # The span is not made current: this generator is suspended in between deltas.
+        model = self.model_for(node)
+        call_span = start_span(node or "llm", "llm", model=model, tier=self.tier_for(node), stream=True)
+        try:
+            temperature = self.config.default_temp if temperature is None else temperature
+            use_cache = self.cache is not None and (self.config.cache_by_default if cache is None else cache)
+            request_messages, max_tokens, stop = self.request_for(node, messages)
+            call_span.set(max_tokens=max_tokens)
+            key = make_cache_key(model, request_messages, temperature, max_tokens, stop=stop)
+            if use_cache:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    call_span.set(cache="hit")
+                    yield cached
+                    return
+
+            outcome = {}
+
+            def open_stream() -> AsyncIterator[str]:
+                outcome["opened"] = True
+                return self._stream_completion(request_messages, temperature, priority, max_tokens, stop, node, call_span, outcome)
+
+            deltas = self.single_flight.stream(key, open_stream) if self.single_flight is not None else open_stream()
+            parts = []
+            async for delta in deltas:
+                if not parts:
+                    call_span.set(first_token_ms=round(call_span.elapsed() * 1000, 1))
+                parts.append(delta)
+                yield delta
+            # Only the caller that made the request caches it (coalesced followers replay the same
+            # deltas), and never a reply cut off by max_tokens
+            if use_cache and parts and outcome.get("opened") and outcome.get("finish_reason") != "length":
+                self.cache.set(key, "".join(parts))
+        except BaseException as e:
+            call_span.finish(e)
+            raise
+        finally:
+            call_span.finish()
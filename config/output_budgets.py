@@ -0,0 +1,104 @@
+import math
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+# Marker terse replies end with; it is also sent as a stop sequence so generation ends there
+TERSE_END = "<<END>>"
+
+TERSE_INSTRUCTION = (
+    "Your reply is read by another model, not by the student. Reply in terse structured form: "
+    "one `topic: finding` line per point, short phrases instead of sentences, no introduction, "
+    "no summary, no advice to the reader, at most {words} words. "
+    f"Write {TERSE_END} on its own line when done."
+)
+
+def terse_messages(messages: List[Dict], max_tokens: int) -> List[Dict]:
+    # The instruction goes last so the cacheable prompt prefix stays the same as without it
+    words = max(30, int(max_tokens * 0.6)) # Roughly 0.75 words per token, with headroom for the keys
+    return messages + [{"role": "system", "content": TERSE_INSTRUCTION.format(words=words)}]
+
+def strip_terse_end(text: Optional[str]) -> Optional[str]:
+    # Stop sequences are not returned, but a stream or a model that ignores them may still include the marker
+    if text is None:
+        return None
+    return text.split(TERSE_END, 1)[0].rstrip()
+
+class OutputBudgets:
+    """Observed completion tokens per node, for tuning (and optionally adapting) max_tokens.
+
+    Each call records its completion tokens and whether it hit max_tokens
+    (finish_reason "length"). ``report()`` gives per-node percentiles and a suggested
+    budget; ``histogram()`` the distribution behind them. With
+    LLMConfig.adaptive_max_tokens on, YourLLM sends ``suggest()`` as max_tokens: the p95
+    plus headroom once enough samples exist, and the configured budget again as soon as
+    more than ``max_truncated`` of the recent replies were cut off.
+    """
+    def __init__(
+            self,
+            window: int = 500,
+            min_samples: int = 20,
+            headroom: float = 1.25,
+            floor: int = 64,
+            max_truncated: float = 0.05
+    ):
+        self.window = window
+        self.min_samples = min_samples
+        self.headroom = headroom
+        self.floor = floor
+        self.max_truncated = max_truncated
+        self._samples: Dict[str, Deque[Tuple[int, bool]]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, node: Optional[str], completion_tokens: int, truncated: bool = False) -> None:
+        with self._lock:
+            samples = self._samples.setdefault(node or "default", deque(maxlen=self.window))
+            samples.append((completion_tokens, truncated))
+
+    def _tokens(self, node: str) -> Tuple[List[int], int]:
+        with self._lock:
+            samples = list(self._samples.get(node, ()))
+        return sorted(tokens for tokens, _ in samples), sum(truncated for _, truncated in samples)
+
+    @staticmethod
+    def _percentile(ordered: List[int], q: float) -> int:
+        # Nearest rank, so the result is always an observed count
+        if not ordered:
+            return 0
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(len(ordered) * q / 100) - 1))]
+
+    def suggest(self, node: Optional[str], budget: int) -> int:
+        """The configured budget, or a tighter one backed by this node's recent replies."""
+        tokens, truncated = self._tokens(node or "default")
+        if len(tokens) < self.min_samples or truncated > self.max_truncated * len(tokens):
+            return budget
+        return min(budget, max(self.floor, math.ceil(self._percentile(tokens, 95) * self.headroom)))
+
+    def histogram(self, node: str, bucket: int = 50) -> Dict[str, int]:
+        """Sample counts per completion-token range, e.g. {"0-49": 3, "50-99": 12}."""
+        tokens, _ = self._tokens(node)
+        counts: Dict[str, int] = {}
+        for count in tokens:
+            low = count // bucket * bucket
+            label = f"{low}-{low + bucket - 1}"
+            counts[label] = counts.get(label, 0) + 1
+        return counts
+
+    def report(self, budget_for: Callable[[str], int]) -> Dict[str, Dict[str, int]]:
+        # budget_for: a node's configured max_tokens, to compare with what it actually uses
+        with self._lock:
+            nodes = list(self._samples)
+        rows = {}
+        for node in nodes:
+            tokens, truncated = self._tokens(node)
+            budget = budget_for(node)
+            rows[node] = {
+                "calls": len(tokens),
+                "p50": self._percentile(tokens, 50),
+                "p95": self._percentile(tokens, 95),
+                "max": tokens[-1] if tokens else 0,
+                "truncated": truncated,
+                "budget": budget,
+                "suggested": self.suggest(node, budget)
+            }
+        return rows
@@ -0,0 +1,123 @@
+import json
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import tiktoken
+except ImportError: # Fall back to a character estimate when the tokenizer is not installed
+    tiktoken = None
+
+# Prompt-data budgets in tokens, per node; the fixed instructions are not counted
+DEFAULT_TOKEN_BUDGETS = {
+    "coordinator": 600,
+    "calendar_analyzer": 2000,
+    "task_analyzer": 2000,
+    "notewriter_analyze": 400,
+    "notewriter_generate": 1500,
+    "advisor_analyze": 1200,
+    "advisor_generate": 1500,
+    "plan_generator": 3000
+}
+FALLBACK_BUDGET = 1500
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    if tiktoken is None:
+        return len(text) // 4 + 1
+    return len(_encoding(model).encode(text))
+
+def count_message_tokens(messages: List[Dict], model: str = "gpt-4o") -> int:
+    # ~4 tokens of chat framing per message on OpenAI chat models
+    return sum(count_tokens(str(m.get("content", "")), model) + 4 for m in messages)
+
+def compact(value: Any) -> Any:
+    # Drop nulls and empty containers recursively; they cost tokens and say nothing
+    if isinstance(value, dict):
+        cleaned = {k: compact(v) for k, v in value.items()}
+        return {k: v for k, v in cleaned.items() if v not in (None, "", {}, [])}
+    if isinstance(value, (list, tuple)):
+        cleaned = [compact(v) for v in value]
+        return [v for v in cleaned if v not in (None, "", {}, [])]
+    return value
+
+def compact_json(value: Any) -> str:
+    return json.dumps(compact(value), separators=(",", ":"), ensure_ascii=False, default=str)
+
+def _longest_list(value: Any) -> Optional[List]:
+    best = None
+    stack = [value]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            stack.extend(current.values())
+        elif isinstance(current, list):
+            if best is None or len(current) > len(best):
+                best = current
+            stack.extend(current)
+    return best
+
+class ContextBuilder:
+    """Serializes prompt context compactly and keeps it inside a per-node token budget."""
+    def __init__(self, budgets: Optional[Dict[str, int]] = None, model: str = "gpt-4o"):
+        self.budgets = {**DEFAULT_TOKEN_BUDGETS, **(budgets or {})}
+        self.model = model
+
+    def budget(self, node: str) -> int:
+        return self.budgets.get(node, FALLBACK_BUDGET)
+
+    def tokens(self, text: str) -> int:
+        return count_tokens(text, self.model)
+
+    def measure(self, messages: List[Dict]) -> int:
+        return count_message_tokens(messages, self.model)
+
+    def fit_items(self, items: List[Dict], node: str, summarize: Callable[[List[Dict]], Dict]) -> str:
+        """Keep items in order while they fit the node's budget and summarize the rest."""
+        budget = self.budget(node)
+        kept, used = [], 2 # Enclosing brackets
+        items = [compact(item) for item in items]
+        for index, item in enumerate(items):
+            size = self.tokens(compact_json(item)) + 1
+            if used + size > budget:
+                return compact_json(kept + [summarize(items[index:])])
+            kept.append(item)
+            used += size
+        return compact_json(kept)
+
+    def fit_value(self, value: Any, node: str) -> str:
+        """Compact a nested structure, halving its longest lists until it fits the budget."""
+        value = json.loads(compact_json(value)) # Private copy we can trim
+        text = compact_json(value)
+        while self.tokens(text) > self.budget(node):
+            longest = _longest_list(value)
+            if not longest or len(longest) <= 2:
+                # Nothing left to trim structurally, cut the serialized text
+                limit = self.budget(node) * 4
+                return text[:limit] + "...(truncated)"
+            omitted = 0
+            if isinstance(longest[-1], dict) and list(longest[-1]) == ["omitted"]:
+                omitted = longest.pop()["omitted"] # Fold the previous marker into the new one
+            keep = max(1, len(longest) // 2)
+            omitted += len(longest) - keep
+            del longest[keep:]
+            longest.append({"omitted": omitted})
+            text = compact_json(value)
+        return text
+
+def summarize_events(events: List[Dict]) -> Dict:
+    days = Counter(str(e.get("start", {}).get("dateTime", ""))[:10] for e in events)
+    return {"omitted_events": len(events), "per_day": dict(sorted(days.items()))}
+
+def summarize_tasks(tasks: List[Dict]) -> Dict:
+    return {
+        "omitted_tasks": len(tasks),
+        "by_status": dict(Counter(t.get("status", "unknown") for t in tasks)),
+        "latest_due": max((str(t.get("due", "")) for t in tasks), default=None)
+    }
@@ -1,6 +1,10 @@
-from typing import List, Dict, Optional, Any
-from pydantic import BaseModel
-from datetime import datetime, timezone
+from typing import List, Dict, Literal, Optional, Any
+from pydantic import BaseModel, Field, field_validator, model_validator
+from langgraph.config import get_config, get_stream_writer
+
+from config.llm_config import is_retryable
+from core.context_builder import ContextBuilder
+from core.timeline import events_between
 
 # Assuming AcademicState is imported from core.state
 # from core.state import AcademicState # No, this should be passed as argument
@@ -17,9 +21,56 @@ class AgentOutput(BaseModel):
     observation: str
     output: Dict
 
+class CoordinatorPlan(BaseModel):
+    thought: str = ""
+    action: str = ""
+    observation: str = ""
+    decision: str = ""
+    required_agents: List[Literal["PLANNER", "NOTEWRITER", "ADVISOR"]]
+    priority: Dict[str, int] = Field(default_factory=dict)
+    concurrent_groups: List[List[str]] = Field(default_factory=list)
+    dependencies: Dict[str, List[str]] = Field(default_factory=dict)
+
+    @field_validator("required_agents", mode="before")
+    @classmethod
+    def normalize_agents(cls, value: Any) -> Any:
+        if isinstance(value, list):
+            return [str(agent).strip().upper() for agent in value]
+        return value
+
+    @model_validator(mode="after")
+    def restrict_to_required(self) -> "CoordinatorPlan":
+        # Drop names the model invented, and make sure every selected agent is scheduled somewhere
+        required = list(dict.fromkeys(self.required_agents))
+        if not required:
+            raise ValueError("required_agents must not be empty")
+        groups = [[a.upper() for a in group if a.upper() in required] for group in self.concurrent_groups]
+        groups = [group for group in groups if group]
+        scheduled = {agent for group in groups for agent in group}
+        missing = [agent for agent in required if agent not in scheduled]
+        if missing:
+            groups.append(missing)
+        self.required_agents = required
+        self.concurrent_groups = groups
+        self.priority = {a.upper(): p for a, p in self.priority.items() if a.upper() in required}
+        self.dependencies = {
+            a.upper(): [d.upper() for d in deps if d.upper() in required and d.upper() != a.upper()]
+            for a, deps in self.dependencies.items() if a.upper() in required
+        }
+        return self
+
 class ReActAgent:
+    # Subclasses set these so the main graph's join stage knows what each agent produced
+    name: str = "REACT"
+    output_keys: tuple = ()
+    # Response-cache opt-in: intermediate analyses are deterministic enough to reuse,
+    # user-facing generation asks for a fresh completion unless an agent overrides this
+    cache_analysis: bool = True
+    cache_generation: bool = False
+
     def __init__(self, llm_instance: Any): # Use Any for llm_instance type hinting for now
         self.llm = llm_instance
+        self.context = ContextBuilder() # Compact, budgeted serialization of prompt data
         self.few_shot_examples = []
         self.tools = {
             "search_calendar": self.search_calendar,
@@ -29,9 +80,7 @@ class ReActAgent:
         }
 
     async def search_calendar(self, state: Dict) -> List[Dict]: # Use Dict for state type hinting for now
-        events = state['calendar'].get("events", [])
-        now = datetime.now(timezone.utc)
-        return [e for e in events if datetime.fromisoformat(e['start']['dateTime']) > now]
+        return events_between(state['calendar']) # Everything from now on, soonest first
 
     async def analyze_tasks(self, state: Dict) -> List[Dict]:
         return state['tasks'].get("tasks", [])
@@ -49,4 +98,44 @@ class ReActAgent:
         profile = state["profile"]
         courses = profile.get("academic_info", {}).get("current_courses", [])
         # Instead of modifying state in-place, return the update
-        return {"results": {"performance_analysis": {"courses": courses}}}
\ No newline at end of file
+        return {"results": {"performance_analysis": {"courses": courses}}}
+
+    async def stream_generate(self, node: str, messages: List[Dict], temperature: Optional[float] = None, cache: Optional[bool] = None) -> str:
+        # Forward each delta to LangGraph's "custom" stream so the UI can render tokens as they arrive
+        try:
+            writer = get_stream_writer()
+        except RuntimeError: # Called outside a graph run, nobody is listening
+            writer = None
+        parts = []
+        async for delta in self.llm.astream(messages, temperature=temperature, cache=cache, node=node):
+            parts.append(delta)
+            if writer is not None:
+                writer({"agent": self.name, "node": node, "delta": delta})
+        return "".join(parts)
+
+    @staticmethod
+    def resumable() -> bool:
+        # Runs started with a thread id are checkpointed (see workflow.checkpointing) and can be resumed
+        try:
+            return bool(get_config().get("configurable", {}).get("thread_id"))
+        except RuntimeError: # Called outside a graph run
+            return False
+
+    async def __call__(self, state: Dict) -> Dict: # This is the entry point from the main graph
+        # Invoke the agent's internal workflow exactly once and hand back only the
+        # results it produced; the executor node collects them instead of re-running us.
+        try:
+            final_state = await self.workflow.ainvoke(state)
+            results = final_state.get("results", {})
+            update = {"results": {k: results[k] for k in self.output_keys if k in results}}
+            if "prompt_tokens" in results: # Per-node prompt sizes, kept for the whole request
+                update["results"]["prompt_tokens"] = results["prompt_tokens"]
+        except Exception as e:
+            if self.resumable() and is_retryable(e):
+                # Stop the run here; the checkpoint keeps every node that finished. Errors that
+                # would fail again on resume (bad request, content filter) degrade below instead.
+                raise
+            print(f"Error executing {self.name}: {e}")
+            update = {"results": {"agent_errors": {self.name.lower(): str(e)}}}
+        update["agent_runs"] = {self.name: 1}
+        return update
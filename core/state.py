@@ -4,18 +4,43 @@ from langchain_core.messages import BaseMessage
 
 T = TypeVar('T')
 
+_MISSING = object()
+
 def dict_reducer(dict1: Dict[str, Any], dict2: Dict[str, Any]) -> Dict[str, Any]:
-    merged = dict1.copy()
+    """Deep-merge dict2 into dict1 without modifying either.
+
+    Copy-on-write along the changed paths: a level is copied only if the update
+    changes something in it, and untouched sub-dicts (and the large LLM strings in
+    them) are shared with dict1, so a merge costs the size of the update rather than
+    of the state. This relies on state dicts never being modified in place, which
+    nodes already respect by returning updates.
+    """
+    if not dict2:
+        return dict1 if dict1 is not None else {}
+    if not dict1:
+        return dict2
+    merged = None
     for key, value in dict2.items():
-        if key in merged and isinstance(merged[key], dict) and isinstance(value, dict):
-            merged[key] = dict_reducer(merged[key], value)
-        else:
-            merged[key] = value
+        current = dict1.get(key, _MISSING)
+        if isinstance(current, dict) and isinstance(value, dict):
+            value = dict_reducer(current, value)
+        if value is current:
+            continue
+        if merged is None:
+            merged = dict1.copy()
+        merged[key] = value
+    return dict1 if merged is None else merged
+
+def counter_reducer(counts1: Dict[str, int], counts2: Dict[str, int]) -> Dict[str, int]:
+    merged = dict(counts1 or {})
+    for key, value in (counts2 or {}).items():
+        merged[key] = merged.get(key, 0) + value
     return merged
 
 class AcademicState(TypedDict):
     messages: Annotated[List[BaseMessage], add] # Use Any for BaseMessage type here if langchain_core.messages is not imported yet
     profile: Annotated[Dict, dict_reducer]
-    calendar: Annotated[Dict, dict_reducer]
-    tasks: Annotated[Dict, dict_reducer]
-    results: Annotated[Dict[str, Any], dict_reducer]
\ No newline at end of file
+    calendar: Annotated[Dict, dict_reducer] # {"events", "starts"}, see core.timeline
+    tasks: Annotated[Dict, dict_reducer] # {"tasks", "dues"}, see core.timeline
+    results: Annotated[Dict[str, Any], dict_reducer]
+    agent_runs: Annotated[Dict[str, int], counter_reducer] # Subgraph invocations per agent, summed across nodes
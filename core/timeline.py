@@ -0,0 +1,84 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Union
+
+# Normalized calendar/task data carried in AcademicState. Columnar and plain so it
+# survives state merges and checkpoints as-is:
+#   calendar = {"events": [...sorted by start...], "starts": [epoch seconds, ...]}
+#   tasks = {"tasks": [...sorted by due...], "dues": [epoch seconds, ...]}
+# Datetimes are parsed once at ingest; agents query the arrays instead of re-parsing.
+
+def parse_timestamp(value: Union[str, datetime, float, int]) -> float:
+    """UTC epoch seconds from an ISO string ("Z" or offset suffix, naive means UTC), datetime or number."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        text = value.strip()
+        if text.endswith(("Z", "z")): # fromisoformat only accepts "Z" from Python 3.11 on
+            text = text[:-1] + "+00:00"
+        value = datetime.fromisoformat(text)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def event_start(event: Dict) -> float:
+    start = event["start"]
+    if isinstance(start, dict): # Google Calendar shape; all-day events only have a date
+        start = start.get("dateTime") or start["date"]
+    return parse_timestamp(start)
+
+def index_events(events: List[Dict]) -> Dict[str, List]:
+    timed = []
+    for event in events:
+        try:
+            timed.append((event_start(event), event))
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Warning: Could not process event due to {str(e)}")
+    timed.sort(key=lambda pair: pair[0])
+    return {"events": [event for _, event in timed], "starts": [start for start, _ in timed]}
+
+def index_tasks(tasks: List[Dict]) -> Dict[str, List]:
+    timed = []
+    for task in tasks:
+        try:
+            timed.append((parse_timestamp(task["due"]), task))
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Warning: Could not process task due to {str(e)}")
+    timed.sort(key=lambda pair: pair[0])
+    return {"tasks": [task for _, task in timed], "dues": [due for due, _ in timed]}
+
+def ensure_calendar_index(calendar: Dict) -> Dict:
+    # Hand-built states (tests, older callers) may only carry raw events
+    events = calendar.get("events", [])
+    if "starts" not in calendar or len(calendar["starts"]) != len(events):
+        return {**calendar, **index_events(events)}
+    return calendar
+
+def ensure_task_index(tasks: Dict) -> Dict:
+    items = tasks.get("tasks", [])
+    if "dues" not in tasks or len(tasks["dues"]) != len(items):
+        return {**tasks, **index_tasks(items)}
+    return tasks
+
+def _epoch(moment: Optional[datetime]) -> float:
+    return (moment or datetime.now(timezone.utc)).timestamp()
+
+def calendar_window(calendar: Dict, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Dict[str, List]:
+    """Events starting in [start, end] with their columns; start defaults to now, no end means open-ended."""
+    calendar = ensure_calendar_index(calendar)
+    starts = calendar["starts"]
+    low = bisect_left(starts, _epoch(start))
+    high = bisect_right(starts, end.timestamp()) if end is not None else len(starts)
+    return {"events": calendar["events"][low:high], "starts": starts[low:high]}
+
+def events_between(calendar: Dict, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict]:
+    return calendar_window(calendar, start, end)["events"]
+
+def upcoming_events(calendar: Dict, days: int = 7, now: Optional[datetime] = None) -> List[Dict]:
+    now = now or datetime.now(timezone.utc)
+    return events_between(calendar, now, now + timedelta(days=days))
+
+def tasks_due_after(tasks: Dict, now: Optional[datetime] = None) -> Dict[str, List]:
+    tasks = ensure_task_index(tasks)
+    low = bisect_right(tasks["dues"], _epoch(now))
+    return {"tasks": tasks["tasks"][low:], "dues": tasks["dues"][low:]}
@@ -0,0 +1,199 @@
+import inspect
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError: # OpenTelemetry export is optional
+    otel_trace = None
+
+class Span:
+    """One timed unit of work (a graph node or an LLM call) in a per-request span tree."""
+    def __init__(self, name: str, kind: str = "node", attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.children: List["Span"] = []
+        self.start_ns = time.time_ns() # Wall clock, for exporters
+        self._start = time.perf_counter()
+        self.duration: Optional[float] = None # Seconds, set by finish()
+        self.error: Optional[str] = None
+
+    def add(self, **counts: float) -> None:
+        # Accumulate numeric attributes, e.g. tokens over retries or several calls
+        for name, value in counts.items():
+            self.attributes[name] = self.attributes.get(name, 0) + value
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        if self.duration is None:
+            self.duration = self.elapsed()
+        if error is not None:
+            self.error = repr(error)
+
+    @property
+    def end_ns(self) -> int:
+        return self.start_ns + int((self.duration or 0.0) * 1e9)
+
+    def walk(self, depth: int = 0) -> Iterator[tuple]:
+        yield depth, self
+        for child in sorted(self.children, key=lambda span: span.start_ns):
+            yield from child.walk(depth + 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "duration_ms": round((self.duration or 0.0) * 1000, 3),
+            "attributes": dict(self.attributes),
+            "error": self.error,
+            "children": [child.to_dict() for child in sorted(self.children, key=lambda span: span.start_ns)]
+        }
+
+# The span new work is attributed to; asyncio tasks inherit a copy, so concurrent
+# nodes each see their own parent and never each other's
+_current_span: ContextVar[Optional[Span]] = ContextVar("atlas_current_span", default=None)
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+def start_span(name: str, kind: str = "node", **attributes: Any) -> Span:
+    """Open a child of the current span without making it current.
+
+    For work whose lifetime does not follow one ``with`` block in one task, like a
+    streamed completion. Outside a trace the span is simply not attached anywhere.
+    """
+    created = Span(name, kind, attributes)
+    parent = _current_span.get()
+    if parent is not None:
+        parent.children.append(created)
+    return created
+
+@contextmanager
+def span(name: str, kind: str = "node", **attributes: Any) -> Iterator[Span]:
+    child = start_span(name, kind, **attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.finish(e)
+        raise
+    finally:
+        child.finish()
+        _current_span.reset(token)
+
+@contextmanager
+def trace(name: str = "request", **attributes: Any) -> Iterator[Span]:
+    # Root of a request's span tree; nested traces start a new tree
+    root = Span(name, "request", attributes)
+    token = _current_span.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.finish(e)
+        raise
+    finally:
+        root.finish()
+        _current_span.reset(token)
+
+def traced_node(name: str, fn: Callable) -> Callable:
+    """Wrap a graph node so every run records a span under the current one."""
+    if inspect.iscoroutinefunction(fn):
+        async def node(state: Dict) -> Dict:
+            with span(name, "node"):
+                return await fn(state)
+    else:
+        def node(state: Dict) -> Dict:
+            with span(name, "node"):
+                return fn(state)
+    node.__name__ = name
+    return node
+
+def timing_breakdown(root: Span) -> List[Dict[str, Any]]:
+    """Flatten a span tree into rows for display, parents before children."""
+    rows = []
+    for depth, item in root.walk():
+        attributes = item.attributes
+        rows.append({
+            "span": "  " * depth + item.name,
+            "kind": item.kind,
+            "wall_ms": round((item.duration or 0.0) * 1000, 1),
+            "queue_ms": round(attributes.get("queue_time", 0.0) * 1000, 1),
+            "prompt_tokens": attributes.get("prompt_tokens", 0),
+            "cached_tokens": attributes.get("cached_tokens", 0),
+            "completion_tokens": attributes.get("completion_tokens", 0),
+            "cost_usd": round(attributes.get("cost_usd", 0.0), 6),
+            "error": item.error or ""
+        })
+    return rows
+
+def totals(root: Span) -> Dict[str, float]:
+    # Token and cost sums over the LLM calls in the tree
+    summed = {"llm_calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0, "queue_time": 0.0}
+    for _, item in root.walk():
+        if item.kind != "llm":
+            continue
+        summed["llm_calls"] += 1
+        for name in summed:
+            if name != "llm_calls":
+                summed[name] += item.attributes.get(name, 0)
+    return summed
+
+def totals_by(root: Span, attribute: str = "tier") -> List[Dict[str, Any]]:
+    """Latency, token and cost totals of the LLM calls grouped by a span attribute, e.g. tier or model."""
+    groups: Dict[Any, Dict[str, Any]] = {}
+    for _, item in root.walk():
+        if item.kind != "llm":
+            continue
+        value = item.attributes.get(attribute, "")
+        row = groups.setdefault(value, {
+            attribute: value, "llm_calls": 0, "wall_ms": 0.0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0
+        })
+        row["llm_calls"] += 1
+        row["wall_ms"] += (item.duration or 0.0) * 1000
+        for name in ("prompt_tokens", "completion_tokens", "cost_usd"):
+            row[name] += item.attributes.get(name, 0)
+    rows = sorted(groups.values(), key=lambda row: str(row[attribute]))
+    for row in rows:
+        row["wall_ms"] = round(row["wall_ms"], 1)
+        row["cost_usd"] = round(row["cost_usd"], 6)
+    return rows
+
+def export_json(root: Span, path: Optional[str] = None) -> str:
+    payload = json.dumps(root.to_dict(), indent=2, default=str)
+    if path is not None:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(payload)
+    return payload
+
+def export_otel(root: Span, tracer: Any = None) -> bool:
+    """Replay a finished span tree into OpenTelemetry; returns False when it is not installed."""
+    if otel_trace is None:
+        return False
+    tracer = tracer or otel_trace.get_tracer("atlas")
+
+    def emit(item: Span, parent_context: Any) -> None:
+        otel_span = tracer.start_span(item.name, context=parent_context, start_time=item.start_ns)
+        otel_span.set_attribute("atlas.kind", item.kind)
+        for name, value in item.attributes.items():
+            if isinstance(value, (str, bool, int, float)):
+                otel_span.set_attribute(f"atlas.{name}", value)
+        if item.error:
+            otel_span.set_attribute("error", True)
+            otel_span.set_attribute("atlas.error", item.error)
+        context = otel_trace.set_span_in_context(otel_span)
+        for child in item.children:
+            emit(child, context)
+        otel_span.end(end_time=item.end_ns)
+
+    emit(root, None)
+    return True
@@ -1,59 +1,82 @@
 from typing import Dict, List, Optional
 from datetime import datetime, timezone, timedelta
 
+from core.timeline import calendar_window, index_events, index_tasks, parse_timestamp, tasks_due_after
+from data.loaders import Source, iter_calendar_export, iter_google_tasks
+
 class DataManager:
     def __init__(self):
         self.profile_data = None
         self.calendar_data = None
         self.task_data = None
+        # Built once by load_data so every query is a dict lookup or a binary search
+        self._profiles_by_id: Dict[str, Dict] = {}
+        self._calendar = index_events([]) # core.timeline columns: events sorted by start + epoch starts
+        self._open_tasks = index_tasks([]) # Open tasks sorted by due + epoch dues
 
     def load_data(self, profile_dict: Dict, calendar_dict: Dict, task_dict: Dict):
         # Now expects dictionaries directly, not JSON strings
         self.profile_data = profile_dict
         self.calendar_data = calendar_dict
         self.task_data = task_dict
+        self._index_profiles()
+        self._index_events()
+        self._index_tasks()
+
+    def load_exports(
+            self,
+            profile_dict: Dict,
+            calendar_source: Optional[Source] = None,
+            task_source: Optional[Source] = None,
+            start: Optional[datetime] = None,
+            end: Optional[datetime] = None,
+            calendar_format: Optional[str] = None
+    ):
+        """Load Google JSON / ICS calendar and task exports, keeping only [start, end].
+
+        The files are streamed (see data.loaders); only in-window items reach the
+        indexes. start defaults to now, so past years of a calendar are skipped.
+        """
+        start = start or datetime.now(timezone.utc)
+        events = list(iter_calendar_export(calendar_source, start, end, calendar_format)) if calendar_source is not None else []
+        tasks = list(iter_google_tasks(task_source, start, end)) if task_source is not None else []
+        self.load_data(profile_dict, {"events": events}, {"tasks": tasks})
+
+    def _index_profiles(self) -> None:
+        self._profiles_by_id = {}
+        for profile in (self.profile_data or {}).get("profiles", []):
+            self._profiles_by_id.setdefault(profile["id"], profile) # First one wins, as the old scan did
+
+    def _index_events(self) -> None:
+        self._calendar = index_events((self.calendar_data or {}).get("events", []))
+
+    def _index_tasks(self) -> None:
+        tasks = [task for task in (self.task_data or {}).get("tasks", []) if task.get("status") == "needsAction"]
+        self._open_tasks = index_tasks(tasks)
+        for task, due in zip(self._open_tasks["tasks"], self._open_tasks["dues"]):
+            task["due_datetime"] = datetime.fromtimestamp(due, timezone.utc)
 
     def get_student_profile(self, student_id: str) -> Optional[Dict]:
-        if self.profile_data and "profiles" in self.profile_data:
-            return next((p for p in self.profile_data["profiles"] if p["id"] == student_id), None)
-        return None
+        return self._profiles_by_id.get(student_id)
 
     def parse_datetime(self, dt_str: str) -> datetime:
-        try:
-            dt = datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
-            return dt.astimezone(timezone.utc)
-        except ValueError:
-            dt = datetime.fromisoformat(dt_str)
-            return dt.replace(tzinfo=timezone.utc)
-
-    def get_upcoming_events(self, days: int = 7) -> List[Dict]:
-        if not self.calendar_data:
-            return []
-        now = datetime.now(timezone.utc)
-        future = now + timedelta(days=days)
-        events = []
-        for event in self.calendar_data.get("events", []):
-            try:
-                start_time = self.parse_datetime(event["start"]["dateTime"])
-                if now <= start_time <= future:
-                    events.append(event)
-            except (KeyError, ValueError) as e:
-                print(f"Warning: Could not process event due to {str(e)}")
-                continue
-        return events
-
-    def get_active_tasks(self) -> List[Dict]:
-        if not self.task_data:
-            return []
-        now = datetime.now(timezone.utc)
-        active_tasks = []
-        for task in self.task_data.get("tasks", []):
-            try:
-                due_date = self.parse_datetime(task["due"])
-                if task["status"] == "needsAction" and due_date > now:
-                    task["due_datetime"] = due_date
-                    active_tasks.append(task)
-            except (KeyError, ValueError) as e:
-                print(f"Warning: Could not process task due to {str(e)}")
-                continue
-        return active_tasks
\ No newline at end of file
+        return datetime.fromtimestamp(parse_timestamp(dt_str), timezone.utc)
+
+    def get_calendar(self, days: int = 7, now: Optional[datetime] = None) -> Dict[str, List]:
+        """Upcoming window in the normalized form AcademicState carries (see core.timeline)."""
+        now = now or datetime.now(timezone.utc)
+        return calendar_window(self._calendar, now, now + timedelta(days=days))
+
+    def get_task_list(self, now: Optional[datetime] = None) -> Dict[str, List]:
+        return tasks_due_after(self._open_tasks, now)
+
+    def get_events_between(self, start: datetime, end: datetime) -> List[Dict]:
+        # Events starting in [start, end], soonest first
+        return calendar_window(self._calendar, start, end)["events"]
+
+    def get_upcoming_events(self, days: int = 7, now: Optional[datetime] = None) -> List[Dict]:
+        return self.get_calendar(days, now)["events"]
+
+    def get_active_tasks(self, now: Optional[datetime] = None) -> List[Dict]:
+        # Open tasks due after now, earliest due first
+        return self.get_task_list(now)["tasks"]
@@ -0,0 +1,210 @@
+import io
+import json
+import re
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import IO, Any, Dict, Iterator, Optional, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from core.timeline import event_start, parse_timestamp
+
+# Streaming readers for calendar/task exports. Each yields one item at a time in the
+# Google API shape DataManager already understands ({"summary", "start": {"dateTime"}},
+# {"title", "status", "due"}) and drops items outside [start, end] while reading, so a
+# multi-year export never has to be held in memory to plan the next week.
+
+Source = Union[str, IO]
+CHUNK_SIZE = 1 << 16
+
+@contextmanager
+def _open_text(source: Source) -> Iterator[IO[str]]:
+    if isinstance(source, str):
+        with open(source, "r", encoding="utf-8") as f:
+            yield f
+    elif isinstance(source, io.TextIOBase):
+        yield source
+    else: # Binary file objects, e.g. a Streamlit upload
+        wrapper = io.TextIOWrapper(source, encoding="utf-8")
+        try:
+            yield wrapper
+        finally:
+            wrapper.detach() # Leave the caller's file open
+
+def _in_window(moment: float, start: Optional[float], end: Optional[float]) -> bool:
+    return (start is None or moment >= start) and (end is None or moment <= end)
+
+def _bound(moment: Optional[datetime]) -> Optional[float]:
+    return moment.timestamp() if moment is not None else None
+
+# --- JSON (Google Calendar / Tasks API responses and Takeout exports) ---
+
+def iter_json_array(source: Source, key: Optional[str] = "items", chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the elements of the first ``key`` array (or of a top-level array) one by one.
+
+    Only the element being decoded is buffered, not the whole document.
+    """
+    decoder = json.JSONDecoder()
+    opening = re.compile(r'"%s"\s*:\s*\[' % re.escape(key)) if key else re.compile(r"\[")
+    with _open_text(source) as f:
+        buffer = ""
+        while True: # Find the opening bracket
+            match = opening.search(buffer)
+            if match:
+                buffer = buffer[match.end():]
+                break
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return # No such array
+            buffer = buffer[-len(key or "") - 16:] + chunk # Keep a tail in case the key straddles chunks
+        exhausted = False
+        while True:
+            stripped = buffer.lstrip(" \t\r\n,")
+            if stripped.startswith("]"):
+                return
+            if stripped:
+                try:
+                    item, end = decoder.raw_decode(stripped)
+                except json.JSONDecodeError:
+                    if exhausted:
+                        raise
+                else:
+                    # A value ending right at the buffer edge (e.g. a number) may continue in the next chunk
+                    if end < len(stripped) or exhausted:
+                        buffer = stripped[end:]
+                        yield item
+                        continue
+            chunk = f.read(chunk_size)
+            if not chunk:
+                if exhausted or not stripped:
+                    raise ValueError("Unterminated JSON array")
+                exhausted = True
+            buffer = stripped + chunk
+
+def iter_google_events(source: Source, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Iterator[Dict]:
+    low, high = _bound(start), _bound(end)
+    for event in iter_json_array(source, "items"):
+        if not isinstance(event, dict) or event.get("status") == "cancelled":
+            continue
+        try:
+            moment = event_start(event)
+        except (KeyError, TypeError, ValueError):
+            continue
+        if _in_window(moment, low, high):
+            yield event
+
+def iter_google_tasks(source: Source, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Iterator[Dict]:
+    # Accepts a Tasks API list ({"items": [task]}) or a Takeout export ({"items": [tasklist with "items"]})
+    low, high = _bound(start), _bound(end)
+    for item in iter_json_array(source, "items"):
+        if not isinstance(item, dict):
+            continue
+        for task in item["items"] if "items" in item else [item]:
+            try:
+                due = parse_timestamp(task["due"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if _in_window(due, low, high):
+                yield {**task, "status": task.get("status", "needsAction")}
+
+# --- iCalendar (.ics) ---
+
+_PROPERTY = re.compile(r'^([A-Za-z0-9-]+)((?:;[A-Za-z0-9-]+=(?:"[^"]*"|[^:;]*))*):(.*)$')
+
+def _unfolded_lines(f: IO[str]) -> Iterator[str]:
+    # RFC 5545 folding: a line starting with a space or tab continues the previous one
+    current = None
+    for raw in f:
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+def _unescape(value: str) -> str:
+    return re.sub(r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+def _ics_time(value: str, params: Dict[str, str]) -> Dict[str, str]:
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return {"date": f"{value[:4]}-{value[4:6]}-{value[6:8]}"}
+    moment = datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S")
+    if value.endswith("Z"):
+        moment = moment.replace(tzinfo=timezone.utc)
+    elif "TZID" in params:
+        try:
+            moment = moment.replace(tzinfo=ZoneInfo(params["TZID"]))
+        except (ZoneInfoNotFoundError, ValueError):
+            pass # Unknown zone: read as UTC like floating times
+    moment = moment.astimezone(timezone.utc) if moment.tzinfo else moment
+    return {"dateTime": moment.strftime("%Y-%m-%dT%H:%M:%SZ")}
+
+def iter_ics_events(source: Source, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Iterator[Dict]:
+    """Yield VEVENTs as Google-shaped event dicts.
+
+    Recurrence rules are not expanded: a recurring event is returned for its first
+    occurrence only, and only if that falls inside the window.
+    """
+    low, high = _bound(start), _bound(end)
+    with _open_text(source) as f:
+        event = None
+        nested = 0 # Depth inside sub-components such as VALARM, whose properties are not the event's
+        for line in _unfolded_lines(f):
+            if line == "BEGIN:VEVENT":
+                event, nested = {}, 0
+                continue
+            if event is None:
+                continue
+            if line.startswith("BEGIN:"):
+                nested += 1
+                continue
+            if line.startswith("END:") and nested:
+                nested -= 1
+                continue
+            if nested:
+                continue
+            if line == "END:VEVENT":
+                keep = False
+                if event.get("start") and event.get("status") != "cancelled":
+                    try:
+                        keep = _in_window(event_start(event), low, high)
+                    except (KeyError, ValueError):
+                        pass
+                if keep:
+                    yield event
+                event = None
+                continue
+            match = _PROPERTY.match(line)
+            if not match:
+                continue
+            name, raw_params, value = match.group(1).upper(), match.group(2), match.group(3)
+            params = dict(
+                (k.upper(), v.strip('"')) for k, v in (p.split("=", 1) for p in raw_params.split(";")[1:])
+            )
+            try:
+                if name == "DTSTART":
+                    event["start"] = _ics_time(value, params)
+                elif name == "DTEND":
+                    event["end"] = _ics_time(value, params)
+            except ValueError:
+                continue
+            if name == "SUMMARY":
+                event["summary"] = _unescape(value)
+            elif name == "LOCATION":
+                event["location"] = _unescape(value)
+            elif name == "DESCRIPTION":
+                event["description"] = _unescape(value)
+            elif name == "STATUS":
+                event["status"] = value.lower()
+            elif name == "UID":
+                event["id"] = value
+
+def iter_calendar_export(source: Source, start: Optional[datetime] = None, end: Optional[datetime] = None, fmt: Optional[str] = None) -> Iterator[Dict]:
+    # fmt is "ics" or "json"; by default taken from the file name
+    name = source if isinstance(source, str) else getattr(source, "name", "")
+    fmt = fmt or ("ics" if str(name).lower().endswith(".ics") else "json")
+    if fmt == "ics":
+        return iter_ics_events(source, start, end)
+    return iter_google_events(source, start, end)
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional
+
+# Analyses worth keeping between requests, and the inputs each one was computed from.
+# A stored analysis is reused only while the fingerprint of those inputs is unchanged.
+ANALYSIS_INPUTS: Dict[str, Callable[[Dict], Any]] = {
+    "calendar_analysis": lambda state: state["calendar"].get("events", []),
+    "task_analysis": lambda state: state["tasks"].get("tasks", []),
+    "learning_analysis": lambda state: [
+        state["profile"].get("learning_preferences", {}).get("learning_style", {}),
+        state["messages"][-1].content
+    ],
+    "situation_analysis": lambda state: [state["profile"], state["messages"][-1].content]
+}
+
+def fingerprint(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class SessionStore(ABC):
+    """Interface for per-student session records: {"analyses": {key: {"fingerprint", "value"}}}."""
+    @abstractmethod
+    def get(self, student_id: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def put(self, student_id: str, record: Dict) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, student_id: str) -> None:
+        ...
+
+class MemorySessionStore(SessionStore):
+    def __init__(self):
+        self._records: Dict[str, str] = {} # Serialized, so callers never share mutable state
+        self._lock = threading.Lock()
+
+    def get(self, student_id: str) -> Optional[Dict]:
+        with self._lock:
+            record = self._records.get(student_id)
+        return json.loads(record) if record is not None else None
+
+    def put(self, student_id: str, record: Dict) -> None:
+        with self._lock:
+            self._records[student_id] = json.dumps(record, default=str)
+
+    def delete(self, student_id: str) -> None:
+        with self._lock:
+            self._records.pop(student_id, None)
+
+class SQLiteSessionStore(SessionStore):
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Same threading model as SQLiteCache: Streamlit sessions share one connection behind a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS student_sessions ("
+            "student_id TEXT PRIMARY KEY, record TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, student_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT record FROM student_sessions WHERE student_id = ?", (student_id,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, student_id: str, record: Dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO student_sessions (student_id, record, updated_at) VALUES (?, ?, ?)",
+                (student_id, json.dumps(record, default=str), time.time())
+            )
+            self._conn.commit()
+
+    def delete(self, student_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM student_sessions WHERE student_id = ?", (student_id,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class SessionManager:
+    """Carries analyses over between a student's requests.
+
+    ``restore`` returns the stored analyses whose inputs are unchanged, to seed the
+    initial state's ``results``; the agents skip any analysis already present, so only
+    the changed ones (and the user-facing generation) call the LLM. ``save`` records
+    what a finished run produced.
+    """
+    def __init__(self, store: SessionStore, max_age: Optional[float] = 86400, time_fn: Callable[[], float] = time.time):
+        self.store = store
+        self.max_age = max_age # Analyses also go stale with time ("tomorrow" moves), not just with inputs
+        self._time = time_fn
+        self.stats = {"reused": 0, "recomputed": 0}
+
+    @staticmethod
+    def _student_id(state: Dict) -> Optional[str]:
+        return (state.get("profile") or {}).get("id")
+
+    def restore(self, state: Dict) -> Dict[str, Any]:
+        student_id = self._student_id(state)
+        record = self.store.get(student_id) if student_id else None
+        stored = (record or {}).get("analyses", {})
+        reused = {}
+        for key, inputs in ANALYSIS_INPUTS.items():
+            entry = stored.get(key)
+            fresh = entry is not None and (self.max_age is None or self._time() - entry["stored_at"] <= self.max_age)
+            if fresh and entry["fingerprint"] == fingerprint(inputs(state)):
+                reused[key] = entry["value"]
+        self.stats["reused"] += len(reused)
+        self.stats["recomputed"] += len(ANALYSIS_INPUTS) - len(reused)
+        return reused
+
+    def save(self, state: Dict, results: Dict[str, Any]) -> None:
+        # results is the run's results, either flat or joined per agent under "agent_outputs"
+        student_id = self._student_id(state)
+        if not student_id:
+            return
+        produced = {key: results[key] for key in ANALYSIS_INPUTS if key in results}
+        for outputs in results.get("agent_outputs", {}).values():
+            if isinstance(outputs, dict):
+                produced.update({key: outputs[key] for key in ANALYSIS_INPUTS if key in outputs})
+        if not produced:
+            return
+        record = self.store.get(student_id) or {"analyses": {}}
+        now = self._time()
+        for key, value in produced.items():
+            digest = fingerprint(ANALYSIS_INPUTS[key](state))
+            previous = record["analyses"].get(key)
+            if previous and previous["fingerprint"] == digest and previous["value"] == value:
+                continue # Reused as-is; keep its original age
+            record["analyses"][key] = {"fingerprint": digest, "value": value, "stored_at": now}
+        self.store.put(student_id, record)
+
+_session_manager = None
+_session_manager_lock = threading.Lock()
+
+def get_session_manager() -> Optional[SessionManager]:
+    # Process-wide, like the LLM response cache; ATLAS_SESSIONS=0 turns reuse off.
+    # Streamlit sessions call this from separate threads, so only one of them builds the store.
+    global _session_manager
+    if os.getenv("ATLAS_SESSIONS", "1") == "0":
+        return _session_manager
+    with _session_manager_lock:
+        if _session_manager is None:
+            _session_manager = SessionManager(SQLiteSessionStore(os.getenv("ATLAS_SESSION_DB", "atlas_sessions.sqlite")))
+    return _session_manager
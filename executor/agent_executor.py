@@ -1,46 +1,63 @@
-import asyncio
-from typing import Dict, Any
-from agents.planner_agent import PlannerAgent
-from agents.notewriter_agent import NoteWriterAgent
-from agents.advisor_agent import AdvisorAgent
+from typing import Dict, Any, List, Set
+
+def agent_dependencies(analysis: Dict) -> Dict[str, Set[str]]:
+    """Combine the coordinator's explicit dependencies with its group order.
+
+    An agent in a later concurrent group waits for every agent in the earlier groups.
+    """
+    required = analysis.get("required_agents", ["PLANNER"])
+    explicit = analysis.get("dependencies", {})
+    dependencies = {agent: set(explicit.get(agent, [])) & set(required) - {agent} for agent in required}
+    earlier = set()
+    for group in analysis.get("concurrent_groups", []):
+        members = [agent for agent in group if agent in dependencies]
+        for agent in members:
+            dependencies[agent] |= earlier - {agent}
+        earlier |= set(members)
+    return dependencies
+
+def ready_agents(analysis: Dict, completed: Set[str]) -> List[str]:
+    # Agents still to run whose dependencies have all finished
+    dependencies = agent_dependencies(analysis)
+    pending = [agent for agent in dependencies if agent not in completed]
+    ready = [agent for agent in pending if dependencies[agent] <= completed]
+    if pending and not ready:
+        print(f"Dependency cycle among {pending}, running them together")
+        return pending
+    return ready
 
 class AgentExecutor:
-    def __init__(self, llm_instance: Any):
-        self.llm = llm_instance
-        self.agents = {
-            "PLANNER": PlannerAgent(llm_instance),
-            "NOTEWRITER": NoteWriterAgent(llm_instance),
-            "ADVISOR": AdvisorAgent(llm_instance)
-        }
+    """Join stage of the main graph.
+
+    The agent entry nodes fan out and each runs its subgraph once; by the time this
+    node runs their outputs are already merged into ``state["results"]``, so we only
+    collect them per agent instead of invoking the agents again.
+    """
+    def __init__(self, agents: Dict[str, Any]):
+        self.agents = agents
 
     async def execute(self, state: Dict) -> Dict:
         try:
             analysis = state["results"].get("coordinator_analysis", {})
             required_agents = analysis.get("required_agents", ["PLANNER"])
-            concurrent_groups = analysis.get("concurrent_groups", [])
+            agent_errors = state["results"].get("agent_errors", {})
 
             results = {}
 
-            for group in concurrent_groups:
-                tasks = []
-                for agent_name in group:
-                    if agent_name in required_agents and agent_name in self.agents:
-                        # Pass the current state to the agent's __call__ method
-                        # which will invoke its internal subgraph
-                        tasks.append(self.agents[agent_name](state))
-
-                if tasks:
-                    group_results = await asyncio.gather(*tasks, return_exceptions=True)
-                    for agent_name_in_group, result in zip(group, group_results):
-                        if not isinstance(result, Exception):
-                            results[agent_name_in_group.lower()] = result
-                        else:
-                            print(f"Error executing {agent_name_in_group}: {result}")
-
-            if not results and "PLANNER" in self.agents:
-                # If no agents ran or all failed, try the planner as a fallback
-                planner_result = await self.agents["PLANNER"](state)
-                results["planner"] = planner_result
+            for agent_name in required_agents:
+                agent = self.agents.get(agent_name)
+                if agent is None:
+                    continue
+                output = {key: state["results"][key] for key in agent.output_keys if key in state["results"]}
+                if output:
+                    results[agent_name.lower()] = output
+                elif agent_name.lower() in agent_errors:
+                    print(f"Error executing {agent_name}: {agent_errors[agent_name.lower()]}")
+                else:
+                    print(f"No output collected from {agent_name}")
+
+            if not results:
+                raise RuntimeError("No agent produced any output")
 
             return {
                 "results": {
@@ -58,4 +75,4 @@ class AgentExecutor:
                         }
                     }
                 }
-            }
\ No newline at end of file
+            }
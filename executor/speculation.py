@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Running totals across every speculative graph in the process, for tuning
+_totals = {"launched": 0, "useful": 0, "wasted": 0, "cancelled": 0, "failed": 0}
+_totals_lock = threading.Lock() # Streamlit sessions run graphs on separate threads
+
+def _count(name: str, amount: int = 1) -> None:
+    with _totals_lock:
+        _totals[name] += amount
+
+def speculation_stats() -> Dict[str, int]:
+    with _totals_lock:
+        return dict(_totals)
+
+class SpeculativeLauncher:
+    """Starts likely agent work while the coordinator's LLM call is still in flight.
+
+    ``steps`` maps an agent name to the coroutine function to start early: the whole
+    planner (the coordinator's default pick) and the cheap analyze step of the others.
+    Once the coordinator decides, unselected work is cancelled and counted as wasted;
+    the entry node of each selected agent claims its task and reuses the result.
+    Whatever a run leaves unclaimed, e.g. because an agent failed first, is cancelled
+    by ``discard`` when the run ends.
+    """
+    def __init__(self, steps: Dict[str, Callable[[Dict], Awaitable[Dict]]]):
+        self.steps = steps
+        self._pending: Dict[str, Dict[str, asyncio.Task]] = {}
+
+    def launch(self, state: Dict) -> str:
+        key = uuid.uuid4().hex
+        self._pending[key] = {name: asyncio.create_task(step(state)) for name, step in self.steps.items()}
+        _count("launched", len(self.steps))
+        return key
+
+    def resolve(self, key: str, selected: List[str]) -> Dict[str, Any]:
+        tasks = self._pending.get(key, {})
+        wasted = [name for name in tasks if name not in selected]
+        for name in wasted:
+            task = tasks.pop(name)
+            if not task.done():
+                task.cancel()
+                _count("cancelled")
+        _count("wasted", len(wasted))
+        if not tasks:
+            self._pending.pop(key, None)
+        return {"key": key, "launched": list(self.steps), "useful": list(tasks), "wasted": wasted}
+
+    def discard(self, key: Optional[str]) -> None:
+        for task in self._pending.pop(key, {}).values():
+            if not task.done():
+                task.cancel()
+                _count("cancelled")
+
+    async def claim(self, state: Dict, name: str) -> Optional[Dict]:
+        # Returns the speculative node update for this agent, or None if there is none to reuse
+        key = state["results"].get("speculation", {}).get("key")
+        tasks = self._pending.get(key)
+        if not tasks or name not in tasks:
+            return None
+        task = tasks.pop(name)
+        if not tasks:
+            del self._pending[key]
+        try:
+            result = await task
+        except Exception as e:
+            print(f"Speculative {name} failed, running it normally: {e}")
+            _count("failed")
+            return None
+        _count("useful")
+        return result
@@ -0,0 +1,166 @@
+"""Headless HTTP service for the agent graph, independent of Streamlit's rerun model.
+
+    uvicorn server:app --host 0.0.0.0 --port 8000    (or: python server.py)
+
+    GET  /health
+    POST /v1/requests          run one request, reply with its outputs as JSON
+    POST /v1/requests/stream   the same run as server-sent events: "update" per main-graph
+                               node, "token" per generated delta, then "result" or "error"
+
+The body is a batch job (see workflow.batch): ``{"student_id", "request"}`` plus an
+optional ``"profile"``, ``"calendar"`` and ``"tasks"``. Students without an inline
+profile are looked up in the exports named by ATLAS_PROFILES, ATLAS_CALENDAR and
+ATLAS_TASKS, which are loaded once at startup.
+
+Everything runs on uvicorn's single long-lived event loop: the graph is compiled once
+and the loop's pooled API client (config.llm_clients) keeps its keep-alive connections
+for the life of the process, instead of a new loop and client state per Streamlit click.
+"""
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict, ValidationError
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from config.llm_config import YourLLM, get_client_manager, get_openai_key
+from core.tracing import trace
+from data.data_manager import DataManager
+from data.session_store import SessionManager, get_session_manager
+from workflow.batch import build_request_state, run_job, summarize_run
+from workflow.graph_builder import create_agents_graph
+
+# Inline data is checked as far as the loaders rely on it, so malformed bodies are a 400, not a failed run
+class CalendarData(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    events: List[Dict[str, Any]] = []
+
+class TaskData(BaseModel):
+    model_config = ConfigDict(extra="allow")
+    tasks: List[Dict[str, Any]] = []
+
+class PlanRequest(BaseModel):
+    student_id: str
+    request: str
+    profile: Optional[Dict[str, Any]] = None
+    calendar: Optional[CalendarData] = None
+    tasks: Optional[TaskData] = None
+
+    def job(self) -> Dict[str, Any]:
+        return self.model_dump(exclude_none=True)
+
+def load_data_manager() -> DataManager:
+    dm = DataManager()
+    profiles_path = os.getenv("ATLAS_PROFILES")
+    profiles = {"profiles": []}
+    if profiles_path:
+        with open(profiles_path, "r", encoding="utf-8") as f:
+            profiles = json.load(f)
+    dm.load_exports(profiles, os.getenv("ATLAS_CALENDAR"), os.getenv("ATLAS_TASKS"))
+    return dm
+
+def sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def stream_run(graph: Any, dm: DataManager, job: Dict, sessions: Optional[SessionManager]) -> AsyncIterator[str]:
+    try:
+        state = build_request_state(dm, job)
+        if sessions is not None:
+            state["results"].update(sessions.restore(state))
+        final_results = {}
+        with trace("request", student_id=job["student_id"]) as request_trace:
+            async for namespace, mode, chunk in graph.astream(state, stream_mode=["updates", "custom"], subgraphs=True):
+                if mode == "custom":
+                    yield sse("token", chunk)
+                    continue
+                if namespace: # Node updates from inside an agent subgraph
+                    continue
+                for node, update in chunk.items():
+                    results = (update or {}).get("results", {})
+                    if node == "execute":
+                        final_results = results
+                    yield sse("update", {"node": node, "results": sorted(results)})
+        if sessions is not None:
+            sessions.save(state, final_results)
+        yield sse("result", summarize_run(final_results, request_trace))
+    except Exception as e: # Headers are already sent, so report failures in-stream
+        yield sse("error", {"error": f"{type(e).__name__}: {e}"})
+
+class BadRequest(Exception):
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+async def parse_job(request: Request) -> Dict:
+    try:
+        job = PlanRequest.model_validate(await request.json()).job()
+    except (ValueError, ValidationError) as e:
+        raise BadRequest(str(e))
+    if "profile" not in job and request.app.state.data_manager.get_student_profile(job["student_id"]) is None:
+        raise BadRequest(f"Unknown student {job['student_id']}", status_code=404)
+    return job
+
+async def health(request: Request) -> JSONResponse:
+    return JSONResponse({"status": "ok"})
+
+async def run_request(request: Request) -> JSONResponse:
+    try:
+        job = await parse_job(request)
+    except BadRequest as e:
+        return JSONResponse({"status": "error", "error": str(e)}, status_code=e.status_code)
+    service = request.app.state
+    result = await run_job(service.graph, service.data_manager, job, service.sessions)
+    return JSONResponse(result, status_code=200 if result["status"] == "ok" else 500)
+
+async def stream_request(request: Request) -> Any:
+    try:
+        job = await parse_job(request)
+    except BadRequest as e:
+        return JSONResponse({"status": "error", "error": str(e)}, status_code=e.status_code)
+    service = request.app.state
+    # Starlette cancels the generator when the client disconnects, which stops the run's LLM calls
+    return StreamingResponse(
+        stream_run(service.graph, service.data_manager, job, service.sessions),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def create_app(
+        graph: Optional[Any] = None,
+        data_manager: Optional[DataManager] = None,
+        sessions: Optional[SessionManager] = None
+) -> Starlette:
+    # Anything not passed in is built at startup on the server's event loop
+    @asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        app.state.graph = graph
+        if graph is None:
+            api_key = get_openai_key()
+            if not api_key:
+                raise ValueError("OpenAI API Key is not configured.")
+            app.state.graph = create_agents_graph(YourLLM(api_key))
+        app.state.data_manager = data_manager if data_manager is not None else load_data_manager()
+        app.state.sessions = sessions if sessions is not None else get_session_manager()
+        try:
+            yield
+        finally:
+            await get_client_manager().aclose() # This loop's pooled API connections
+
+    return Starlette(
+        routes=[
+            Route("/health", health, methods=["GET"]),
+            Route("/v1/requests", run_request, methods=["POST"]),
+            Route("/v1/requests/stream", stream_request, methods=["POST"])
+        ],
+        lifespan=lifespan
+    )
+
+app = create_app()
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=os.getenv("ATLAS_HOST", "127.0.0.1"), port=int(os.getenv("ATLAS_PORT", "8000")))
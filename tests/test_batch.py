@@ -0,0 +1,109 @@
+import asyncio
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.synthetic import make_dataset
+from data.data_manager import DataManager
+from workflow.batch import main, read_jobs, run_batch, write_jsonl
+from workflow.graph_builder import create_agents_graph
+from tests.test_graph import FakeLLM
+
+
+def make_data_manager():
+    profiles, calendar, tasks = make_dataset(20, 20, seed=1)
+    profiles["profiles"].append({**profiles["profiles"][0], "id": "student_456"})
+    dm = DataManager()
+    dm.load_data(profiles, calendar, tasks)
+    return dm
+
+
+class SlowGraph:
+    """Stand-in graph that records how many requests run at once."""
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def ainvoke(self, state):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        # Longer requests finish later, whatever order they started in
+        await asyncio.sleep(0.01 * len(state["messages"][0].content))
+        self.in_flight -= 1
+        return {"results": {"agent_outputs": {"planner": {"final_plan": {"plan": "ok"}}}}}
+
+
+async def collect(results):
+    return [result async for result in results]
+
+
+class TestBatch(unittest.TestCase):
+    def test_batch_runs_every_job_and_reports_failures(self):
+        lines = "\n".join([
+            json.dumps({"student_id": "student_123", "request": "Plan my week"}),
+            json.dumps({"student_id": "student_456", "request": "Help me with notes and guidance for Calculus III"}),
+            json.dumps({"student_id": "nobody", "request": "Plan my week"}),
+            "{not json",
+            "",
+            json.dumps({"student_id": "student_123", "request": "Plan my week", "calendar": {"events": []}})
+        ])
+        graph = create_agents_graph(FakeLLM(), router_mode="rules")
+        results = asyncio.run(collect(run_batch(graph, make_data_manager(), read_jobs(io.StringIO(lines)), concurrency=3)))
+
+        by_line = {result["line"]: result for result in results}
+        self.assertEqual(sorted(by_line), [1, 2, 3, 4, 6])
+        self.assertEqual(by_line[1]["status"], "ok")
+        self.assertIn("planner", by_line[1]["outputs"])
+        self.assertLessEqual({"notewriter", "advisor"}, set(by_line[2]["outputs"]))
+        self.assertIn("Unknown student", by_line[3]["error"])
+        self.assertIn("Invalid JSON", by_line[4]["error"])
+        self.assertEqual(by_line[6]["status"], "ok")
+
+    def test_concurrency_is_bounded_and_results_stream_as_they_finish(self):
+        graph = SlowGraph()
+        jobs = [{"student_id": "student_123", "request": "x" * n, "line": line} for line, n in enumerate((8, 1, 2, 1, 1), 1)]
+        results = asyncio.run(collect(run_batch(graph, make_data_manager(), jobs, concurrency=2)))
+        self.assertEqual(graph.max_in_flight, 2)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results[-1]["line"], 1) # The longest job started first but finished last
+
+    def test_cli_writes_jsonl(self):
+        profiles, calendar, tasks = make_dataset(5, 5, seed=2)
+        with tempfile.TemporaryDirectory() as directory:
+            paths = {name: os.path.join(directory, f"{name}.json") for name in ("profiles", "calendar", "tasks")}
+            for name, data in (("profiles", profiles), ("calendar", {"items": calendar["events"]}), ("tasks", {"items": tasks["tasks"]})):
+                with open(paths[name], "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+            jobs_path, out_path = os.path.join(directory, "jobs.jsonl"), os.path.join(directory, "out.jsonl")
+            with open(jobs_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(json.dumps({"student_id": "student_123", "request": f"Plan my week {i}"}) for i in range(3)))
+
+            graph = create_agents_graph(FakeLLM(), router_mode="rules")
+            with patch("workflow.batch.get_agents_graph", return_value=graph):
+                counts = main([
+                    jobs_path, "--profiles", paths["profiles"], "--calendar", paths["calendar"],
+                    "--tasks", paths["tasks"], "--out", out_path, "--no-sessions"
+                ])
+            with open(out_path, encoding="utf-8") as f:
+                written = [json.loads(line) for line in f]
+        self.assertEqual(counts, {"ok": 3, "error": 0})
+        self.assertEqual(sorted(result["line"] for result in written), [1, 2, 3])
+
+    def test_write_jsonl_counts_statuses(self):
+        async def results():
+            for status in ("ok", "error", "ok"):
+                yield {"status": status}
+        out = io.StringIO()
+        self.assertEqual(asyncio.run(write_jsonl(results(), out)), {"ok": 2, "error": 1})
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
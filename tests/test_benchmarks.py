@@ -0,0 +1,48 @@
+import os
+import sys
+import unittest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.fake_llm import LatencyModel
+from benchmarks.run_benchmarks import percentile, run_benchmark
+from benchmarks.state_merge import REDUCERS, make_results, replay, run_merge_benchmark
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_graph_call_budget_holds_across_sizes(self):
+        # Regression gate: coordinator + 7 agent steps, and no agent runs twice
+        rows = run_benchmark([10, 1000], iterations=2, latency="0", measure_memory=True)
+        for row in rows:
+            self.assertEqual(row["llm_calls_per_request"], 8, row)
+            self.assertEqual(row["max_agent_runs"], 1, row)
+            self.assertLessEqual(row["p50_ms"], row["p95_ms"])
+            self.assertGreater(row["peak_memory_mb"], 0)
+        # The context budget keeps prompts from growing with the calendar
+        self.assertLess(rows[1]["prompt_tokens_per_request"], 4 * rows[0]["prompt_tokens_per_request"])
+
+    def test_latency_models_are_seeded(self):
+        first, second = LatencyModel("lognormal:0.05:0.5", seed=7), LatencyModel("lognormal:0.05:0.5", seed=7)
+        samples = [first.sample() for _ in range(3)]
+        self.assertEqual(samples, [second.sample() for _ in range(3)])
+        self.assertEqual(len(set(samples)), 3)
+        self.assertEqual(LatencyModel("0.2").sample(), 0.2)
+        with self.assertRaises(ValueError):
+            LatencyModel("gaussian:1")
+
+    def test_state_merge_reducers_agree(self):
+        base = make_results(20, 100)
+        self.assertEqual(replay(REDUCERS["copy_on_write"], base, 100), replay(REDUCERS["copying"], base, 100))
+        rows = run_merge_benchmark([10], text_size=100, repeat=2)
+        self.assertEqual([row["reducer"] for row in rows], ["copying", "copy_on_write"])
+        self.assertTrue(all(row["p50_us"] > 0 for row in rows))
+
+    def test_percentile_interpolates(self):
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2.5)
+        self.assertEqual(percentile([5], 95), 5)
+        self.assertEqual(percentile([], 50), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
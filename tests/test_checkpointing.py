@@ -0,0 +1,127 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from workflow.checkpointing import (
+    AsyncSqliteSaver, BoundedMemorySaver, discard_run, open_checkpointer, pending_nodes, resume_run,
+    run_checkpointed, with_checkpointer
+)
+from workflow.graph_builder import create_agents_graph
+from tests.test_graph import FakeLLM, make_state
+
+REQUEST = "Help me with notes and guidance for Calculus III"
+
+
+class FlakyLLM(FakeLLM):
+    """FakeLLM whose plan generation fails until the API "recovers"."""
+    def __init__(self, error=None):
+        super().__init__()
+        self.down = True
+        self.error = error or TimeoutError("Request timed out")
+
+    async def agenerate(self, messages, temperature=None, **kwargs):
+        if self.down and messages[0]["content"].startswith("AI Planning Assistant"):
+            self.calls += 1
+            raise self.error
+        return await super().agenerate(messages, temperature, **kwargs)
+
+
+class TestCheckpointing(unittest.TestCase):
+    def test_resume_skips_completed_nodes(self):
+        llm = FlakyLLM()
+        graph = with_checkpointer(create_agents_graph(llm, router_mode="llm"), InMemorySaver())
+
+        async def run():
+            with self.assertRaises(TimeoutError):
+                await run_checkpointed(graph, make_state(REQUEST), "thread-1")
+            self.assertEqual(await pending_nodes(graph, "thread-1"), ("planner_entry",))
+            self.assertEqual(llm.calls, 8) # coordinator + planner (3, the last one failed) + notewriter (2) + advisor (2)
+
+            llm.down = False
+            final_state = await resume_run(graph, "thread-1")
+            self.assertEqual(llm.calls, 9) # Only plan_generator ran again
+            self.assertEqual(await pending_nodes(graph, "thread-1"), ())
+            self.assertEqual(await resume_run(graph, "thread-1"), final_state) # Finished runs are returned as-is
+            await discard_run(graph, "thread-1")
+            with self.assertRaises(KeyError):
+                await resume_run(graph, "thread-1")
+            return final_state
+
+        final_state = asyncio.run(run())
+        self.assertEqual(final_state["agent_runs"], {"PLANNER": 1, "NOTEWRITER": 1, "ADVISOR": 1})
+        self.assertEqual(set(final_state["results"]["agent_outputs"]), {"planner", "notewriter", "advisor"})
+
+    def test_runs_without_thread_id_degrade_instead_of_stopping(self):
+        graph = create_agents_graph(FlakyLLM(), router_mode="llm")
+        final_state = asyncio.run(graph.ainvoke(make_state(REQUEST)))
+        self.assertIn("planner", final_state["results"]["agent_errors"])
+        self.assertEqual(set(final_state["results"]["agent_outputs"]), {"notewriter", "advisor"})
+
+    def test_only_transient_errors_stop_a_checkpointed_run(self):
+        class BadRequest(Exception):
+            status_code = 400
+
+        # Resuming would repeat the same rejected call, so the run degrades like an uncheckpointed one
+        graph = with_checkpointer(create_agents_graph(FlakyLLM(BadRequest("context length exceeded")), router_mode="llm"), InMemorySaver())
+        final_state = asyncio.run(run_checkpointed(graph, make_state(REQUEST), "thread-2"))
+        self.assertIn("context length exceeded", final_state["results"]["agent_errors"]["planner"])
+        self.assertEqual(set(final_state["results"]["agent_outputs"]), {"notewriter", "advisor"})
+
+    def test_memory_saver_forgets_unresumed_threads(self):
+        clock = {"now": 0.0}
+        saver = BoundedMemorySaver(max_threads=2, max_age=60, time_fn=lambda: clock["now"])
+        graph = with_checkpointer(create_agents_graph(FlakyLLM(), router_mode="llm"), saver)
+
+        async def fail(thread_id):
+            with self.assertRaises(TimeoutError):
+                await run_checkpointed(graph, make_state(REQUEST), thread_id)
+
+        async def run():
+            for thread_id in ("a", "b", "c"):
+                await fail(thread_id)
+            self.assertEqual(set(saver.storage), {"b", "c"}) # Least recently used beyond max_threads
+            clock["now"] = 120
+            await fail("d")
+            self.assertEqual(set(saver.storage), {"d"}) # The others went unused for too long
+            with self.assertRaises(KeyError):
+                await resume_run(graph, "b")
+
+        asyncio.run(run())
+        self.assertEqual(saver.thread_count(), 1)
+
+    @unittest.skipIf(AsyncSqliteSaver is None, "langgraph-checkpoint-sqlite is not installed")
+    def test_sqlite_checkpoints_resume_in_a_new_connection(self):
+        llm = FlakyLLM()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "checkpoints.sqlite")
+
+            async def fail():
+                async with open_checkpointer(path) as saver:
+                    self.assertIsInstance(saver, AsyncSqliteSaver)
+                    graph = with_checkpointer(create_agents_graph(llm, router_mode="llm"), saver)
+                    with self.assertRaises(TimeoutError):
+                        await run_checkpointed(graph, make_state(REQUEST), "thread-3")
+
+            async def resume():
+                async with open_checkpointer(path) as saver:
+                    graph = with_checkpointer(create_agents_graph(llm, router_mode="llm"), saver)
+                    final_state = await resume_run(graph, "thread-3")
+                    await discard_run(graph, "thread-3")
+                    return final_state
+
+            asyncio.run(fail()) # Each Streamlit click runs its own loop and opens its own connection
+            llm.down = False
+            final_state = asyncio.run(resume())
+        self.assertEqual(llm.calls, 9)
+        self.assertEqual(set(final_state["results"]["agent_outputs"]), {"planner", "notewriter", "advisor"})
+
+
+if __name__ == '__main__':
+    unittest.main()
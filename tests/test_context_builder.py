@@ -0,0 +1,51 @@
+import json
+import os
+import sys
+import unittest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.context_builder import ContextBuilder, compact_json, summarize_events
+
+
+def make_events(n):
+    return [
+        {"summary": f"Event {i}", "description": None, "location": "", "start": {"dateTime": f"2025-06-{1 + i % 28:02d}T10:00:00Z"}}
+        for i in range(n)
+    ]
+
+
+class TestContextBuilder(unittest.TestCase):
+    def test_compact_json_drops_empty_values(self):
+        self.assertEqual(
+            compact_json({"a": None, "b": "", "c": {}, "d": [None], "e": {"f": 1}}),
+            '{"e":{"f":1}}'
+        )
+
+    def test_large_calendars_stay_within_budget(self):
+        builder = ContextBuilder(budgets={"calendar_analyzer": 300})
+        text = builder.fit_items(make_events(10000), "calendar_analyzer", summarize_events)
+        self.assertLessEqual(builder.tokens(text), 300 + 200) # Summary entry rides on top
+        items = json.loads(text)
+        summary = items[-1]
+        self.assertEqual(summary["omitted_events"] + len(items) - 1, 10000)
+        self.assertNotIn("description", items[0])
+
+    def test_small_inputs_are_untouched(self):
+        builder = ContextBuilder()
+        events = make_events(3)
+        self.assertEqual(json.loads(builder.fit_items(events, "calendar_analyzer", summarize_events)), json.loads(compact_json(events)))
+
+    def test_fit_value_trims_longest_list(self):
+        builder = ContextBuilder(budgets={"advisor_analyze": 100})
+        profile = {"name": "Sam", "academic_info": {"current_courses": [{"name": f"Course {i}"} for i in range(500)]}}
+        value = json.loads(builder.fit_value(profile, "advisor_analyze"))
+        courses = value["academic_info"]["current_courses"]
+        self.assertLessEqual(builder.tokens(compact_json(value)), 100)
+        self.assertEqual(courses[-1]["omitted"] + len(courses) - 1, 500)
+        self.assertEqual(value["name"], "Sam")
+
+
+if __name__ == '__main__':
+    unittest.main()
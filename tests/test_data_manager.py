@@ -0,0 +1,62 @@
+import os
+import sys
+import unittest
+from datetime import datetime, timezone
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.data_manager import DataManager
+
+NOW = datetime(2025, 6, 8, 12, 0, tzinfo=timezone.utc)
+
+
+def event(summary, start):
+    return {"summary": summary, "start": {"dateTime": start}}
+
+
+class TestDataManager(unittest.TestCase):
+    def setUp(self):
+        self.dm = DataManager()
+        self.dm.load_data(
+            {"profiles": [{"id": "a", "name": "first"}, {"id": "b"}, {"id": "a", "name": "duplicate"}]},
+            {"events": [
+                event("later", "2025-06-14T09:00:00Z"),
+                event("past", "2025-06-07T09:00:00Z"),
+                event("soon", "2025-06-08T13:00:00+00:00"),
+                event("too far", "2025-06-20T09:00:00Z"),
+                event("naive", "2025-06-09T08:00:00"),
+                {"summary": "broken"}
+            ]},
+            {"tasks": [
+                {"title": "due later", "status": "needsAction", "due": "2025-06-12T23:59:00Z"},
+                {"title": "overdue", "status": "needsAction", "due": "2025-06-01T23:59:00Z"},
+                {"title": "done", "status": "completed", "due": "2025-06-10T23:59:00Z"},
+                {"title": "due sooner", "status": "needsAction", "due": "2025-06-09T23:59:00Z"}
+            ]}
+        )
+
+    def test_profiles_are_looked_up_by_id(self):
+        self.assertEqual(self.dm.get_student_profile("a")["name"], "first")
+        self.assertEqual(self.dm.get_student_profile("b"), {"id": "b"})
+        self.assertIsNone(self.dm.get_student_profile("missing"))
+
+    def test_upcoming_events_are_a_sorted_window(self):
+        upcoming = self.dm.get_upcoming_events(days=7, now=NOW)
+        self.assertEqual([e["summary"] for e in upcoming], ["soon", "naive", "later"])
+        self.assertEqual([e["summary"] for e in self.dm.get_upcoming_events(days=1, now=NOW)], ["soon", "naive"])
+
+    def test_active_tasks_are_open_and_due_after_now(self):
+        active = self.dm.get_active_tasks(now=NOW)
+        self.assertEqual([t["title"] for t in active], ["due sooner", "due later"])
+        self.assertEqual(active[0]["due_datetime"], datetime(2025, 6, 9, 23, 59, tzinfo=timezone.utc))
+
+    def test_empty_manager_returns_nothing(self):
+        dm = DataManager()
+        self.assertIsNone(dm.get_student_profile("a"))
+        self.assertEqual(dm.get_upcoming_events(), [])
+        self.assertEqual(dm.get_active_tasks(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
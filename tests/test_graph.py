@@ -0,0 +1,197 @@
+import asyncio
+import unittest
+import sys
+import os
+
+from langchain_core.messages import HumanMessage
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.planner_agent import PlannerAgent
+from core.state import AcademicState
+from langgraph.checkpoint.memory import InMemorySaver
+from workflow.checkpointing import new_thread_id, thread_config, with_checkpointer
+from workflow.graph_builder import create_agents_graph
+
+COORDINATOR_REPLY = """Thought: The student needs a schedule, notes and some guidance.
+Action: Use the planner, the NoteWriter and the Advisor.
+Observation: All three can run in parallel.
+Decision: PLANNER, NOTEWRITER, ADVISOR"""
+
+PLANNER_ONLY_REPLY = """Thought: The student only needs a schedule.
+Action: Use the planner.
+Observation: A single agent is enough.
+Decision: PLANNER"""
+
+
+class FakeLLM:
+    """Stand-in for YourLLM that answers instantly and counts calls."""
+    def __init__(self, coordinator_reply=COORDINATOR_REPLY):
+        self.calls = 0
+        self.prompts = []
+        self.coordinator_reply = coordinator_reply
+
+    async def agenerate(self, messages, temperature=None, **kwargs):
+        self.calls += 1
+        self.prompts.append(messages[0]["content"])
+        if "Coordinator Agent" in messages[0]["content"]:
+            return self.coordinator_reply
+        return f"response {self.calls}"
+
+    async def astream(self, messages, temperature=None, **kwargs):
+        response = await self.agenerate(messages, temperature, **kwargs)
+        for word in response.split(" "):
+            yield word + " "
+
+
+class SlowLLM(FakeLLM):
+    """FakeLLM that takes a moment per call and tracks how many calls overlap."""
+    def __init__(self):
+        super().__init__()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def agenerate(self, messages, temperature=None, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return await super().agenerate(messages, temperature, **kwargs)
+
+
+def make_state(request: str) -> AcademicState:
+    return AcademicState(
+        messages=[HumanMessage(content=request)],
+        profile={
+            "id": "student_123",
+            "learning_preferences": {"learning_style": {"visual": True}, "study_patterns": {}},
+            "academic_info": {"current_courses": [{"name": "Calculus III", "grade": "B"}]}
+        },
+        calendar={"events": []},
+        tasks={"tasks": []},
+        results={},
+        agent_runs={}
+    )
+
+
+class TestAgentsGraph(unittest.TestCase):
+    def test_each_agent_runs_once(self):
+        llm = FakeLLM()
+        graph = create_agents_graph(llm, router_mode="llm")
+        final_state = asyncio.run(graph.ainvoke(make_state("Help me with notes and guidance for Calculus III")))
+
+        self.assertEqual(final_state["agent_runs"], {"PLANNER": 1, "NOTEWRITER": 1, "ADVISOR": 1})
+        # coordinator + planner (3) + notewriter (2) + advisor (2)
+        self.assertEqual(llm.calls, 8)
+
+        agent_outputs = final_state["results"]["agent_outputs"]
+        self.assertEqual(set(agent_outputs), {"planner", "notewriter", "advisor"})
+        self.assertIn("final_plan", agent_outputs["planner"])
+        self.assertIn("generated_notes", agent_outputs["notewriter"])
+        self.assertIn("guidance", agent_outputs["advisor"])
+        self.assertEqual(
+            set(final_state["results"]["prompt_tokens"]),
+            {"calendar_analyzer", "task_analyzer", "plan_generator", "notewriter_analyze",
+             "notewriter_generate", "advisor_analyze", "advisor_generate"}
+        )
+
+    def test_system_prompts_do_not_depend_on_request(self):
+        # Request data lives in the user message, so system prompts form a stable, cacheable prefix
+        llm = FakeLLM()
+        graph = create_agents_graph(llm, router_mode="llm")
+        asyncio.run(graph.ainvoke(make_state("Help me with notes and guidance for Calculus III")))
+        first = sorted(llm.prompts)
+        llm.prompts.clear()
+        asyncio.run(graph.ainvoke(make_state("Notes and advice for my Calculus III exam please")))
+        self.assertEqual(sorted(llm.prompts), first)
+
+    def test_generation_nodes_stream_deltas(self):
+        graph = create_agents_graph(FakeLLM(), router_mode="llm")
+
+        async def collect():
+            deltas = {}
+            async for namespace, mode, chunk in graph.astream(
+                    make_state("Help me with notes and guidance for Calculus III"),
+                    stream_mode=["updates", "custom"], subgraphs=True):
+                if mode == "custom":
+                    deltas.setdefault(chunk["agent"], []).append(chunk["delta"])
+            return deltas
+
+        deltas = asyncio.run(collect())
+        self.assertEqual(set(deltas), {"PLANNER", "NOTEWRITER", "ADVISOR"})
+        self.assertTrue(all(len(parts) > 1 for parts in deltas.values()))
+
+    def test_speculative_mode_reuses_selected_work(self):
+        llm = FakeLLM()
+        graph = create_agents_graph(llm, speculative=True, router_mode="llm")
+        final_state = asyncio.run(graph.ainvoke(make_state("Help me with notes and guidance for Calculus III")))
+
+        self.assertEqual(final_state["agent_runs"], {"PLANNER": 1, "NOTEWRITER": 1, "ADVISOR": 1})
+        self.assertEqual(llm.calls, 8) # Prefetched analyze steps are not repeated
+        speculation = final_state["results"]["speculation"]
+        self.assertEqual(sorted(speculation["useful"]), ["ADVISOR", "NOTEWRITER", "PLANNER"])
+        self.assertEqual(speculation["wasted"], [])
+
+    def test_speculative_mode_discards_unselected_work(self):
+        llm = FakeLLM(PLANNER_ONLY_REPLY)
+        graph = create_agents_graph(llm, speculative=True, router_mode="llm")
+        final_state = asyncio.run(graph.ainvoke(make_state("Plan my week")))
+
+        self.assertEqual(final_state["agent_runs"], {"PLANNER": 1})
+        self.assertEqual(set(final_state["results"]["agent_outputs"]), {"planner"})
+        speculation = final_state["results"]["speculation"]
+        self.assertEqual(speculation["useful"], ["PLANNER"])
+        self.assertEqual(sorted(speculation["wasted"]), ["ADVISOR", "NOTEWRITER"])
+
+    def test_failed_speculative_run_cancels_unclaimed_work(self):
+        class FailingPlanLLM(FakeLLM):
+            async def agenerate(self, messages, temperature=None, node=None, **kwargs):
+                if node == "plan_generator":
+                    raise asyncio.TimeoutError()
+                if node == "advisor_analyze":
+                    await asyncio.sleep(5) # Still running when the planner fails
+                return await super().agenerate(messages, temperature, node=node, **kwargs)
+
+        llm = FailingPlanLLM("""{"required_agents": ["PLANNER", "ADVISOR"],
+                                 "concurrent_groups": [["PLANNER"], ["ADVISOR"]],
+                                 "dependencies": {"ADVISOR": ["PLANNER"]}}""")
+        graph = with_checkpointer(create_agents_graph(llm, speculative=True, router_mode="llm"), InMemorySaver())
+
+        async def run():
+            with self.assertRaises(asyncio.TimeoutError):
+                await graph.ainvoke(make_state("Plan my week and advise me"), thread_config(new_thread_id()))
+            # The advisor's speculative analysis is never claimed, so failing must cancel it
+            await asyncio.sleep(0)
+            return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+        self.assertEqual(asyncio.run(run()), [])
+
+    def test_structured_dependencies_order_agents(self):
+        llm = FakeLLM("""{"required_agents": ["PLANNER", "ADVISOR"],
+                          "concurrent_groups": [["PLANNER", "ADVISOR"]],
+                          "dependencies": {"ADVISOR": ["PLANNER"]}}""")
+        graph = create_agents_graph(llm, router_mode="llm")
+        final_state = asyncio.run(graph.ainvoke(make_state("Plan my week and advise me")))
+
+        self.assertEqual(final_state["agent_runs"], {"PLANNER": 1, "ADVISOR": 1})
+        plan_call = next(i for i, p in enumerate(llm.prompts) if p.startswith("AI Planning Assistant"))
+        advisor_call = next(i for i, p in enumerate(llm.prompts) if p.startswith("Analyze student situation"))
+        self.assertLess(plan_call, advisor_call)
+
+
+class TestPlannerSubgraph(unittest.TestCase):
+    def test_analyzers_run_concurrently_before_plan(self):
+        llm = SlowLLM()
+        planner = PlannerAgent(llm)
+        final_state = asyncio.run(planner.workflow.ainvoke(make_state("Plan my week")))
+
+        self.assertEqual(llm.max_in_flight, 2)
+        self.assertEqual(llm.calls, 3)
+        self.assertIn("calendar_analysis", final_state["results"])
+        self.assertIn("task_analysis", final_state["results"])
+        self.assertIn("final_plan", final_state["results"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("OPENAI_KEY", "fake_key")
+
+from workflow.graph_registry import get_agents_graph, invalidate_agents_graph, clear_agents_graphs
+
+
+class TestGraphRegistry(unittest.TestCase):
+    def setUp(self):
+        clear_agents_graphs()
+
+    def tearDown(self):
+        clear_agents_graphs()
+
+    def test_graph_is_reused_per_config(self):
+        graph = get_agents_graph()
+        self.assertIs(get_agents_graph(), graph)
+        self.assertIsNot(get_agents_graph(model="gpt-4o-mini"), graph)
+
+    def test_invalidate_rebuilds_graph(self):
+        graph = get_agents_graph(temperature=0.2)
+        self.assertTrue(invalidate_agents_graph(temperature=0.2))
+        self.assertFalse(invalidate_agents_graph(temperature=0.2))
+        self.assertIsNot(get_agents_graph(temperature=0.2), graph)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,219 @@
+import asyncio
+import os
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.llm_cache import MemoryLRUCache, ResponseCache, SQLiteCache, SingleFlight, TieredCache, make_cache_key
+from config.llm_config import MAX_USAGE_NODES, YourLLM
+from core.tracing import trace
+
+
+def fake_usage(prompt_tokens=120, cached_tokens=64, completion_tokens=2):
+    details = SimpleNamespace(cached_tokens=cached_tokens)
+    return SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, prompt_tokens_details=details)
+
+
+class FakeCompletions:
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+        self.requests = []
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        self.requests.append(kwargs)
+        await asyncio.sleep(self.delay)
+        content = f"answer {self.calls}"
+        if kwargs.get("stream"):
+            return self._stream(content, kwargs.get("stream_options") or {})
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=fake_usage())
+
+    async def _stream(self, content, stream_options):
+        for word in content.split(" "):
+            await asyncio.sleep(self.delay)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word + " "))], usage=None)
+        if stream_options.get("include_usage"):
+            yield SimpleNamespace(choices=[], usage=fake_usage())
+
+
+class FakeClient:
+    def __init__(self, delay=0.0):
+        self.chat = SimpleNamespace(completions=FakeCompletions(delay))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_key_depends_on_every_input(self):
+        messages = [{"role": "user", "content": "hi"}]
+        key = make_cache_key("gpt-4o", messages, 0.5, 1024)
+        self.assertEqual(key, make_cache_key("gpt-4o", [{"content": "hi", "role": "user"}], 0.5, 1024))
+        self.assertNotEqual(key, make_cache_key("gpt-4o-mini", messages, 0.5, 1024))
+        self.assertNotEqual(key, make_cache_key("gpt-4o", messages, 0.7, 1024))
+        self.assertNotEqual(key, make_cache_key("gpt-4o", messages, 0.5, 256))
+
+    def test_incomplete_backends_fail_on_creation(self):
+        class GetOnly(ResponseCache):
+            def get(self, key):
+                return None
+
+        with self.assertRaises(TypeError):
+            GetOnly()
+
+    def test_memory_lru_eviction_and_ttl(self):
+        clock = FakeClock()
+        cache = MemoryLRUCache(max_entries=2, ttl=10, time_fn=clock)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        self.assertEqual(cache.get("a"), "1") # "b" is now least recently used
+        cache.set("c", "3")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats["evictions"], 1)
+
+        clock.now += 11
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats["expirations"], 1) # Expiry is lazy, only "a" has been looked up
+        self.assertEqual(cache.stats["hits"], 1)
+
+    def test_sqlite_tier_persists_and_promotes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "llm_cache.sqlite")
+            disk = SQLiteCache(path, max_entries=1)
+            disk.set("a", "1")
+            disk.set("b", "2")
+            self.assertIsNone(disk.get("a"))
+            disk.close()
+
+            reopened = SQLiteCache(path)
+            cache = TieredCache(MemoryLRUCache(), reopened)
+            self.assertEqual(cache.get("b"), "2")
+            self.assertEqual(cache.memory.get("b"), "2")
+            self.assertEqual(cache.tier_stats()["disk"]["hits"], 1)
+            reopened.close()
+
+    def test_agenerate_uses_cache_only_when_asked(self):
+        client = FakeClient()
+        llm = YourLLM("fake_key", client=client, cache=TieredCache(MemoryLRUCache()))
+        messages = [{"role": "system", "content": "analyze"}]
+
+        async def run():
+            first = await llm.agenerate(messages, cache=True)
+            second = await llm.agenerate(messages, cache=True)
+            fresh = await llm.agenerate(messages, cache=False)
+            return first, second, fresh
+
+        first, second, fresh = asyncio.run(run())
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, fresh)
+        self.assertEqual(client.chat.completions.calls, 2)
+        self.assertEqual(llm.cache.stats["hits"], 1)
+
+
+class TestUsageTracking(unittest.TestCase):
+    def test_cached_prompt_tokens_are_recorded_per_node(self):
+        llm = YourLLM("fake_key", client=FakeClient(), cache=TieredCache(MemoryLRUCache()), single_flight=SingleFlight())
+        messages = [{"role": "system", "content": "static"}, {"role": "user", "content": "dynamic"}]
+
+        async def run():
+            await llm.agenerate(messages, node="advisor_analyze")
+            await llm.agenerate(messages, cache=True, node="advisor_analyze")
+            await llm.agenerate(messages, cache=True, node="advisor_analyze") # Cache hit, no API call
+            return [delta async for delta in llm.astream(messages, node="advisor_generate")]
+
+        self.assertEqual(asyncio.run(run()), ["answer ", "3 "])
+        self.assertEqual(
+            llm.usage["advisor_analyze"],
+            {"calls": 2, "prompt_tokens": 240, "cached_tokens": 128, "completion_tokens": 4}
+        )
+        self.assertEqual(llm.usage["advisor_generate"]["calls"], 1)
+        self.assertAlmostEqual(llm.cache_report()["advisor_generate"]["cached_ratio"], 64 / 120)
+
+    def test_cache_report_per_request_and_bounded_usage(self):
+        llm = YourLLM("fake_key", client=FakeClient(), cache=None, single_flight=SingleFlight())
+        messages = [{"role": "user", "content": "hi"}]
+
+        async def run():
+            await llm.agenerate(messages, node="advisor_analyze") # An earlier request
+            with trace("request") as root:
+                await llm.agenerate(messages, node="advisor_generate")
+            return root
+
+        root = asyncio.run(run())
+        self.assertEqual(set(llm.cache_report()), {"advisor_analyze", "advisor_generate"})
+        self.assertEqual(set(llm.cache_report(root)), {"advisor_generate"})
+        self.assertEqual(llm.cache_report(root)["advisor_generate"]["calls"], 1)
+
+        self.assertEqual(set(llm.reset_usage()), {"advisor_analyze", "advisor_generate"})
+        self.assertEqual(llm.usage, {})
+        for i in range(MAX_USAGE_NODES + 5):
+            llm.record_usage(f"node_{i}", fake_usage())
+        self.assertEqual(len(llm.usage), MAX_USAGE_NODES + 1)
+        self.assertEqual(llm.usage["other"]["calls"], 5)
+
+    def test_nodes_use_their_model_tier_and_output_budget(self):
+        client = FakeClient()
+        llm = YourLLM("fake_key", client=client, cache=None, max_tokens=2048)
+        messages = [{"role": "user", "content": "plan"}]
+
+        async def run():
+            await llm.agenerate(messages, node="task_analyzer")
+            await llm.agenerate(messages, node="plan_generator")
+            async for _ in llm.astream(messages, node="coordinator"):
+                pass
+            llm.config.tiering = False
+            await llm.agenerate(messages, node="advisor_analyze")
+
+        asyncio.run(run())
+        sent = [(request["model"], request["max_tokens"]) for request in client.chat.completions.requests]
+        self.assertEqual(sent, [("gpt-4o-mini", 400), ("gpt-4o", 2048), ("gpt-4o-mini", 300), ("gpt-4o", 400)])
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_identical_calls_share_one_request(self):
+        client = FakeClient(delay=0.01)
+        llm = YourLLM("fake_key", client=client, cache=TieredCache(MemoryLRUCache()), single_flight=SingleFlight())
+        messages = [{"role": "system", "content": "guidance"}]
+
+        async def run():
+            return await asyncio.gather(*(llm.agenerate(messages) for _ in range(3)))
+
+        self.assertEqual(asyncio.run(run()), ["answer 1"] * 3)
+        self.assertEqual(client.chat.completions.calls, 1)
+        self.assertEqual(llm.single_flight.stats, {"calls": 1, "coalesced": 2})
+
+        # Once the first call has finished, a new one goes to the API again
+        asyncio.run(llm.agenerate(messages))
+        self.assertEqual(client.chat.completions.calls, 2)
+
+    def test_concurrent_identical_streams_replay_one_stream(self):
+        client = FakeClient(delay=0.01)
+        llm = YourLLM("fake_key", client=client, cache=TieredCache(MemoryLRUCache()), single_flight=SingleFlight())
+        messages = [{"role": "system", "content": "notes"}]
+
+        async def consume():
+            return [delta async for delta in llm.astream(messages)]
+
+        async def run():
+            return await asyncio.gather(consume(), consume())
+
+        first, second = asyncio.run(run())
+        self.assertEqual(first, ["answer ", "1 "])
+        self.assertEqual(first, second)
+        self.assertEqual(client.chat.completions.calls, 1)
+        self.assertEqual(llm.single_flight.stats["coalesced"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
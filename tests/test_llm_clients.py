@@ -0,0 +1,90 @@
+import asyncio
+import os
+import sys
+import unittest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.llm_clients import HTTP2_AVAILABLE, LLMClientManager
+from config.llm_config import YourLLM
+
+
+class RecordingClient:
+    """Stand-in for AsyncOpenAI that keeps what it was built with."""
+    def __init__(self, api_key, base_url, http_client):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.http_client = http_client
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+        await self.http_client.aclose()
+
+
+def make_manager(**options):
+    return LLMClientManager(client_factory=RecordingClient, **options)
+
+
+class TestLLMClientManager(unittest.TestCase):
+    def test_one_client_per_loop_key_and_base_url(self):
+        manager = make_manager()
+
+        async def run():
+            first = manager.get("key-a", "https://a.example/v1")
+            self.assertIs(manager.get("key-a", "https://a.example/v1"), first)
+            other_key = manager.get("key-b", "https://a.example/v1")
+            other_url = manager.get("key-a", "https://b.example/v1")
+            self.assertEqual(len({id(first), id(other_key), id(other_url)}), 3)
+            self.assertEqual((other_key.api_key, other_url.base_url), ("key-b", "https://b.example/v1"))
+            return first
+
+        first_loop = asyncio.run(run())
+        second_loop = asyncio.run(run())
+        self.assertIsNot(first_loop, second_loop) # A new loop never reuses a dead loop's pool
+
+        # The first loop's clients were never closed; they are dropped once noticed
+        async def count():
+            manager.get("key-a", "https://a.example/v1")
+            return manager.client_count()
+        self.assertEqual(asyncio.run(count()), 1)
+        self.assertEqual(manager.stats["dropped"], 6)
+
+    def test_aclose_closes_the_running_loops_clients(self):
+        manager = make_manager()
+
+        async def run():
+            client = manager.get("key-a", "https://a.example/v1")
+            await manager.aclose()
+            return client
+
+        client = asyncio.run(run())
+        self.assertTrue(client.closed)
+        self.assertTrue(client.http_client.is_closed)
+        self.assertEqual(manager.client_count(), 0)
+        self.assertEqual(manager.stats["closed"], 1)
+
+    def test_pool_settings_and_missing_key(self):
+        manager = make_manager(max_connections=4, max_keepalive=2, timeout=5.0, connect_timeout=1.0, http2=True)
+        self.assertEqual(manager.http2, HTTP2_AVAILABLE) # Falls back to HTTP/1.1 without h2
+        self.assertEqual(manager.limits.max_connections, 4)
+        self.assertEqual(manager.timeout.connect, 1.0)
+
+        async def run():
+            with self.assertRaises(ValueError):
+                manager.get("", "https://a.example/v1")
+        asyncio.run(run())
+
+    def test_llm_uses_its_own_key_and_base_url(self):
+        manager = make_manager()
+        llm = YourLLM("key-from-caller", base_url="https://proxy.example/v1", client_manager=manager)
+
+        async def run():
+            return llm.client
+        client = asyncio.run(run())
+        self.assertEqual((client.api_key, client.base_url), ("key-from-caller", "https://proxy.example/v1"))
+
+
+if __name__ == '__main__':
+    unittest.main()
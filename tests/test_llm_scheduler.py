@@ -0,0 +1,129 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.llm_config import LLMScheduler, TokenBucket, PRIORITY_HIGH, PRIORITY_NORMAL
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLLMScheduler(unittest.TestCase):
+    def test_concurrency_is_capped(self):
+        scheduler = LLMScheduler(max_concurrency=2)
+        state = {"in_flight": 0, "max": 0}
+
+        async def call():
+            state["in_flight"] += 1
+            state["max"] = max(state["max"], state["in_flight"])
+            await asyncio.sleep(0.01)
+            state["in_flight"] -= 1
+            return "ok"
+
+        async def run():
+            return await asyncio.gather(*(scheduler.run(call) for _ in range(6)))
+
+        self.assertEqual(asyncio.run(run()), ["ok"] * 6)
+        self.assertEqual(state["max"], 2)
+        metrics = scheduler.metrics()
+        self.assertEqual(metrics["completed"], 6)
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertEqual(metrics["in_flight"], 0)
+        self.assertGreaterEqual(metrics["max_queue_depth"], 4)
+
+    def test_high_priority_jumps_the_queue(self):
+        scheduler = LLMScheduler(max_concurrency=1)
+        order = []
+
+        def call(name):
+            async def _call():
+                order.append(name)
+                await asyncio.sleep(0.01)
+            return _call
+
+        async def run():
+            first = asyncio.create_task(scheduler.run(call("first")))
+            await asyncio.sleep(0) # "first" takes the only slot
+            low = asyncio.create_task(scheduler.run(call("analysis"), priority=PRIORITY_NORMAL))
+            high = asyncio.create_task(scheduler.run(call("generation"), priority=PRIORITY_HIGH))
+            await asyncio.gather(first, low, high)
+
+        asyncio.run(run())
+        self.assertEqual(order, ["first", "generation", "analysis"])
+
+    def test_retries_rate_limits_but_not_client_errors(self):
+        scheduler = LLMScheduler(max_retries=3, base_delay=0)
+        attempts = {"n": 0}
+
+        async def flaky():
+            attempts["n"] += 1
+            if attempts["n"] < 3:
+                raise RateLimited()
+            return "ok"
+
+        async def broken():
+            raise BadRequest()
+
+        self.assertEqual(asyncio.run(scheduler.run(flaky)), "ok")
+        self.assertEqual(scheduler.stats["retries"], 2)
+        with self.assertRaises(BadRequest):
+            asyncio.run(scheduler.run(broken))
+        self.assertEqual(scheduler.stats["failed"], 1)
+
+    def test_token_bucket_refills_over_time(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, time_fn=clock)
+        self.assertEqual(bucket.delay_for(60), 0)
+        bucket.consume(60)
+        self.assertAlmostEqual(bucket.delay_for(30), 30)
+        clock.now += 30
+        self.assertEqual(bucket.delay_for(30), 0)
+
+    def test_slot_is_handed_to_a_waiter_on_another_loop(self):
+        # Streamlit sessions each run their own loop on their own thread, sharing one scheduler
+        scheduler = LLMScheduler(max_concurrency=1)
+        held = threading.Event()
+        waited = {}
+
+        async def holder():
+            async with scheduler.slot():
+                held.set()
+                await asyncio.sleep(0.3)
+
+        async def waiter():
+            held.wait()
+            started = time.monotonic()
+            async with scheduler.slot():
+                waited["seconds"] = time.monotonic() - started
+
+        threads = [threading.Thread(target=asyncio.run, args=(coro(),), daemon=True) for coro in (holder, waiter)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+        self.assertIn("seconds", waited)
+        self.assertLess(waited["seconds"], 1.0) # Woken when the holder released, not stuck until a timeout
+        self.assertEqual(scheduler.metrics()["in_flight"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import io
+import json
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.data_manager import DataManager
+from data.loaders import iter_calendar_export, iter_google_tasks, iter_ics_events, iter_json_array
+
+START = datetime(2025, 6, 8, tzinfo=timezone.utc)
+END = START + timedelta(days=7)
+
+ICS = """BEGIN:VCALENDAR
+VERSION:2.0
+BEGIN:VEVENT
+UID:old
+DTSTART:20210301T090000Z
+SUMMARY:Old lecture
+END:VEVENT
+BEGIN:VEVENT
+UID:match
+DTSTART;TZID=America/New_York:20250609T100000
+DTEND;TZID=America/New_York:20250609T113000
+SUMMARY:Football match\\, away
+DESCRIPTION:Bring the long
+ boots
+BEGIN:VALARM
+DESCRIPTION:Reminder
+END:VALARM
+END:VEVENT
+BEGIN:VEVENT
+DTSTART;VALUE=DATE:20250610
+SUMMARY:Study day
+END:VEVENT
+BEGIN:VEVENT
+DTSTART:20250611T090000Z
+SUMMARY:Cancelled
+STATUS:CANCELLED
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def google_events(count):
+    return {
+        "kind": "calendar#events",
+        "defaultReminders": [],
+        "items": [
+            {"summary": f"event {i}", "start": {"dateTime": (START + timedelta(days=i - count // 2)).isoformat()}}
+            for i in range(count)
+        ]
+    }
+
+
+class TestLoaders(unittest.TestCase):
+    def test_json_array_streams_across_chunk_boundaries(self):
+        payload = json.dumps({"summary": "x", "items": [{"n": i} for i in range(50)] + [12345]})
+        items = list(iter_json_array(io.StringIO(payload), "items", chunk_size=7))
+        self.assertEqual(items, [{"n": i} for i in range(50)] + [12345])
+        self.assertEqual(list(iter_json_array(io.StringIO("[1, 2]"), None, chunk_size=1)), [1, 2])
+        self.assertEqual(list(iter_json_array(io.StringIO('{"other": []}'))), [])
+        with self.assertRaises(ValueError):
+            list(iter_json_array(io.StringIO('{"items": [{"n": 1}, {"n"'), chunk_size=4))
+
+    def test_google_events_are_filtered_to_the_window(self):
+        export = io.BytesIO(json.dumps(google_events(30)).encode("utf-8")) # Binary, like an upload
+        events = list(iter_calendar_export(export, START, END))
+        self.assertEqual([e["summary"] for e in events], [f"event {i}" for i in range(15, 23)])
+        self.assertFalse(export.closed)
+
+    def test_ics_events(self):
+        events = list(iter_ics_events(io.StringIO(ICS), START, END))
+        self.assertEqual([e["summary"] for e in events], ["Football match, away", "Study day"])
+        match = events[0]
+        self.assertEqual(match["start"], {"dateTime": "2025-06-09T14:00:00Z"}) # EDT to UTC
+        self.assertEqual(match["end"], {"dateTime": "2025-06-09T15:30:00Z"})
+        self.assertEqual(match["description"], "Bring the longboots") # Unfolded, alarm ignored
+        self.assertEqual(events[1]["start"], {"date": "2025-06-10"})
+
+    def test_google_tasks_accepts_api_lists_and_takeout(self):
+        api = {"items": [{"title": "a", "due": "2025-06-09T00:00:00.000Z"}, {"title": "old", "due": "2020-01-01T00:00:00Z"}]}
+        takeout = {"kind": "tasks#taskLists", "items": [{"kind": "tasks#taskList", "title": "School", "items": [
+            {"title": "b", "status": "completed", "due": "2025-06-10T00:00:00.000Z"}, {"title": "no due"}
+        ]}]}
+        self.assertEqual([t["title"] for t in iter_google_tasks(io.StringIO(json.dumps(api)), START)], ["a"])
+        tasks = list(iter_google_tasks(io.StringIO(json.dumps(takeout)), START))
+        self.assertEqual([(t["title"], t["status"]) for t in tasks], [("b", "completed")])
+
+    def test_data_manager_loads_exports(self):
+        dm = DataManager()
+        tasks = {"items": [{"title": "essay", "due": "2025-06-12T23:59:00Z"}]}
+        dm.load_exports(
+            {"profiles": [{"id": "student_123"}]},
+            calendar_source=io.StringIO(ICS),
+            task_source=io.StringIO(json.dumps(tasks)),
+            start=START,
+            calendar_format="ics"
+        )
+        self.assertEqual(len(dm.calendar_data["events"]), 2) # The 2021 lecture was never kept
+        self.assertEqual([e["summary"] for e in dm.get_upcoming_events(now=START)], ["Football match, away", "Study day"])
+        self.assertEqual([t["title"] for t in dm.get_active_tasks(now=START)], ["essay"])
+
+
+if __name__ == '__main__':
+    unittest.main()
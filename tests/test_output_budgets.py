@@ -0,0 +1,130 @@
+import asyncio
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.llm_cache import MemoryLRUCache, TieredCache
+from config.llm_config import YourLLM
+from config.output_budgets import TERSE_END, OutputBudgets
+from tests.test_llm_cache import FakeClient, fake_usage
+
+
+class TruncatingCompletions:
+    # Replies with the terse marker, and reports finish_reason "length" when asked for few tokens
+    def __init__(self):
+        self.requests = []
+
+    async def create(self, **kwargs):
+        self.requests.append(kwargs)
+        finish_reason = "length" if kwargs["max_tokens"] < 100 else "stop"
+        if kwargs.get("stream"):
+            return self._stream(finish_reason)
+        message = SimpleNamespace(content=f"load: heavy\n{TERSE_END}\nignored")
+        choice = SimpleNamespace(message=message, finish_reason=finish_reason)
+        used = kwargs["max_tokens"] if finish_reason == "length" else 40
+        return SimpleNamespace(choices=[choice], usage=fake_usage(completion_tokens=used))
+
+    async def _stream(self, finish_reason):
+        for word, reason in (("load: ", None), ("heavy", finish_reason)):
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word), finish_reason=reason)], usage=None)
+
+
+class TestOutputBudgets(unittest.TestCase):
+    def test_suggestion_needs_samples_and_backs_off_on_truncation(self):
+        budgets = OutputBudgets(min_samples=10, headroom=1.25, floor=64)
+        for tokens in range(100, 200, 10):
+            budgets.record("task_analyzer", tokens)
+        self.assertEqual(budgets.suggest("task_analyzer", 400), 238) # p95 of 190 plus headroom
+        self.assertEqual(budgets.suggest("task_analyzer", 200), 200) # Never above the configured budget
+        self.assertEqual(budgets.suggest("advisor_analyze", 400), 400) # No samples yet
+
+        budgets.record("task_analyzer", 238, truncated=True)
+        self.assertEqual(budgets.suggest("task_analyzer", 400), 400)
+
+    def test_histogram_and_report(self):
+        budgets = OutputBudgets()
+        for tokens in (10, 40, 60, 140):
+            budgets.record("coordinator", tokens)
+        self.assertEqual(budgets.histogram("coordinator"), {"0-49": 2, "50-99": 1, "100-149": 1})
+        row = budgets.report(lambda node: 300)["coordinator"]
+        self.assertEqual((row["calls"], row["p50"], row["max"], row["budget"], row["suggested"]), (4, 40, 140, 300, 300))
+
+
+class TestNodeRequests(unittest.TestCase):
+    def test_terse_analyses_get_instruction_and_stop_marker(self):
+        client = SimpleNamespace(chat=SimpleNamespace(completions=TruncatingCompletions()))
+        llm = YourLLM("fake_key", client=client, cache=None, output_budgets=OutputBudgets())
+        llm.config.terse_analyses = True
+        llm.config.node_stop["advisor_generate"] = ["\n\nP.S."]
+        messages = [{"role": "user", "content": "tasks"}]
+
+        async def run():
+            analysis = await llm.agenerate(messages, node="task_analyzer")
+            guidance = await llm.agenerate(messages, node="advisor_generate")
+            return analysis, guidance
+
+        analysis, guidance = asyncio.run(run())
+        self.assertEqual(analysis, "load: heavy")
+        self.assertEqual(guidance, f"load: heavy\n{TERSE_END}\nignored") # Not an intermediate step
+        terse, full = client.chat.completions.requests
+        self.assertEqual(terse["stop"], [TERSE_END])
+        self.assertIn("terse", terse["messages"][-1]["content"])
+        self.assertEqual(full["stop"], ["\n\nP.S."])
+        self.assertEqual(full["messages"], messages)
+
+    def test_adaptive_budget_follows_observed_completions(self):
+        budgets = OutputBudgets(min_samples=5, floor=16)
+        for _ in range(5):
+            budgets.record("calendar_analyzer", 40)
+        client = SimpleNamespace(chat=SimpleNamespace(completions=TruncatingCompletions()))
+        llm = YourLLM("fake_key", client=client, cache=None, output_budgets=budgets)
+
+        async def run():
+            await llm.agenerate([{"role": "user", "content": "a"}], node="calendar_analyzer")
+            llm.config.adaptive_max_tokens = True
+            await llm.agenerate([{"role": "user", "content": "b"}], node="calendar_analyzer")
+            await llm.agenerate([{"role": "user", "content": "c"}], node="calendar_analyzer")
+
+        asyncio.run(run())
+        # 400 while off, then p95 (40) plus headroom; that reply is cut off, so back to 400
+        self.assertEqual([r["max_tokens"] for r in client.chat.completions.requests], [400, 50, 400])
+        self.assertEqual(llm.budget_report()["calendar_analyzer"]["truncated"], 1)
+
+    def test_truncated_replies_are_not_cached(self):
+        budgets = OutputBudgets(min_samples=5, floor=16)
+        for _ in range(5):
+            budgets.record("coordinator", 40)
+        client = SimpleNamespace(chat=SimpleNamespace(completions=TruncatingCompletions()))
+        llm = YourLLM("fake_key", client=client, cache=TieredCache(MemoryLRUCache()), output_budgets=budgets)
+        llm.config.adaptive_max_tokens = True
+        messages = [{"role": "user", "content": "route"}]
+
+        async def run():
+            await llm.agenerate(messages, cache=True, node="coordinator") # Cut off at the adaptive cap of 50
+            await llm.agenerate(messages, cache=True, node="coordinator") # Back to the full budget: a new call
+            await llm.agenerate(messages, cache=True, node="coordinator") # That complete reply is cached
+            return [delta async for delta in llm.astream(messages, cache=True, node="task_analyzer")]
+
+        for _ in range(5):
+            budgets.record("task_analyzer", 40)
+        self.assertEqual(asyncio.run(run()), ["load: ", "heavy"])
+        self.assertEqual([r["max_tokens"] for r in client.chat.completions.requests], [50, 300, 50])
+        self.assertEqual(llm.cache.stats["sets"], 1) # Only the complete coordinator reply; the stream was cut off too
+
+    def test_completion_tokens_are_recorded_for_streams(self):
+        budgets = OutputBudgets()
+        llm = YourLLM("fake_key", client=FakeClient(), cache=None, output_budgets=budgets)
+
+        async def run():
+            return [delta async for delta in llm.astream([{"role": "user", "content": "hi"}], node="advisor_generate")]
+
+        asyncio.run(run())
+        self.assertEqual(budgets.histogram("advisor_generate"), {"0-49": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import asyncio
+import unittest
+import sys
+import os
+
+from langchain_core.messages import HumanMessage
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from agents.coordinator_agent import coordinator_agent, parse_coordinator_response
+from executor.agent_executor import ready_agents
+from agents.router import RouterConfig, route_by_rules
+
+
+class CountingLLM:
+    def __init__(self):
+        self.calls = 0
+
+    async def agenerate(self, messages, temperature=None, **kwargs):
+        self.calls += 1
+        return "Thought: schedule.\nAction: planner.\nObservation: ok.\nDecision: PLANNER"
+
+
+def make_state(request: str) -> dict:
+    return {
+        "messages": [HumanMessage(content=request)],
+        "profile": {"academic_info": {"current_courses": [{"name": "Calculus III"}]}},
+        "calendar": {"events": []},
+        "tasks": {"tasks": []},
+        "results": {}
+    }
+
+
+class TestRuleRouter(unittest.TestCase):
+    def test_explicit_requests_are_confident(self):
+        routed = route_by_rules("Write notes and give me advice on my schedule", {})
+        self.assertEqual(routed["required_agents"], ["PLANNER", "NOTEWRITER", "ADVISOR"])
+        self.assertEqual(routed["concurrent_groups"], [["PLANNER", "NOTEWRITER", "ADVISOR"]])
+        self.assertGreaterEqual(routed["confidence"], RouterConfig.confidence_threshold)
+
+    def test_hints_lower_confidence(self):
+        routed = route_by_rules("I am struggling to review for my exam", {})
+        self.assertEqual(routed["required_agents"], ["PLANNER"])
+        self.assertLess(routed["confidence"], RouterConfig.confidence_threshold)
+
+    def test_hybrid_skips_llm_only_when_confident(self):
+        llm = CountingLLM()
+        confident = asyncio.run(coordinator_agent(make_state("Summarize my notes and plan my week"), llm, "hybrid"))
+        self.assertEqual(llm.calls, 0)
+        self.assertEqual(confident["results"]["coordinator_analysis"]["router"], "rules")
+        self.assertEqual(confident["results"]["coordinator_analysis"]["required_agents"], ["PLANNER", "NOTEWRITER"])
+
+        unsure = asyncio.run(coordinator_agent(make_state("Help me prepare for Calculus III"), llm, "hybrid"))
+        self.assertEqual(llm.calls, 1)
+        self.assertEqual(unsure["results"]["coordinator_analysis"]["router"], "llm")
+
+    def test_rules_mode_never_calls_llm(self):
+        llm = CountingLLM()
+        asyncio.run(coordinator_agent(make_state("Help me prepare for Calculus III"), llm, "rules"))
+        self.assertEqual(llm.calls, 0)
+
+
+class TestCoordinatorParsing(unittest.TestCase):
+    def test_structured_reply_is_validated(self):
+        analysis = parse_coordinator_response("""```json
+        {"thought": "Needs notes after the plan", "required_agents": ["planner", "NoteWriter", "ADVISOR"],
+         "concurrent_groups": [["PLANNER", "ADVISOR", "TUTOR"]], "dependencies": {"NOTEWRITER": ["PLANNER"]}}
+        ```""")
+        self.assertEqual(analysis["required_agents"], ["PLANNER", "NOTEWRITER", "ADVISOR"])
+        self.assertEqual(analysis["concurrent_groups"], [["PLANNER", "ADVISOR"], ["NOTEWRITER"]])
+        self.assertEqual(analysis["dependencies"], {"NOTEWRITER": ["PLANNER"]})
+        self.assertEqual(analysis["reasoning"], "Needs notes after the plan")
+
+    def test_invalid_json_falls_back_to_text(self):
+        analysis = parse_coordinator_response('Thought: notes please {"required_agents": []}\nDecision: done')
+        self.assertEqual(analysis["required_agents"], ["PLANNER", "NOTEWRITER"])
+
+    def test_legacy_reply_schedules_advisor(self):
+        analysis = parse_coordinator_response("Thought: guidance.\nAction: advisor.\nDecision: ADVISOR")
+        self.assertEqual(analysis["concurrent_groups"], [["PLANNER", "ADVISOR"]])
+
+    def test_ready_agents_follow_groups_and_dependencies(self):
+        analysis = {
+            "required_agents": ["PLANNER", "NOTEWRITER", "ADVISOR"],
+            "concurrent_groups": [["PLANNER", "NOTEWRITER"], ["ADVISOR"]],
+            "dependencies": {"NOTEWRITER": ["PLANNER"]}
+        }
+        self.assertEqual(ready_agents(analysis, set()), ["PLANNER"])
+        self.assertEqual(ready_agents(analysis, {"PLANNER"}), ["NOTEWRITER"])
+        self.assertEqual(ready_agents(analysis, {"PLANNER", "NOTEWRITER"}), ["ADVISOR"])
+        self.assertEqual(ready_agents(analysis, {"PLANNER", "NOTEWRITER", "ADVISOR"}), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
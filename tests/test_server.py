@@ -0,0 +1,74 @@
+import json
+import os
+import sys
+import unittest
+
+from starlette.testclient import TestClient
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.session_store import MemorySessionStore, SessionManager
+from server import create_app
+from workflow.graph_builder import create_agents_graph
+from tests.test_batch import make_data_manager
+from tests.test_graph import FakeLLM
+
+
+def parse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.llm = FakeLLM()
+        app = create_app(
+            graph=create_agents_graph(self.llm, router_mode="llm"),
+            data_manager=make_data_manager(),
+            sessions=SessionManager(MemorySessionStore())
+        )
+        self.client = TestClient(app)
+        self.client.__enter__() # Runs the lifespan
+        self.addCleanup(self.client.__exit__, None, None, None)
+
+    def test_run_request_returns_outputs(self):
+        self.assertEqual(self.client.get("/health").json(), {"status": "ok"})
+        response = self.client.post("/v1/requests", json={"student_id": "student_123", "request": "Help me with notes and guidance"})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(set(body["outputs"]), {"planner", "notewriter", "advisor"})
+
+    def test_invalid_requests_are_rejected(self):
+        self.assertEqual(self.client.post("/v1/requests", json={"request": "no student"}).status_code, 400)
+        self.assertEqual(self.client.post("/v1/requests", content=b"{not json").status_code, 400)
+        response = self.client.post("/v1/requests/stream", json={"student_id": "nobody", "request": "Plan"})
+        self.assertEqual(response.status_code, 404)
+
+        # Malformed inline data is the client's error, whichever layer notices it
+        profile = {"id": "inline"}
+        for data in ({"calendar": {"events": 5}}, {"calendar": {"events": [5]}}, {"tasks": {"tasks": "all"}}):
+            response = self.client.post("/v1/requests", json={"student_id": "inline", "request": "Plan", "profile": profile, **data})
+            self.assertEqual(response.status_code, 400, response.text)
+        self.assertEqual(self.llm.calls, 0)
+
+    def test_stream_sends_updates_tokens_and_result(self):
+        profile = {"id": "inline", "learning_preferences": {"learning_style": {"visual": True}}}
+        response = self.client.post("/v1/requests/stream", json={"student_id": "inline", "request": "Plan my week", "profile": profile})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+        events = parse_events(response.text)
+        kinds = [kind for kind, _ in events]
+        self.assertEqual(kinds[-1], "result")
+        self.assertIn("token", kinds)
+        nodes = [data["node"] for kind, data in events if kind == "update"]
+        self.assertEqual(nodes[:2], ["profile_analyzer", "coordinator"])
+        self.assertEqual(nodes[-1], "execute")
+        self.assertIn("planner", events[-1][1]["outputs"])
+
+
+if __name__ == '__main__':
+    unittest.main()
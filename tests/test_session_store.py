@@ -0,0 +1,104 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data import session_store
+from data.session_store import MemorySessionStore, SessionManager, SessionStore, SQLiteSessionStore, get_session_manager
+from workflow.graph_builder import create_agents_graph
+from tests.test_graph import FakeLLM, make_state
+
+REQUEST = "Help me with notes and guidance for Calculus III"
+
+
+def run_with_session(sessions, state):
+    llm = FakeLLM()
+    graph = create_agents_graph(llm, router_mode="llm")
+    state["results"].update(sessions.restore(state))
+    final_state = asyncio.run(graph.ainvoke(state))
+    sessions.save(state, final_state["results"])
+    return llm, final_state
+
+
+class TestSessionManager(unittest.TestCase):
+    def test_unchanged_inputs_skip_the_analysis_calls(self):
+        sessions = SessionManager(MemorySessionStore())
+        first, _ = run_with_session(sessions, make_state(REQUEST))
+        self.assertEqual(first.calls, 8)
+
+        second, final_state = run_with_session(sessions, make_state(REQUEST))
+        self.assertEqual(second.calls, 4) # coordinator + one generation per agent
+        self.assertEqual(sessions.stats, {"reused": 4, "recomputed": 4})
+        planner_outputs = final_state["results"]["agent_outputs"]["planner"]
+        self.assertIn("calendar_analysis", planner_outputs) # Restored analyses still reach the outputs
+
+    def test_changed_inputs_are_recomputed(self):
+        sessions = SessionManager(MemorySessionStore())
+        run_with_session(sessions, make_state(REQUEST))
+
+        state = make_state(REQUEST)
+        state["calendar"] = {"events": [{"summary": "Exam", "start": {"dateTime": "2030-01-01T09:00:00Z"}}]}
+        reused = sessions.restore(state)
+        self.assertEqual(set(reused), {"task_analysis", "learning_analysis", "situation_analysis"})
+
+        state = make_state("Now only plan my week")
+        self.assertEqual(set(sessions.restore(state)), {"calendar_analysis", "task_analysis"})
+
+    def test_stale_analyses_expire(self):
+        clock = [1000.0]
+        sessions = SessionManager(MemorySessionStore(), max_age=60, time_fn=lambda: clock[0])
+        sessions.save(make_state(REQUEST), {"agent_outputs": {"PLANNER": {"task_analysis": {"analysis": "ok"}}}})
+        self.assertIn("task_analysis", sessions.restore(make_state(REQUEST)))
+
+        # Saving the reused value again does not refresh its age
+        clock[0] += 50
+        sessions.save(make_state(REQUEST), {"task_analysis": {"analysis": "ok"}})
+        clock[0] += 20
+        self.assertEqual(sessions.restore(make_state(REQUEST)), {})
+
+    def test_sqlite_store_persists_across_instances(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "sessions.sqlite")
+            store = SQLiteSessionStore(path)
+            SessionManager(store).save(make_state(REQUEST), {"situation_analysis": {"analysis": "ok"}})
+            store.close()
+
+            store = SQLiteSessionStore(path)
+            restored = SessionManager(store).restore(make_state(REQUEST))
+            self.assertEqual(restored, {"situation_analysis": {"analysis": "ok"}})
+            store.delete("student_123")
+            self.assertIsNone(store.get("student_123"))
+            store.close()
+
+    def test_process_wide_manager_is_built_once(self):
+        with self.assertRaises(TypeError): # Backends must implement the whole interface
+            type("GetOnly", (SessionStore,), {"get": lambda self, student_id: None})()
+
+        with tempfile.TemporaryDirectory() as directory:
+            previous = os.environ.get("ATLAS_SESSION_DB")
+            os.environ["ATLAS_SESSION_DB"] = os.path.join(directory, "sessions.sqlite")
+            session_store._session_manager = None
+            try:
+                managers = []
+                threads = [threading.Thread(target=lambda: managers.append(get_session_manager())) for _ in range(8)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                self.assertEqual(len({id(manager) for manager in managers}), 1)
+                managers[0].store.close()
+            finally:
+                session_store._session_manager = None
+                if previous is None:
+                    os.environ.pop("ATLAS_SESSION_DB", None)
+                else:
+                    os.environ["ATLAS_SESSION_DB"] = previous
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import sys
+import unittest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.state_merge import copying_dict_reducer
+from core.state import dict_reducer
+
+
+class TestDictReducer(unittest.TestCase):
+    def test_merges_like_the_copying_reducer(self):
+        state = {"a": {"x": 1, "y": {"z": 2}}, "b": "text", "c": {"k": 1}}
+        updates = [{"a": {"y": {"w": 3}}, "b": "new"}, {"c": "replaced"}, {"d": {"e": 5}}, {"a": {"x": {"nested": True}}}]
+        for update in updates:
+            self.assertEqual(dict_reducer(state, update), copying_dict_reducer(state, update))
+
+    def test_inputs_are_not_modified(self):
+        state = {"a": {"x": 1}}
+        update = {"a": {"y": 2}}
+        merged = dict_reducer(state, update)
+        self.assertEqual(state, {"a": {"x": 1}})
+        self.assertEqual(update, {"a": {"y": 2}})
+        self.assertEqual(merged, {"a": {"x": 1, "y": 2}})
+
+    def test_unchanged_parts_are_shared(self):
+        analysis = {"analysis": "x" * 1000}
+        state = {"calendar_analysis": analysis, "prompt_tokens": {"calendar_analyzer": 10}}
+        merged = dict_reducer(state, {"prompt_tokens": {"task_analyzer": 12}})
+        self.assertIs(merged["calendar_analysis"], analysis)
+        self.assertEqual(merged["prompt_tokens"], {"calendar_analyzer": 10, "task_analyzer": 12})
+
+        # Empty or identical updates copy nothing
+        self.assertIs(dict_reducer(state, {}), state)
+        self.assertIs(dict_reducer(state, {"calendar_analysis": analysis}), state)
+        self.assertIs(dict_reducer(state, {"prompt_tokens": {"calendar_analyzer": 10}}), state)
+        self.assertIs(dict_reducer({}, state), state)
+
+
+if __name__ == '__main__':
+    unittest.main()
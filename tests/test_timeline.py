@@ -0,0 +1,54 @@
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.timeline import (
+    calendar_window, ensure_calendar_index, events_between, index_tasks, parse_timestamp, tasks_due_after, upcoming_events
+)
+
+NOW = datetime(2025, 6, 8, 12, 0, tzinfo=timezone.utc)
+
+
+class TestTimeline(unittest.TestCase):
+    def test_parse_timestamp_normalizes_to_utc(self):
+        expected = NOW.timestamp()
+        self.assertEqual(parse_timestamp("2025-06-08T12:00:00Z"), expected)
+        self.assertEqual(parse_timestamp("2025-06-08T14:00:00+02:00"), expected)
+        self.assertEqual(parse_timestamp("2025-06-08T12:00:00"), expected) # Naive means UTC
+        self.assertEqual(parse_timestamp(NOW), expected)
+        self.assertEqual(parse_timestamp(expected), expected)
+        with self.assertRaises(ValueError):
+            parse_timestamp("next tuesday")
+
+    def test_window_queries_use_the_parsed_columns(self):
+        calendar = ensure_calendar_index({"events": [
+            {"summary": "b", "start": {"dateTime": "2025-06-09T09:00:00Z"}},
+            {"summary": "all day", "start": {"date": "2025-06-10"}},
+            {"summary": "a", "start": {"dateTime": "2025-06-08T13:00:00Z"}},
+            {"summary": "old", "start": {"dateTime": "2025-06-01T09:00:00Z"}}
+        ]})
+        self.assertEqual([e["summary"] for e in calendar["events"]], ["old", "a", "b", "all day"])
+        self.assertEqual(calendar["starts"], sorted(calendar["starts"]))
+        self.assertIs(ensure_calendar_index(calendar), calendar) # Already indexed, nothing is re-parsed
+
+        self.assertEqual([e["summary"] for e in upcoming_events(calendar, days=1, now=NOW)], ["a", "b"])
+        self.assertEqual([e["summary"] for e in events_between(calendar, NOW)], ["a", "b", "all day"])
+        window = calendar_window(calendar, NOW, NOW + timedelta(hours=2))
+        self.assertEqual(window, {"events": calendar["events"][1:2], "starts": calendar["starts"][1:2]})
+
+    def test_tasks_due_after(self):
+        tasks = index_tasks([
+            {"title": "later", "due": "2025-06-12T23:59:00Z"},
+            {"title": "overdue", "due": "2025-06-01T23:59:00Z"},
+            {"title": "no due date"}
+        ])
+        self.assertEqual([t["title"] for t in tasks["tasks"]], ["overdue", "later"])
+        self.assertEqual([t["title"] for t in tasks_due_after(tasks, NOW)["tasks"]], ["later"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import os
+import sys
+import unittest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.llm_cache import SingleFlight
+from config.llm_config import LLMScheduler, YourLLM, estimate_cost
+from core.tracing import export_json, span, timing_breakdown, totals, totals_by, trace
+from workflow.graph_builder import create_agents_graph
+from tests.test_graph import make_state
+from tests.test_llm_cache import FakeClient
+
+
+def make_llm(max_concurrency=8, delay=0.0):
+    return YourLLM(
+        "fake_key",
+        client=FakeClient(delay),
+        cache=None,
+        scheduler=LLMScheduler(max_concurrency=max_concurrency),
+        single_flight=SingleFlight()
+    )
+
+
+class TestTracing(unittest.TestCase):
+    def test_graph_run_builds_span_tree(self):
+        graph = create_agents_graph(make_llm(), router_mode="rules")
+
+        async def run():
+            with trace("request") as root:
+                await graph.ainvoke(make_state("Help me with notes and guidance for Calculus III"))
+            return root
+
+        root = asyncio.run(run())
+        top_level = [child.name for child in root.children]
+        self.assertEqual(top_level[:2], ["profile_analyzer", "coordinator"])
+        self.assertEqual(top_level[-1], "execute")
+        self.assertEqual(set(top_level[2:-1]), {"planner_entry", "notewriter_entry", "advisor_entry"})
+
+        # Subgraph nodes nest under their entry node and LLM calls under the node that made them
+        planner = next(child for child in root.children if child.name == "planner_entry")
+        self.assertEqual({child.name for child in planner.children}, {"calendar_analyzer", "task_analyzer", "plan_generator"})
+        plan = next(child for child in planner.children if child.name == "plan_generator")
+        self.assertEqual([(c.name, c.kind) for c in plan.children], [("plan_generator", "llm")])
+        self.assertEqual(plan.children[0].attributes["prompt_tokens"], 120)
+
+        summary = totals(root)
+        self.assertEqual(summary["llm_calls"], 7) # Rules routing, so no coordinator call
+        self.assertEqual(summary["cached_tokens"], 7 * 64)
+        usage = {"prompt_tokens": 120, "cached_tokens": 64, "completion_tokens": 2}
+        # Four analyses on the small model, three user-facing generations on the large one
+        self.assertAlmostEqual(summary["cost_usd"], 4 * estimate_cost("gpt-4o-mini", usage) + 3 * estimate_cost("gpt-4o", usage))
+        by_tier = {row["tier"]: row for row in totals_by(root, "tier")}
+        self.assertEqual({tier: row["llm_calls"] for tier, row in by_tier.items()}, {"small": 4, "large": 3})
+        self.assertAlmostEqual(by_tier["large"]["cost_usd"], round(3 * estimate_cost("gpt-4o", usage), 6))
+        self.assertTrue(all(row["wall_ms"] >= 0 for row in timing_breakdown(root)))
+
+        exported = json.loads(export_json(root))
+        self.assertEqual(exported["name"], "request")
+        self.assertEqual(len(exported["children"]), len(root.children))
+
+    def test_queue_time_is_recorded_on_llm_spans(self):
+        llm = make_llm(max_concurrency=1, delay=0.01)
+
+        async def run():
+            with trace("request") as root:
+                await asyncio.gather(*(llm.agenerate([{"role": "user", "content": str(i)}], node=f"call_{i}") for i in range(3)))
+            return root
+
+        root = asyncio.run(run())
+        waits = sorted(child.attributes["queue_time"] for child in root.children)
+        self.assertGreater(waits[-1], 0.01) # The last call waited for both others to finish
+
+    def test_errors_are_recorded_and_spans_are_detached_outside_a_trace(self):
+        with self.assertRaises(ValueError):
+            with trace("request") as root:
+                with span("failing"):
+                    raise ValueError("boom")
+        self.assertIn("boom", root.children[0].error)
+        self.assertIsNotNone(root.children[0].duration)
+
+        with span("orphan") as orphan: # No active trace: recorded nowhere, still usable
+            orphan.add(prompt_tokens=3)
+        self.assertEqual(orphan.attributes["prompt_tokens"], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+"""Batch mode: run the agent graph for many (student_id, request) pairs without the UI.
+
+    python -m workflow.batch jobs.jsonl --profiles profiles.json --calendar calendar.ics --tasks tasks.json --out results.jsonl
+
+Each input line is ``{"student_id": ..., "request": ...}``, optionally with its own
+``"profile"``, ``"calendar": {"events": [...]}`` or ``"tasks": {"tasks": [...]}``. Requests run
+``--concurrency`` at a time on one compiled graph, so they share the LLM client,
+scheduler and response cache; one JSON line per request is written as soon as it
+finishes, in completion order.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+from typing import IO, Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+from langchain_core.messages import HumanMessage
+
+from config.llm_config import closing_clients
+from core.state import AcademicState
+from core.tracing import Span, totals, trace
+from data.data_manager import DataManager
+from data.session_store import SessionManager, get_session_manager
+from workflow.graph_registry import get_agents_graph
+
+def read_jobs(source: IO[str]) -> Iterator[Dict]:
+    # Lazily, so a nightly job over every enrolled student is never held in memory at once
+    for number, line in enumerate(source, 1):
+        if not line.strip():
+            continue
+        try:
+            job = json.loads(line)
+        except json.JSONDecodeError as e:
+            job = {"error": f"Invalid JSON: {e}"}
+        if not isinstance(job, dict):
+            job = {"error": "Each line must be a JSON object"}
+        yield {**job, "line": number}
+
+def build_request_state(dm: DataManager, job: Dict, now: Optional[datetime] = None) -> AcademicState:
+    profile = job.get("profile") or dm.get_student_profile(job["student_id"])
+    if profile is None:
+        raise ValueError(f"Unknown student {job['student_id']}")
+    if "calendar" in job or "tasks" in job: # Per-student data in the job line
+        own = DataManager()
+        own.load_data({"profiles": [profile]}, job.get("calendar", {"events": []}), job.get("tasks", {"tasks": []}))
+        dm = own
+    return AcademicState(
+        messages=[HumanMessage(content=job["request"])],
+        profile=profile,
+        calendar=dm.get_calendar(now=now),
+        tasks=dm.get_task_list(now),
+        results={},
+        agent_runs={}
+    )
+
+def summarize_run(results: Dict, request_trace: Span) -> Dict:
+    summary = totals(request_trace)
+    return {
+        "status": "ok",
+        "outputs": results.get("agent_outputs", {}),
+        "agent_errors": results.get("agent_errors", {}),
+        "llm_calls": summary["llm_calls"],
+        "cost_usd": round(summary["cost_usd"], 6)
+    }
+
+async def run_job(graph: Any, dm: DataManager, job: Dict, sessions: Optional[SessionManager] = None) -> Dict:
+    result = {"line": job.get("line"), "student_id": job.get("student_id"), "request": job.get("request")}
+    started = time.perf_counter()
+    try:
+        if "error" in job:
+            raise ValueError(job["error"])
+        if not job.get("student_id") or not job.get("request"):
+            raise ValueError("student_id and request are required")
+        state = build_request_state(dm, job)
+        if sessions is not None:
+            state["results"].update(sessions.restore(state))
+        with trace("request", student_id=job["student_id"]) as request_trace:
+            final_state = await graph.ainvoke(state)
+        results = final_state.get("results", {})
+        if sessions is not None:
+            sessions.save(state, results)
+        result.update(summarize_run(results, request_trace))
+    except Exception as e: # One bad job must not stop the batch
+        result.update({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    result["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return result
+
+async def run_batch(
+        graph: Any,
+        dm: DataManager,
+        jobs: Iterable[Dict],
+        concurrency: int = 4,
+        sessions: Optional[SessionManager] = None
+) -> AsyncIterator[Dict]:
+    """Yield one result per job as it completes, with at most ``concurrency`` in flight.
+
+    A fixed pool of workers pulls jobs from the iterator, so queued jobs cost nothing
+    until a worker is free; the LLM scheduler still caps the API calls underneath.
+    """
+    pending = iter(jobs)
+    finished: asyncio.Queue = asyncio.Queue()
+
+    async def worker() -> None:
+        try:
+            for job in pending: # Shared iterator: each job is taken by exactly one worker
+                finished.put_nowait(await run_job(graph, dm, job, sessions))
+        finally:
+            finished.put_nowait(None) # This worker is done
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+    try:
+        running = len(workers)
+        while running:
+            result = await finished.get()
+            if result is None:
+                running -= 1
+                continue
+            yield result
+        await asyncio.gather(*workers) # Re-raise anything that failed outside run_job, e.g. reading the jobs
+    finally:
+        for task in workers:
+            task.cancel()
+
+async def write_jsonl(results: AsyncIterator[Dict], out: IO[str]) -> Dict[str, int]:
+    counts = {"ok": 0, "error": 0}
+    async for result in results:
+        out.write(json.dumps(result, default=str) + "\n")
+        out.flush() # Downstream tooling can follow the file while the batch runs
+        counts[result["status"]] += 1
+    return counts
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, int]:
+    parser = argparse.ArgumentParser(description="Run ATLAS for many students from a JSONL file of jobs")
+    parser.add_argument("jobs", help="JSONL file of {\"student_id\", \"request\"} lines, or - for stdin")
+    parser.add_argument("--profiles", required=True, help="profiles JSON ({\"profiles\": [...]})")
+    parser.add_argument("--calendar", help="Google Calendar JSON or .ics export shared by all jobs")
+    parser.add_argument("--tasks", help="Google Tasks JSON export shared by all jobs")
+    parser.add_argument("--out", default="-", help="results JSONL file, - for stdout")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight at once")
+    parser.add_argument("--no-sessions", action="store_true", help="do not reuse analyses from earlier runs")
+    args = parser.parse_args(argv)
+
+    with open(args.profiles, "r", encoding="utf-8") as f:
+        profiles = json.load(f)
+    dm = DataManager()
+    dm.load_exports(profiles, args.calendar, args.tasks)
+    graph = get_agents_graph()
+    sessions = None if args.no_sessions else get_session_manager()
+
+    jobs_file = sys.stdin if args.jobs == "-" else open(args.jobs, "r", encoding="utf-8")
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    try:
+        counts = asyncio.run(closing_clients(write_jsonl(run_batch(graph, dm, read_jobs(jobs_file), args.concurrency, sessions), out)))
+    finally:
+        for f in (jobs_file, out):
+            if f not in (sys.stdin, sys.stdout):
+                f.close()
+    print(f"{counts['ok']} succeeded, {counts['error']} failed", file=sys.stderr)
+    return counts
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+try: # langgraph-checkpoint-sqlite is optional; without it checkpoints live in process memory
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+except ImportError:
+    AsyncSqliteSaver = None
+
+# Checkpointed runs: the main graph saves a checkpoint after every superstep and the
+# agent subgraphs (which inherit the checkpointer) after each of theirs. When an LLM
+# call fails or times out the run stops with the completed nodes' outputs saved, and
+# resume_run finishes it from there instead of paying for those calls again.
+
+class BoundedMemorySaver(InMemorySaver):
+    """InMemorySaver that forgets threads nobody resumed.
+
+    Finished runs are dropped by discard_run, but failed or abandoned ones would stay
+    for the life of the process. Each checkpoint write marks its thread as used; threads
+    unused for ``max_age`` seconds, and the least recently used beyond ``max_threads``,
+    are deleted on the next write.
+    """
+    def __init__(self, max_threads: int = 100, max_age: float = 86400.0, time_fn: Callable[[], float] = time.monotonic):
+        super().__init__()
+        self.max_threads = max_threads
+        self.max_age = max_age
+        self._time = time_fn
+        self._used: "OrderedDict[str, float]" = OrderedDict() # thread_id -> last write, oldest first
+        self._lock = threading.Lock()
+
+    def put(self, config: Dict, checkpoint: Any, metadata: Any, new_versions: Any) -> Dict:
+        thread_id = config["configurable"]["thread_id"]
+        now = self._time()
+        with self._lock:
+            self._used[thread_id] = now
+            self._used.move_to_end(thread_id)
+            stale = []
+            while self._used:
+                oldest, used_at = next(iter(self._used.items()))
+                if oldest == thread_id or (len(self._used) <= self.max_threads and now - used_at <= self.max_age):
+                    break
+                self._used.popitem(last=False)
+                stale.append(oldest)
+        for old_thread in stale:
+            super().delete_thread(old_thread)
+        return super().put(config, checkpoint, metadata, new_versions)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._used.pop(thread_id, None)
+        super().delete_thread(thread_id)
+
+    def thread_count(self) -> int:
+        with self._lock:
+            return len(self._used)
+
+_memory_saver = BoundedMemorySaver(
+    max_threads=int(os.getenv("ATLAS_CHECKPOINT_MAX_THREADS", "100")),
+    max_age=float(os.getenv("ATLAS_CHECKPOINT_TTL", "86400"))
+)
+
+@asynccontextmanager
+async def open_checkpointer(path: Optional[str] = None) -> AsyncIterator[Any]:
+    # The SQLite saver's connection belongs to the running event loop, so open one per
+    # run (Streamlit starts a new loop for every script run) instead of caching it
+    path = path if path is not None else os.getenv("ATLAS_CHECKPOINT_DB", "atlas_checkpoints.sqlite")
+    if path and AsyncSqliteSaver is not None:
+        async with AsyncSqliteSaver.from_conn_string(path) as saver:
+            yield saver
+    else:
+        yield _memory_saver
+
+def with_checkpointer(graph: Any, checkpointer: Any) -> Any:
+    # Cheap copy of a compiled (and registry-cached) graph bound to this run's checkpointer
+    return graph.copy(update={"checkpointer": checkpointer})
+
+def new_thread_id() -> str:
+    return uuid.uuid4().hex
+
+def thread_config(thread_id: str) -> Dict:
+    return {"configurable": {"thread_id": thread_id}}
+
+async def pending_nodes(graph: Any, thread_id: str) -> Tuple[str, ...]:
+    """Nodes a stopped run would execute next; empty once the run has finished."""
+    snapshot = await graph.aget_state(thread_config(thread_id))
+    return tuple(snapshot.next)
+
+async def run_checkpointed(graph: Any, state: Dict, thread_id: str) -> Dict:
+    return await graph.ainvoke(state, thread_config(thread_id))
+
+async def resume_run(graph: Any, thread_id: str) -> Dict:
+    """Finish the run saved under thread_id, re-executing only the nodes that had not completed."""
+    config = thread_config(thread_id)
+    snapshot = await graph.aget_state(config)
+    if not snapshot.values:
+        raise KeyError(f"No checkpointed run for thread {thread_id}")
+    if not snapshot.next:
+        return snapshot.values # Already finished
+    return await graph.ainvoke(None, config)
+
+async def discard_run(graph: Any, thread_id: str) -> None:
+    # A finished run's checkpoints are never resumed; drop them so the store does not grow per request
+    await graph.checkpointer.adelete_thread(thread_id)
@@ -1,25 +1,54 @@
 from langgraph.graph import StateGraph, END, START
-from typing import List, Dict, Union, Literal
+from typing import List, Dict, Optional, Union, Literal
 
 # Import components
-from core.state import AcademicState
+from core.state import AcademicState, dict_reducer
+from core.tracing import traced_node
 from config.llm_config import YourLLM
 from agents.coordinator_agent import coordinator_agent
 from agents.planner_agent import PlannerAgent
 from agents.notewriter_agent import NoteWriterAgent
 from agents.advisor_agent import AdvisorAgent
-from executor.agent_executor import AgentExecutor
+from executor.agent_executor import AgentExecutor, ready_agents
+from executor.speculation import SpeculativeLauncher
 
-def create_agents_graph(llm_instance: YourLLM) -> StateGraph:
+def create_agents_graph(llm_instance: YourLLM, speculative: bool = False, router_mode: Optional[str] = None) -> StateGraph:
     workflow = StateGraph(AcademicState)
 
     planner_agent = PlannerAgent(llm_instance)
     notewriter_agent = NoteWriterAgent(llm_instance)
     advisor_agent = AdvisorAgent(llm_instance)
-    executor = AgentExecutor(llm_instance)
+    # The executor only joins what the entry nodes produced, so it shares their agent instances
+    executor = AgentExecutor({
+        "PLANNER": planner_agent,
+        "NOTEWRITER": notewriter_agent,
+        "ADVISOR": advisor_agent
+    })
 
     # MAIN WORKFLOW NODES
-    workflow.add_node("coordinator", lambda state: coordinator_agent(state, llm_instance)) # Pass llm_instance
+    # Speculative mode starts the planner and the other agents' analyze steps
+    # alongside the coordinator call, then keeps only what the coordinator selects
+    launcher = SpeculativeLauncher({
+        "PLANNER": planner_agent,
+        "NOTEWRITER": notewriter_agent.analyze_learning_style,
+        "ADVISOR": advisor_agent.analyze_situation
+    }) if speculative else None
+
+    async def coordinator_node(state: AcademicState) -> Dict:
+        # A plain lambda would hand LangGraph an un-awaited coroutine
+        if launcher is None:
+            return await coordinator_agent(state, llm_instance, router_mode) # Pass llm_instance
+        key = launcher.launch(state)
+        try:
+            update = await coordinator_agent(state, llm_instance, router_mode)
+        except BaseException:
+            launcher.discard(key)
+            raise
+        selected = update["results"]["coordinator_analysis"].get("required_agents", ["PLANNER"])
+        update["results"]["speculation"] = launcher.resolve(key, selected)
+        return update
+
+    workflow.add_node("coordinator", traced_node("coordinator", coordinator_node))
     # Assuming profile_analyzer function is defined in coordinator_agent.py or a utilities file
     # For now, let's move it to a common utility or an agent itself if it needs LLM
     # If profile_analyzer is a standalone function not using LLM, it could stay simple
@@ -41,51 +70,93 @@ def create_agents_graph(llm_instance: YourLLM) -> StateGraph:
         }
         return {"results": {"profile_analysis": {"analysis": analysis_summary}}}
 
-    workflow.add_node("profile_analyzer", simple_profile_analyzer_node) # Using the placeholder
-    workflow.add_node("execute", executor.execute)
+    workflow.add_node("profile_analyzer", traced_node("profile_analyzer", simple_profile_analyzer_node)) # Using the placeholder
+
+    def speculation_key(state: Dict) -> Optional[str]:
+        return state["results"].get("speculation", {}).get("key")
+
+    def speculative_entry(name: str, agent):
+        async def entry(state: AcademicState) -> Dict:
+            try:
+                prefetched = await launcher.claim(state, name)
+                if prefetched is not None and name == "PLANNER":
+                    return prefetched # The whole planner run was speculative
+                if prefetched:
+                    # Hand the prefetched analysis to the subgraph, which then skips that step
+                    state = {**state, "results": dict_reducer(state["results"], prefetched["results"])}
+                return await agent(state)
+            except BaseException:
+                # The run stops here, so the other agents will never claim their tasks
+                launcher.discard(speculation_key(state))
+                raise
+        return entry
+
+    async def speculative_execute(state: AcademicState) -> Dict:
+        try:
+            return await executor.execute(state)
+        finally:
+            launcher.discard(speculation_key(state)) # Nothing is claimed after this point
+
+    workflow.add_node("execute", traced_node("execute", executor.execute if launcher is None else speculative_execute))
 
     # Add agent-specific entry points if they are standalone nodes in the main graph
     # For example, if you want to explicitly call planner_agent.__call__ as a node
-    workflow.add_node("planner_entry", planner_agent.__call__)
-    workflow.add_node("notewriter_entry", notewriter_agent.__call__)
-    workflow.add_node("advisor_entry", advisor_agent.__call__)
+    if launcher is None:
+        workflow.add_node("planner_entry", traced_node("planner_entry", planner_agent.__call__))
+        workflow.add_node("notewriter_entry", traced_node("notewriter_entry", notewriter_agent.__call__))
+        workflow.add_node("advisor_entry", traced_node("advisor_entry", advisor_agent.__call__))
+    else:
+        workflow.add_node("planner_entry", traced_node("planner_entry", speculative_entry("PLANNER", planner_agent)))
+        workflow.add_node("notewriter_entry", traced_node("notewriter_entry", speculative_entry("NOTEWRITER", notewriter_agent)))
+        workflow.add_node("advisor_entry", traced_node("advisor_entry", speculative_entry("ADVISOR", advisor_agent)))
 
 
     # Parallel Execution Routing
-    def route_to_parallel_agents(state: AcademicState) -> List[str]:
-        analysis = state["results"].get("coordinator_analysis", {})
-        required_agents = analysis.get("required_agents", [])
-        next_nodes = []
+    entry_nodes = {
+        "PLANNER": "planner_entry", # Point to the agent's main entry node
+        "NOTEWRITER": "notewriter_entry",
+        "ADVISOR": "advisor_entry"
+    }
+
+    async def dispatch_node(state: AcademicState) -> Dict:
+        # Scheduling point: entries that ran in the same superstep merge here before routing
+        return {}
 
-        if "PLANNER" in required_agents:
-            next_nodes.append("planner_entry") # Point to the agent's main entry node
-        if "NOTEWRITER" in required_agents:
-            next_nodes.append("notewriter_entry")
-        if "ADVISOR" in required_agents:
-            next_nodes.append("advisor_entry")
+    workflow.add_node("dispatch", dispatch_node) # Not traced, it does no work
 
-        return next_nodes if next_nodes else ["planner_entry"] # Default to planner
+    def route_to_parallel_agents(state: AcademicState) -> List[str]:
+        analysis = state["results"].get("coordinator_analysis", {})
+        completed = set(state.get("agent_runs", {}))
+        if not analysis.get("required_agents"):
+            return ["planner_entry"] if "PLANNER" not in completed else ["execute"] # Default to planner
+        next_nodes = [entry_nodes[agent] for agent in ready_agents(analysis, completed) if agent in entry_nodes]
+        return next_nodes if next_nodes else ["execute"] # Everything scheduled has run
 
     # Workflow Connections
-    workflow.add_edge(START, "coordinator")
-    workflow.add_edge("coordinator", "profile_analyzer")
+    # profile_analyzer is local and cheap, running it first gives every agent
+    # (including speculative ones started with the coordinator) its analysis
+    workflow.add_edge(START, "profile_analyzer")
+    workflow.add_edge("profile_analyzer", "coordinator")
+    workflow.add_edge("coordinator", "dispatch")
 
+    # dispatch launches each concurrent group once its dependencies are done
     workflow.add_conditional_edges(
-        "profile_analyzer",
+        "dispatch",
         route_to_parallel_agents,
         {
             "planner_entry": "planner_entry",
             "notewriter_entry": "notewriter_entry",
-            "advisor_entry": "advisor_entry"
+            "advisor_entry": "advisor_entry",
+            "execute": "execute"
         }
     )
 
-    # All agent entry nodes will lead to the 'execute' node
-    # Since agent __call__ methods return results that get merged into the state,
-    # you can have multiple paths converge to 'execute'.
-    workflow.add_edge("planner_entry", "execute")
-    workflow.add_edge("notewriter_entry", "execute")
-    workflow.add_edge("advisor_entry", "execute")
+    # All agent entry nodes return to 'dispatch', which sends the next ready group out or,
+    # once every selected agent has run, moves on to 'execute'. Since agent __call__ methods
+    # return results that get merged into the state, 'execute' joins them without re-running any agent.
+    workflow.add_edge("planner_entry", "dispatch")
+    workflow.add_edge("notewriter_entry", "dispatch")
+    workflow.add_edge("advisor_entry", "dispatch")
 
     # Workflow Completion Checking
     def should_end(state: AcademicState) -> Union[Literal["coordinator"], Literal[END]]:
@@ -0,0 +1,54 @@
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from config.llm_config import LLMConfig, YourLLM, get_openai_key
+from workflow.graph_builder import create_agents_graph
+
+# Process-wide registry of compiled agent graphs, keyed by LLM config.
+# Streamlit reruns the script (and serves every session) in the same process,
+# so building the agents and compiling the graphs is paid once per config.
+_graphs: Dict[Tuple[str, float, int, bool], Any] = {}
+_graphs_lock = threading.Lock()
+
+def graph_key(
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        speculative: bool = False
+) -> Tuple[str, float, int, bool]:
+    return (
+        model if model is not None else LLMConfig.model,
+        temperature if temperature is not None else LLMConfig.default_temp,
+        max_tokens if max_tokens is not None else LLMConfig.max_tokens,
+        speculative
+    )
+
+def get_agents_graph(
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        speculative: bool = False
+):
+    key = graph_key(model, temperature, max_tokens, speculative)
+    with _graphs_lock:
+        graph = _graphs.get(key)
+        if graph is None:
+            model_name, temp, tokens, _ = key
+            llm_instance = YourLLM(get_openai_key(), model=model_name, temperature=temp, max_tokens=tokens)
+            graph = create_agents_graph(llm_instance, speculative=speculative)
+            _graphs[key] = graph
+    return graph
+
+def invalidate_agents_graph(
+        model: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        speculative: bool = False
+) -> bool:
+    # Drop a single config's graph; returns whether anything was cached for it
+    with _graphs_lock:
+        return _graphs.pop(graph_key(model, temperature, max_tokens, speculative), None) is not None
+
+def clear_agents_graphs() -> None:
+    with _graphs_lock:
+        _graphs.clear()